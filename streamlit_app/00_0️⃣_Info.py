@@ -1,7 +1,11 @@
 import streamlit as st
 from datetime import datetime
+from statsapp.instrumentation import start_run, finish_run
+from statsapp.warmup import start_warm_up
 
 st.set_page_config(page_title="Streamlit Statistics Calculator", page_icon="🧮")
+# Opt-in profiling of this run (STATSAPP_PROFILE=1 or ?profile=1)
+start_run("Info")
 
 # Generate the current timestamp dynamically
 current_timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -29,21 +33,38 @@ The Statistics Calculator leverages the following technologies:
    - Generate datasets based on the Normal Distribution.
    - Specify parameters such as mean, standard deviation, and sample size.
    - Download the generated data or copy it directly from the app.
+   - Generate up to 100 million values with a reproducible seed and save them as CSV, Parquet, NumPy or StatsApp binary (.sds) files.
 
 2. **Normal Distribution Checker**:
    - Analyse your dataset to determine if it follows a Normal Distribution.
-   - Perform statistical tests like the Shapiro-Wilk test.
+   - Perform normality tests: Shapiro-Wilk, D'Agostino-Pearson, Anderson-Darling, Jarque-Bera and Kolmogorov-Smirnov.
+   - Analyse large CSV files in streaming mode, reading the data in chunks; datasets saved on the server are summarised in parallel partitions.
+   - Analyse every numerical column of a CSV file at once, in parallel: a sortable summary table with the p-value of every test, plus details and plots for the column you pick.
+   - Run an incremental session: append batches as data arrives and get updated moments, approximate quantiles, histogram and normality test without reprocessing earlier batches.
+   - Open binary (.sds or .npy) datasets from the Generator without parsing, including large files kept on the server.
+   - Paste data separated by commas, semicolons, spaces or new lines; entries that are not numbers are reported and skipped.
    - Visualise your data against a theoretical normal curve.
+   - Check normality visually with a Q-Q plot, drawn from fixed-memory quantile and histogram sketches in streaming mode.
 
 3. **Significance Level Calculator**:
    - Calculate p-values for Z-tests, T-tests, and more.
+   - Upload a CSV of test statistics to get all p-values at once, with optional Benjamini-Hochberg or Bonferroni correction.
+   - Run Chi-Square goodness-of-fit and independence tests straight from raw categorical data (CSV with tens of millions of rows and many categories), with a Monte Carlo permutation p-value when expected counts are small.
    - Visualise acceptance and rejection regions.
    - Determine if the null hypothesis (H₀) can be rejected at a given significance level.
 
 4. **Confidence Interval Calculator**:
-   - Compute confidence intervals for means and proportions.
+   - Compute confidence intervals for means and proportions (Wilson, Agresti-Coull, exact Clopper-Pearson or Wald).
+   - Evaluate proportion intervals for a whole CSV table of cohorts at once, with a pooled summary and a downloadable results file.
    - Visualise confidence intervals with shaded regions.
    - Determine whether specific values fall within the confidence interval.
+   - Bootstrap percentile and BCa intervals for the mean, median or any quantile of an uploaded sample (CSV, `.sds` or `.npy`), with early stopping once the interval stabilises.
+
+5. **Power and Sample Size Calculator**:
+   - Estimate the power of a Z-test, T-test or Chi-Square test, or the sample size needed to reach a target power.
+   - Closed-form answers for normal data; Monte Carlo simulation for skewed or heavy-tailed data or to check the formula, spread over worker processes with a reproducible seed.
+   - Simulation stops once the standard error of the power reaches your target, and the result reports it.
+   - Visualise power against sample size.
 
 ## 🚀 **Getting Started**
 
@@ -130,3 +151,7 @@ This app is intended for educational and demonstration purposes only. The result
 st.write("### 🔄 Last Updated")
 st.write(f"The app was last updated on: **{current_timestamp}**")
 
+# Once the page is drawn, preload the heavy libraries and caches in the background (once per server process)
+start_warm_up()
+
+finish_run()
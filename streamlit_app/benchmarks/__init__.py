@@ -0,0 +1,11 @@
+"""Headless benchmarks of the calculators' hot paths.
+
+Run from the ``streamlit_app`` directory, without starting Streamlit::
+
+    python -m benchmarks run --output results.json
+    python -m benchmarks compare baseline.json results.json
+
+``run`` times every case with ``time.perf_counter`` and measures its peak
+memory with ``tracemalloc``; ``compare`` exits with status 1 when a case got
+slower or used more memory than the baseline by more than the thresholds.
+"""
@@ -0,0 +1,73 @@
+import argparse
+import os
+import sys
+
+# Figures are rendered off-screen, as on the server
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+from benchmarks import runner
+
+
+def run_command(args):
+    from benchmarks.cases import CASES
+
+    document = runner.run(CASES, max_size=args.max_size, name_filter=args.filter, repeat=args.repeat)
+    runner.save(document, args.output)
+    print(f"Results saved to {args.output}")
+    if args.baseline:
+        return compare_documents(runner.load(args.baseline), document, args)
+    return 0
+
+
+def imports_command(args):
+    from benchmarks import imports
+
+    imports.report(imports.run(args.repeat))
+    print(f"Background warm-up: {imports.warm_up_seconds(args.repeat):.3f}s")
+    return 0
+
+
+def compare_documents(baseline, current, args):
+    rows = runner.compare(baseline, current, args.time_threshold, args.memory_threshold)
+    for row in rows:
+        flag = "REGRESSION" if row["regressed"] else ""
+        print(f"{row['case']:40} time x{row['time_ratio']:6.2f}  memory x{row['memory_ratio']:6.2f}  {flag}")
+    regressions = sum(row["regressed"] for row in rows)
+    print(f"{regressions} of {len(rows)} cases regressed.")
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmarks of the StatsApp hot paths.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    thresholds = argparse.ArgumentParser(add_help=False)
+    thresholds.add_argument("--time-threshold", type=float, default=runner.DEFAULT_TIME_THRESHOLD,
+                            help="Allowed relative increase of the median time (default: %(default)s).")
+    thresholds.add_argument("--memory-threshold", type=float, default=runner.DEFAULT_MEMORY_THRESHOLD,
+                            help="Allowed relative increase of the peak memory (default: %(default)s).")
+
+    run_parser = subparsers.add_parser("run", parents=[thresholds], help="Run the benchmarks and save the results.")
+    run_parser.add_argument("--output", default="benchmark_results.json", help="Results file (default: %(default)s).")
+    run_parser.add_argument("--max-size", type=int, help="Skip input sizes above this.")
+    run_parser.add_argument("--filter", help="Only run cases whose name contains this text.")
+    run_parser.add_argument("--repeat", type=int, default=runner.DEFAULT_REPEAT, help="Timing samples per case.")
+    run_parser.add_argument("--baseline", help="Compare the results with this baseline file afterwards.")
+
+    compare_parser = subparsers.add_parser("compare", parents=[thresholds], help="Compare results with a baseline.")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+
+    imports_parser = subparsers.add_parser("imports", help="Measure the cold-start cost of every page.")
+    imports_parser.add_argument("--repeat", type=int, default=3, help="Fresh processes per measurement.")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        return run_command(args)
+    if args.command == "imports":
+        return imports_command(args)
+    return compare_documents(runner.load(args.baseline), runner.load(args.current), args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
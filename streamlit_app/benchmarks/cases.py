@@ -0,0 +1,228 @@
+"""Benchmark cases, one per hot path of the pages.
+
+Each case is a setup function that receives the input size and a scratch
+directory, prepares its inputs outside the timed region and returns the
+zero-argument callable that is timed.
+"""
+import io
+from collections import namedtuple
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from statsapp import api
+from statsapp.core.bootstrap import bootstrap_interval
+from statsapp.core.categorical import MONTE_CARLO, count_categories, crosstab, independence
+from statsapp.core.columns import analyse_columns
+from statsapp.core.incremental import IncrementalSummary
+from statsapp.core.intervals import CLOPPER_PEARSON, batch_proportions, mean_interval
+from statsapp.core.normality import NormalitySample, shapiro_wilk
+from statsapp.core.power import HEAVY_TAILED, T_TEST, simulate_power, simulated_sample_size
+from statsapp.core.significance import batch_significance, single_test
+from statsapp.core.sketches import HistogramSketch, QuantileSketch
+from statsapp.core.streaming import MomentAccumulator, summarise_csv
+from statsapp.dataset import summarise_dataset
+from statsapp.export import to_csv_bytes
+from statsapp.generator import write_dataset
+from statsapp.parsing import parse_numbers
+from statsapp.plotting import interval_figure, qq_probabilities, test_figure
+
+SIZES = (10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7)
+# Text and CSV inputs of 10^7 values are a few hundred MB, more than the pages accept in practice
+TEXT_SIZES = SIZES[:-1]
+
+Case = namedtuple("Case", ["name", "setup", "sizes"])
+
+CASES = []
+
+
+def case(name, sizes=SIZES):
+    def register(setup):
+        CASES.append(Case(name, setup, tuple(sizes)))
+        return setup
+    return register
+
+
+def _normal(n):
+    return np.random.default_rng(0).normal(size=n)
+
+
+def _render(fig):
+    # What st.pyplot does with a figure: rasterise it to PNG, then close it
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png")
+    plt.close(fig)
+    return buffer
+
+
+@case("checker.read_csv", sizes=TEXT_SIZES)
+def read_csv(n, workdir):
+    data = to_csv_bytes(pd.DataFrame({"Values": _normal(n)}))
+    return lambda: pd.read_csv(io.BytesIO(data)).iloc[:, 0].dropna().values
+
+
+@case("checker.summarise_csv", sizes=TEXT_SIZES)
+def streaming_csv(n, workdir):
+    data = to_csv_bytes(pd.DataFrame({"Values": _normal(n)}))
+    return lambda: summarise_csv(io.BytesIO(data))
+
+
+@case("checker.parse_text", sizes=TEXT_SIZES)
+def parse_text(n, workdir):
+    text = ", ".join(map(str, _normal(n)))
+    return lambda: parse_numbers(text)
+
+
+@case("checker.summarise_dataset")
+def summarise_sds(n, workdir):
+    path = workdir / "summarise.sds"
+    write_dataset(path, "StatsApp binary (.sds)", 0.0, 1.0, n, seed=0)
+    return lambda: summarise_dataset(path)
+
+
+@case("service.p_value_batch", sizes=SIZES[:4])
+def service_p_values(n, workdir):
+    # One batch of n requests as the headless service receives them
+    requests = [{"statistic": float(x), "dist": "t", "df": 10 + i % 40, "alpha": 0.05} for i, x in enumerate(_normal(n))]
+    return lambda: api.handle("p_value", requests)
+
+
+@case("checker.columns", sizes=SIZES[:4])
+def columns(n, workdir):
+    # Eight columns of n values each
+    frame = pd.DataFrame({f"column {i}": _normal(n) for i in range(8)})
+    probabilities = qq_probabilities()
+    return lambda: analyse_columns(frame, probabilities)
+
+
+@case("sketches.histogram")
+def histogram_sketch(n, workdir):
+    data = _normal(n)
+    return lambda: HistogramSketch().update(data)
+
+
+@case("sketches.quantile")
+def quantile_sketch(n, workdir):
+    data = _normal(n)
+    return lambda: QuantileSketch().update(data)
+
+
+@case("normality.moments")
+def moments(n, workdir):
+    data = _normal(n)
+    return lambda: MomentAccumulator.from_array(data)
+
+
+@case("incremental.append", sizes=SIZES[:4])
+def incremental_append(n, workdir):
+    # Appending to a session that has already seen 10^6 points costs time in the batch size only
+    summary = IncrementalSummary()
+    summary.append(_normal(10 ** 6))
+    batch = _normal(n)
+    return lambda: summary.append(batch)
+
+
+@case("normality.sample")
+def sample(n, workdir):
+    # Sorting and the moments shared by every test
+    data = _normal(n)
+    return lambda: NormalitySample(data)
+
+
+@case("normality.shapiro_wilk")
+def shapiro(n, workdir):
+    prepared = NormalitySample(_normal(n))
+    return lambda: shapiro_wilk(prepared)
+
+
+@case("significance.batch", sizes=TEXT_SIZES)
+def significance_batch(n, workdir):
+    frame = pd.DataFrame({"statistic": _normal(n), "df": np.arange(n) % 50 + 1, "tail": np.resize(["two", "left", "right"], n)})
+    return lambda: batch_significance(frame, "t", 0.05, correction="Benjamini-Hochberg")
+
+
+@case("significance.figure", sizes=[1])
+def significance_figure(n, workdir):
+    def draw():
+        p_value, critical_value, areas = single_test("t", 2.1, 0.05, df=12)
+        return _render(test_figure(
+            "t", 12, areas, 2.1,
+            title="T-Test Visualisation", xlabel="T-Score",
+            curve_label="T-Distribution", score_label="P-Value (T-Score)",
+        ))
+    return draw
+
+
+@case("intervals.figure", sizes=[1])
+def interval_figure_case(n, workdir):
+    def draw():
+        _, standard_error, lower, upper = mean_interval(0.0, 1.0, 30, 0.95)
+        return _render(interval_figure(
+            0.0, standard_error, lower, upper, 0.0, (lower - 2, upper + 2),
+            title="Confidence Interval for Mean", xlabel="Values", center_label="Mean",
+        ))
+    return draw
+
+
+@case("intervals.clopper_pearson_batch", sizes=TEXT_SIZES)
+def clopper_pearson_batch(n, workdir):
+    rng = np.random.default_rng(0)
+    trials = rng.integers(1, 10_000, size=n)
+    frame = pd.DataFrame({"successes": rng.binomial(trials, 0.03), "trials": trials})
+    return lambda: batch_proportions(frame, 0.95, CLOPPER_PEARSON)
+
+
+@case("categorical.count")
+def categorical_count(n, workdir):
+    labels = np.random.default_rng(0).integers(0, 1000, size=n)
+    return lambda: count_categories(labels)
+
+
+@case("categorical.crosstab")
+def categorical_crosstab(n, workdir):
+    # High-cardinality columns: 10^8 possible cells, counted sparsely
+    rng = np.random.default_rng(0)
+    rows, columns = rng.integers(0, 20_000, size=n), rng.integers(0, 5000, size=n)
+    return lambda: crosstab(rows, columns)
+
+
+@case("categorical.permutation", sizes=SIZES[:3])
+def categorical_permutation(n, workdir):
+    rng = np.random.default_rng(0)
+    table = crosstab(rng.integers(0, 10, size=n), rng.integers(0, 10, size=n))
+    return lambda: independence(table, MONTE_CARLO, permutations=2000, seed=0)
+
+
+@case("bootstrap.mean", sizes=SIZES[:3])
+def bootstrap_mean(n, workdir):
+    # A fixed number of resamples, so the timing does not depend on when the interval stabilises
+    data = _normal(n)
+    return lambda: bootstrap_interval(data, "mean", max_resamples=2000, seed=0)
+
+
+@case("bootstrap.median")
+def bootstrap_median(n, workdir):
+    data = _normal(n)
+    return lambda: bootstrap_interval(data, "quantile", q=0.5, max_resamples=2000, seed=0)
+
+
+@case("power.simulate", sizes=SIZES[:2])
+def power_simulate(n, workdir):
+    # Heavy-tailed samples are drawn in full; a fixed number of simulations keeps the work independent of convergence
+    return lambda: simulate_power(T_TEST, 0.2, n, distribution=HEAVY_TAILED, max_simulations=2000, target_se=0, seed=0)
+
+
+@case("power.sample_size", sizes=[1])
+def power_sample_size(n, workdir):
+    return lambda: simulated_sample_size(T_TEST, 0.5, 0.8, distribution=HEAVY_TAILED, seed=0)
+
+
+@case("generator.npy")
+def generate_npy(n, workdir):
+    return lambda: write_dataset(workdir / "dataset.npy", "NumPy (.npy)", 0.0, 1.0, n, seed=0)
+
+
+@case("generator.csv", sizes=TEXT_SIZES)
+def generate_csv(n, workdir):
+    return lambda: write_dataset(workdir / "dataset.csv", "CSV", 0.0, 1.0, n, seed=0)
@@ -0,0 +1,103 @@
+"""Cold-start cost of every page, each measured in a fresh interpreter.
+
+For every page script two numbers are taken in a new process, after
+Streamlit itself has been imported (its cost is reported separately):
+
+- imports: time to run the module-level import statements of the page;
+- first run: time of the page's first run in Streamlit's test harness, with
+  the default inputs, as after a server restart (in its own process, so it
+  includes the imports).
+
+The heavy modules loaded by the end of the first run are listed too, so
+lazy loading shows up as missing entries. The background warm-up is turned
+off while pages are measured, and its own duration is measured separately.
+"""
+import ast
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from statsapp import warmup
+
+APP_DIR = Path(__file__).resolve().parent.parent
+HEAVY_MODULES = ["pandas", "scipy.stats", "matplotlib.pyplot"]
+
+_PROBE = r"""
+import json, os, sys, time
+sys.path.insert(0, {app_dir!r})
+os.chdir({app_dir!r})
+start = time.perf_counter()
+import streamlit
+from streamlit.testing.v1 import AppTest
+streamlit_seconds = time.perf_counter() - start
+
+start = time.perf_counter()
+if {mode!r} == "first_run":
+    AppTest.from_file({page!r}, default_timeout=120).run()
+elif {mode!r} == "warm_up":
+    from statsapp.warmup import warm_up
+    warm_up()
+else:
+    exec(compile({imports!r}, "imports", "exec"), {{}})
+seconds = time.perf_counter() - start
+print(json.dumps({{
+    "streamlit": streamlit_seconds, "seconds": seconds,
+    "loaded": [name for name in {heavy!r} if name in sys.modules],
+}}))
+"""
+
+
+def pages():
+    return sorted(APP_DIR.glob("00_*.py")) + sorted((APP_DIR / "pages").glob("[0-9]*.py"))
+
+
+def import_statements(path):
+    """Source of the module-level imports of a script."""
+    tree = ast.parse(path.read_text(encoding="utf-8"))
+    return "\n".join(ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+def _probe(path, mode):
+    code = _PROBE.format(
+        app_dir=str(APP_DIR), imports=import_statements(path), page=str(path), heavy=HEAVY_MODULES, mode=mode
+    )
+    # The background warm-up would compete with the run being measured
+    env = dict(os.environ, **{warmup.ENV_FLAG: "0"})
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, env=env)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def run(repeat=3):
+    """Median figures of every page over ``repeat`` fresh processes per measurement."""
+    rows = []
+    for path in pages():
+        imports = [_probe(path, "imports") for _ in range(repeat)]
+        first_runs = [_probe(path, "first_run") for _ in range(repeat)]
+        rows.append({
+            "page": path.stem,
+            "streamlit": _median([sample["streamlit"] for sample in imports + first_runs]),
+            "imports": _median([sample["seconds"] for sample in imports]),
+            "first_run": _median([sample["seconds"] for sample in first_runs]),
+            "loaded": first_runs[-1]["loaded"],
+        })
+    return rows
+
+
+def warm_up_seconds(repeat=3):
+    """Median time of ``statsapp.warmup.warm_up`` in a fresh process."""
+    return _median([_probe(pages()[0], "warm_up")["seconds"] for _ in range(repeat)])
+
+
+def _median(values):
+    return sorted(values)[len(values) // 2]
+
+
+def report(rows):
+    print(f"{'page':45} {'streamlit':>10} {'imports':>10} {'first run':>10}  heavy modules loaded")
+    for row in rows:
+        print(
+            f"{row['page']:45} {row['streamlit']:9.3f}s {row['imports']:9.3f}s {row['first_run']:9.3f}s  "
+            f"{', '.join(row['loaded']) or '-'}"
+        )
@@ -0,0 +1,117 @@
+"""Timing, peak-memory measurement and baseline comparison."""
+import json
+import platform
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import scipy
+
+DEFAULT_REPEAT = 5
+# Fast cases are looped until one timing sample takes at least this long
+MIN_SAMPLE_TIME = 0.01
+DEFAULT_TIME_THRESHOLD = 0.25
+DEFAULT_MEMORY_THRESHOLD = 0.25
+# Peak-memory changes smaller than this are noise, whatever the ratio
+MEMORY_FLOOR = 1024 * 1024
+
+
+def measure(function, repeat=DEFAULT_REPEAT):
+    """Median and best time per call, and peak traced memory of one call."""
+    # Warm-up call, also used to decide how many calls make up one sample
+    start = time.perf_counter()
+    function()
+    loops = max(1, int(MIN_SAMPLE_TIME / max(time.perf_counter() - start, 1e-9)))
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            function()
+        timings.append((time.perf_counter() - start) / loops)
+
+    # Memory is measured in a separate call, since tracing slows allocations down
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "median_s": statistics.median(timings),
+        "min_s": min(timings),
+        "peak_bytes": peak,
+        "repeat": repeat,
+        "loops": loops,
+    }
+
+
+def metadata():
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "scipy": scipy.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+    }
+
+
+def key(name, size):
+    return f"{name}[n={size}]"
+
+
+def run(cases, max_size=None, name_filter=None, repeat=DEFAULT_REPEAT, report=print):
+    """Run the selected cases and return the results document."""
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="statsapp_bench_") as workdir:
+        for case in cases:
+            if name_filter and name_filter not in case.name:
+                continue
+            for size in case.sizes:
+                if max_size is not None and size > max_size:
+                    continue
+                function = case.setup(size, Path(workdir))
+                results[key(case.name, size)] = result = measure(function, repeat)
+                del function
+                report(f"{key(case.name, size):40} {result['median_s'] * 1000:12.3f} ms {result['peak_bytes'] / 2 ** 20:10.1f} MiB")
+    return {"metadata": metadata(), "results": results}
+
+
+def save(document, path):
+    Path(path).write_text(json.dumps(document, indent=2) + "\n")
+
+
+def load(path):
+    return json.loads(Path(path).read_text())
+
+
+def compare(baseline, current, time_threshold=DEFAULT_TIME_THRESHOLD, memory_threshold=DEFAULT_MEMORY_THRESHOLD):
+    """Compare two results documents; returns one row per case present in both.
+
+    A case regresses when its median time grows by more than ``time_threshold``
+    or its peak memory by more than ``memory_threshold`` (and ``MEMORY_FLOOR``).
+    """
+    rows = []
+    for name, old in baseline["results"].items():
+        new = current["results"].get(name)
+        if new is None:
+            continue
+        time_ratio = new["median_s"] / old["median_s"]
+        memory_ratio = (new["peak_bytes"] + 1) / (old["peak_bytes"] + 1)
+        slower = time_ratio > 1 + time_threshold
+        larger = memory_ratio > 1 + memory_threshold and new["peak_bytes"] - old["peak_bytes"] > MEMORY_FLOOR
+        rows.append({
+            "case": name,
+            "time_ratio": time_ratio,
+            "memory_ratio": memory_ratio,
+            "regressed": slower or larger,
+        })
+    return rows
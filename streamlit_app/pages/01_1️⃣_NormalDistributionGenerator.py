@@ -1,9 +1,20 @@
 # 01_NormalDistributionGenerator.py
+import os
 import streamlit as st
-import numpy as np
-import pandas as pd
+from statsapp.generator import (
+    write_dataset, write_dataset_parallel, output_path, new_seed, FORMATS, PARALLEL_FORMATS, PREVIEW_ROWS, OUTPUT_TTL_HOURS,
+)
+from statsapp.parallel import default_workers
+from statsapp.instrumentation import start_run, finish_run, stage
+from statsapp.lazy import lazy_module
+from statsapp.warmup import start_warm_up
+
+# Heavy libraries are imported on first use, so the page opens without loading them
+pd = lazy_module("pandas")
 
 st.set_page_config(page_title="Normal Distribution Generator", page_icon="🧮")
+# Opt-in profiling of this run (STATSAPP_PROFILE=1 or ?profile=1)
+start_run("Normal Distribution Generator")
 
 st.title("Normal Distribution Generator")
 
@@ -11,32 +22,86 @@ st.markdown(
     """
     This tool allows you to generate a dataset based on a Normal Distribution.
     Specify the mean, standard deviation, and the size of the dataset, then click Generate.
-    You can copy the dataset or download it as a CSV file.
+    You can copy the dataset or download it as a CSV, Parquet, NumPy or StatsApp binary file.
+    The StatsApp binary format (.sds) stores the generation parameters with the data and is the fastest format to analyse.
 
     Once you have generated the dataset, head over to the [Normal Distribution Checker](./NormalDistributionChecker) page to analyse the data.
     """
 )
 
+# Datasets above this size are kept on the server instead of being offered as a download
+MAX_DOWNLOAD_MB = int(os.environ.get("STATSAPP_MAX_DOWNLOAD_MB", 200))
+
 # Input fields
 mean = st.number_input("Population Mean (μ):", value=0.0)
 std_dev = st.number_input("Standard Deviation (σ):", value=1.0, min_value=0.0, format="%.2f")
-size = st.number_input("Size of Dataset:", value=100, min_value=1, max_value=5000, step=1)
+size = st.number_input("Size of Dataset:", value=100, min_value=1, max_value=100_000_000, step=1)
+seed_input = st.text_input("Random Seed (optional):", "", help="Use the same seed to generate the same dataset again.")
+file_format = st.selectbox("File Format:", list(FORMATS))
+
+# Binary files can be filled in place by several processes at once
+workers = 1
+if file_format in PARALLEL_FORMATS:
+    workers = st.number_input(
+        "Worker Processes:",
+        value=1,
+        min_value=1,
+        max_value=default_workers() * 4,
+        step=1,
+        help="Each worker fills its own slice of the file, block by block from independent random streams. "
+        "The same seed always gives the same dataset, whatever the number of workers.",
+    )
 
 if st.button("Generate"):
     try:
-        # Generate normal distribution data
-        data = np.random.normal(loc=mean, scale=std_dev, size=int(size))
+        seed = int(seed_input) if seed_input.strip() else new_seed()
 
-        # Display generated data
+        # Remove the file from the previous run before writing a new one
+        previous_path = st.session_state.pop("generator_output", None)
+        if previous_path is not None and os.path.exists(previous_path):
+            os.remove(previous_path)
+
+        # Generate normal distribution data chunk by chunk straight to disk
+        path = output_path(file_format)
+        st.session_state["generator_output"] = str(path)
+        with st.spinner("Generating dataset..."), stage("generate dataset"):
+            if workers > 1:
+                preview, moments = write_dataset_parallel(path, file_format, mean, std_dev, int(size), seed=seed, workers=int(workers))
+            else:
+                preview, moments = write_dataset(path, file_format, mean, std_dev, int(size), seed=seed)
+
+        # Display a preview of the generated data
         st.write("### Generated Dataset:")
-        st.dataframe(pd.DataFrame(data, columns=["Values"]))
+        st.write(f"Seed: **{seed}**, Mean: {moments.mean:.4f}, Standard Deviation: {moments.std:.4f}")
+        if size > PREVIEW_ROWS:
+            st.caption(f"Showing the first {PREVIEW_ROWS} of {int(size)} values.")
+        st.dataframe(pd.DataFrame(preview, columns=["Values"]))
 
         # Provide options to copy or download the data
-        csv = pd.DataFrame(data, columns=["Values"]).to_csv(index=False)
-        st.download_button(label="Download CSV", data=csv, file_name="normal_distribution.csv", mime="text/csv")
+        extension, mime = FORMATS[file_format]
+        if path.stat().st_size <= MAX_DOWNLOAD_MB * 1024 * 1024:
+            with stage("download button"):
+                with open(path, "rb") as handle:
+                    st.download_button(
+                        label=f"Download {file_format}",
+                        data=handle,
+                        file_name=f"normal_distribution{extension}",
+                        mime=mime,
+                    )
+        else:
+            st.info(
+                f"The dataset is larger than {MAX_DOWNLOAD_MB} MB and was saved on the server as `{path.name}` "
+                f"for {OUTPUT_TTL_HOURS:g} hours. Enter this file name on the Normal Distribution Checker page to analyse it."
+            )
 
-        st.text_area("Copy the data:", value=", ".join(map(str, data)), height=200)
+        # Only datasets that fit in the preview are offered in full in the copy box
+        if size <= PREVIEW_ROWS:
+            st.text_area("Copy the data:", value=", ".join(map(str, preview)), height=200)
 
     except Exception as e:
         st.error(f"An error occurred: {e}")
 
+# Once the page is drawn, preload the heavy libraries and caches in the background (once per server process)
+start_warm_up()
+
+finish_run()
@@ -1,84 +1,418 @@
-# 01_NormalDistributionGenerator.py
+# 02_NormalDistributionChecker.py
 import streamlit as st
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-from scipy.stats import norm, shapiro
+from statsapp.core.streaming import summarise_csv, summarise_array, DEFAULT_CHUNK_SIZE
+from statsapp.core.normality import NormalitySample, run_test, TESTS, MOMENT_TESTS, AUTO
+from statsapp.core.incremental import IncrementalSummary, QUANTILES
+from statsapp.core.columns import analyse_columns, summary_table, numeric_columns
+from statsapp.cache import get_cache, content_hash, show_cache_stats
+from statsapp.core.sketches import HistogramSketch
+from statsapp.plotting import qq_figure, qq_probabilities, show_figure
+from statsapp.dataset import open_dataset, is_binary, summarise_dataset
+from statsapp.parallel import default_workers
+from statsapp.generator import resolve_output_file
+from statsapp.parsing import parse_numbers
+from statsapp.instrumentation import start_run, finish_run, stage, stop
+from statsapp.lazy import lazy_module, lazy_attributes
+from statsapp.warmup import start_warm_up
+
+# Heavy libraries are imported on first use, so the page opens without loading them
+pd = lazy_module("pandas")
+plt = lazy_module("matplotlib.pyplot")
+norm = lazy_attributes("scipy.stats", "norm")
 
 st.set_page_config(page_title="Normal Distribution Checker", page_icon="🧮")
+# Opt-in profiling of this run (STATSAPP_PROFILE=1 or ?profile=1)
+start_run("Normal Distribution Checker")
 
 st.title("Normal Distribution Checker")
 
 st.markdown(
     """
     Input your data below, and we'll analyse its distribution and compare it to a standard Normal Distribution (mean=0, standard deviation=1).
-    You can either upload a CSV file or paste the data.
+    You can upload a CSV file, open a binary dataset (.sds or .npy) from the Normal Distribution Generator, or paste the data.
     """
 )
 
 # Input data options
-uploaded_file = st.file_uploader("Upload a CSV file:", type=["csv"])
-user_input = st.text_area("Or enter your numerical data (comma-separated):", "")
+uploaded_file = st.file_uploader("Upload a CSV, StatsApp binary (.sds) or NumPy (.npy) file:", type=["csv", "sds", "npy"])
+server_file = st.text_input(
+    "Or open a dataset saved on the server by the Generator (file name):",
+    "",
+    help="Large datasets that are not offered as a download stay on the server and can be opened here without uploading them.",
+).strip()
+user_input = st.text_area("Or enter your numerical data (separated by commas, semicolons, spaces or new lines):", "")
+streaming = st.checkbox(
+    "Streaming mode (large files)",
+    help="Reads the data in chunks and keeps only running statistics in memory.",
+)
+incremental = st.checkbox(
+    "Incremental session (append batches)",
+    help="Keeps running statistics for this browser session and updates them with every appended batch, "
+         "without keeping the data itself.",
+)
+multi_column = st.checkbox(
+    "Multi-column mode (CSV files)",
+    help="Analyses every numerical column of the uploaded CSV file in parallel, instead of only the first one.",
+)
+workers = default_workers()
+if streaming or multi_column:
+    workers = st.number_input(
+        "Worker Processes:", value=default_workers(), min_value=1, max_value=64, step=1,
+        help="Server datasets (streaming mode) are summarised in partitions, and columns are analysed, by several processes.",
+    )
+
+# Streamed data only keeps its moments, so only the moment-based tests are offered
+test_options = [AUTO] + (MOMENT_TESTS if streaming or incremental else list(TESTS))
+test_name = st.selectbox(
+    "Normality Test:",
+    test_options,
+    help="Auto uses Shapiro-Wilk up to 5000 points and D'Agostino-Pearson for larger datasets.",
+)
+alpha = st.number_input("Set Significance Level (Alpha, α):", value=0.05, min_value=0.001, max_value=0.1, step=0.001, format="%.3f")
+
+# Parsed datasets and test results are cached on the content of the data,
+# so changing only alpha or re-analysing the same data does no work again
+cache = get_cache("checker")
+
+# Binary datasets are memory-mapped (server files) or wrapped in place (uploads), with no parsing step
+binary = (uploaded_file is not None and is_binary(uploaded_file.name)) or (uploaded_file is None and bool(server_file))
+
+
+def open_binary():
+    if uploaded_file is not None:
+        return open_dataset(uploaded_file)
+    return open_dataset(resolve_output_file(server_file))
+
+
+def source_key():
+    if uploaded_file is not None:
+        return ("upload", content_hash(uploaded_file))
+    if server_file:
+        stat = resolve_output_file(server_file).stat()
+        return ("server", server_file, stat.st_mtime_ns, stat.st_size)
+    return ("text", content_hash(user_input))
+
+
+def show_params():
+    params = open_binary().params
+    if params:
+        st.write("### Dataset Parameters:")
+        st.json(params)
+
+
+def show_distribution_figures(moments, histogram, sample_quantiles):
+    """``sample_quantiles`` are the quantiles of the data at ``qq_probabilities()``."""
+    # Plot a histogram sketch against a Normal Distribution; neither figure needs the data itself
+    st.write("### Data Visualisation:")
+    with stage("figure"):
+        fig, ax = plt.subplots()
+
+        density, edges = histogram.density()
+        ax.stairs(density, edges, fill=True, alpha=0.6, color='blue', label="Input Data")
+
+        x = np.linspace(moments.min, moments.max, 1000)
+        ax.plot(x, norm.pdf(x, 0, 1), 'r--', label="Standard Normal (mean=0, std_dev=1)")
+        ax.plot(x, norm.pdf(x, moments.mean, moments.std), 'g-', label=f"Actual (mean={moments.mean:.2f}, std_dev={moments.std:.2f})")
+
+        ax.set_title("Normal Distribution Comparison")
+        ax.set_xlabel("Values")
+        ax.set_ylabel("Density")
+        ax.legend(loc='upper center', bbox_to_anchor=(0.5, -0.1), fancybox=True, shadow=True, ncol=1)
+
+        show_figure(fig)
+
+    # Q-Q plot of the sample quantiles against the normal distribution
+    with stage("q-q plot"):
+        show_figure(qq_figure(sample_quantiles, qq_probabilities(), moments.mean, moments.std))
+
+
+def batch_chunks():
+    """The selected input as chunks of values, so a large file is never held in memory at once."""
+    if binary:
+        values = open_binary().values
+        return (values[start:start + DEFAULT_CHUNK_SIZE] for start in range(0, len(values), DEFAULT_CHUNK_SIZE))
+    uploaded_file.seek(0)
+    return (frame.iloc[:, 0] for frame in pd.read_csv(uploaded_file, usecols=[0], chunksize=DEFAULT_CHUNK_SIZE))
+
+
+def show_incremental(summary):
+    moments = summary.moments
+    st.write("### Session Statistics:")
+    st.write(f"Count: {moments.count} (from {summary.batches} batches)")
+    st.write(f"Mean: {moments.mean}")
+    st.write(f"Standard Deviation: {moments.std}")
+    st.write(f"Skewness: {moments.skewness}")
+    st.write(f"Kurtosis (excess): {moments.kurtosis}")
+
+    with stage("quantiles"):
+        quantiles = pd.DataFrame({"Quantile": QUANTILES, "Value": summary.quantiles(QUANTILES)})
+    st.write("### Approximate Quantiles:")
+    st.dataframe(quantiles, hide_index=True)
+    st.caption(
+        f"Kept in memory: {summary.histogram.bins} histogram bins and {summary.sketch.size} sketch values "
+        f"for {moments.count} data points."
+    )
+
+    with stage("normality test"):
+        result = summary.normality(test_name)
+    st.write(f"### {result.name} Test for Normality:")
+    st.write(f"Statistic: {result.statistic}, p-value: {result.p_value}")
+    if result.p_value > alpha:
+        st.success(f"The data so far follows a Normal Distribution based on the {result.name} test.")
+    else:
+        st.warning(f"The data so far does not follow a Normal Distribution based on the {result.name} test.")
+
+    show_distribution_figures(moments, summary.histogram, summary.quantiles(qq_probabilities()))
+
+
+if incremental:
+    # The summary and the keys of the batches it contains live in the browser session
+    summary = st.session_state.setdefault("incremental_summary", IncrementalSummary())
+    appended = st.session_state.setdefault("incremental_batches", set())
+
+    append_column, reset_column = st.columns(2)
+    append = append_column.button("Append Batch")
+    if reset_column.button("Reset Session"):
+        summary = st.session_state["incremental_summary"] = IncrementalSummary()
+        appended = st.session_state["incremental_batches"] = set()
+
+    if append:
+        try:
+            if uploaded_file is None and not server_file and not user_input:
+                st.warning("Please upload a file or input numerical data.")
+            elif source_key() in appended:
+                st.info("This batch has already been appended to the session.")
+            else:
+                # Only the new batch is read; the statistics of earlier batches are updated in place
+                with stage("append batch"):
+                    if uploaded_file is None and not server_file:
+                        values, parse_errors = parse_numbers(user_input)
+                        if parse_errors:
+                            st.warning(f"Skipped {len(parse_errors)} entries that are not finite numbers.")
+                        added = summary.append(values)
+                    else:
+                        added = summary.append_chunks(batch_chunks())
+                appended.add(source_key())
+                st.success(f"Appended {added} values.")
+        except Exception as e:
+            st.error(f"An error occurred: {e}")
+
+    if summary.count:
+        try:
+            show_incremental(summary)
+        except Exception as e:
+            st.error(f"An error occurred: {e}")
+    else:
+        st.info("Append a batch of data to start the session.")
 
-if st.button("Analyse"):
+
+def show_column_details(report):
+    st.write(f"### Column {report.name}:")
+    st.write(f"Count: {report.count} ({report.missing} missing)")
+    st.write(f"Mean: {report.moments.mean}")
+    st.write(f"Standard Deviation: {report.moments.std}")
+    if not report.results:
+        st.warning("This column has too few distinct values to test for normality.")
+        return
+    tests = pd.DataFrame(
+        [{"Test": result.name, "Statistic": result.statistic, "p-value": result.p_value, "Points Used": result.n_used}
+         for result in report.results.values()]
+    )
+    tests["Normal at α"] = tests["p-value"] > alpha
+    st.dataframe(tests, hide_index=True)
+    show_distribution_figures(report.moments, report.histogram, report.quantiles)
+
+
+if multi_column and not incremental:
+    if st.button("Analyse Columns"):
+        if uploaded_file is None or binary:
+            st.warning("Please upload a CSV file to analyse its columns.")
+        else:
+            # Keep showing the analysis of this file on later reruns, e.g. when another column is picked
+            st.session_state["multi_column_source"] = source_key()
+
+    if uploaded_file is not None and not binary and st.session_state.get("multi_column_source") == source_key():
+        try:
+            dataset_key = ("columns",) + source_key()
+
+            def load_frame():
+                uploaded_file.seek(0)
+                return pd.read_csv(uploaded_file)
+
+            with stage("load data"):
+                frame = cache.get_or_compute(dataset_key, load_frame)
+            # The columns are analysed in parallel; the results are cached, so rerunning to show details is cheap
+            with stage("analyse columns"):
+                reports = cache.get_or_compute(
+                    dataset_key + ("reports",), lambda: analyse_columns(frame, qq_probabilities(), workers=workers)
+                )
+            if not reports:
+                st.warning("The file does not contain any numerical columns.")
+                stop()
+            skipped = [str(name) for name in frame.columns if name not in numeric_columns(frame)]
+            if skipped:
+                st.info(f"Skipped non-numerical columns: {', '.join(skipped)}.")
+
+            # The selected test, or the automatic choice for each column, decides the verdict
+            table = summary_table(reports)
+            chosen = [report.auto_test if test_name == AUTO else test_name for report in reports]
+            verdict_p = [
+                report.results[name].p_value if name in report.results else np.nan
+                for report, name in zip(reports, chosen)
+            ]
+            table["Verdict Test"] = chosen
+            table["Normal at α"] = np.array(verdict_p) > alpha
+
+            st.write(f"### Summary of {len(reports)} Columns:")
+            st.success(f"{int(table['Normal at α'].sum())} of {len(reports)} columns follow a Normal Distribution at α = {alpha:.3f}.")
+            st.dataframe(table, hide_index=True)
+            st.caption("Click a column header to sort the table.")
+
+            # Details are only drawn for the column that is picked
+            names = [report.name for report in reports]
+            picked = st.selectbox("Show Details for Column:", ["(none)"] + names)
+            if picked != "(none)":
+                show_column_details(reports[names.index(picked)])
+
+        except Exception as e:
+            st.error(f"An error occurred: {e}")
+
+analyse = not incremental and not multi_column and st.button("Analyse")
+
+if analyse and streaming and (uploaded_file is not None or server_file):
     try:
-        if uploaded_file is not None:
-            # Load data from CSV file
-            df = pd.read_csv(uploaded_file)
-            st.write("### Uploaded Data Preview:")
-            st.write(df.head())
-
-            # Assume data is in the first column
-            data = df.iloc[:, 0].dropna().values
-        elif user_input:
-            # Process input data from text area
-            raw_data = user_input.replace("\n", ",")
-            data = np.array([float(x) for x in raw_data.split(",") if x.strip() != ""])
+        # Single pass over the data: moments, histogram and quantile sketch are updated chunk by chunk,
+        # and datasets on the server are summarised in parallel partitions that are merged afterwards
+        dataset_key = ("stream",) + source_key()
+        if binary and uploaded_file is None:
+            summarise = lambda: (summarise_dataset(resolve_output_file(server_file), workers=workers), None)
+        elif binary:
+            summarise = lambda: (summarise_array(open_binary().values, chunksize=DEFAULT_CHUNK_SIZE), None)
         else:
-            st.warning("Please upload a file or input numerical data.")
-            exit()
+            summarise = lambda: summarise_csv(uploaded_file, chunksize=DEFAULT_CHUNK_SIZE)
+        with stage("summarise data"):
+            summary, preview = cache.get_or_compute(dataset_key, summarise)
+        moments = summary.moments
+        if binary:
+            show_params()
+            preview = pd.DataFrame({"Values": open_binary().values[:5]})
+        st.write("### Uploaded Data Preview:")
+        st.write(preview)
 
-        # Calculate mean and standard deviation
-        mean = np.mean(data)
-        std_dev = np.std(data)
+        if moments.count == 0:
+            st.warning("The first column of the file does not contain any numerical data.")
+            stop()
+
+        mean = moments.mean
+        std_dev = moments.std
 
         st.write("### Input Data Statistics:")
+        st.write(f"Count: {moments.count}")
         st.write(f"Mean: {mean}")
         st.write(f"Standard Deviation: {std_dev}")
+        st.write(f"Skewness: {moments.skewness}")
+        st.write(f"Kurtosis (excess): {moments.kurtosis}")
 
-        # Perform Shapiro-Wilk test for normality
-        st.write("### Shapiro-Wilk Test for Normality:")
-        shapiro_stat, shapiro_p = shapiro(data)
-        st.write(f"Statistic: {shapiro_stat}, p-value: {shapiro_p}")
+        # Only the streamed moments are available, so run a moment-based test
+        with stage("normality test"):
+            result = cache.get_or_compute(
+                dataset_key + (test_name,), lambda: run_test(test_name, NormalitySample.from_moments(moments))
+            )
+        st.write(f"### {result.name} Test for Normality:")
+        st.write(f"Statistic: {result.statistic}, p-value: {result.p_value}")
 
-        if shapiro_p > 0.05:
-            st.success("The data follows a Normal Distribution based on the Shapiro-Wilk test.")
+        if result.p_value > alpha:
+            st.success(f"The data follows a Normal Distribution based on the {result.name} test.")
         else:
-            st.warning("The data does not follow a Normal Distribution based on the Shapiro-Wilk test.")
+            st.warning(f"The data does not follow a Normal Distribution based on the {result.name} test.")
 
-        # Plot the data against a Normal Distribution
-        st.write("### Data Visualisation:")
-        fig, ax = plt.subplots()
+        show_distribution_figures(moments, summary.histogram, summary.quantiles(qq_probabilities()))
+
+    except Exception as e:
+        st.error(f"An error occurred: {e}")
 
-        # Histogram of input data
-        ax.hist(data, bins=30, density=True, alpha=0.6, color='blue', label="Input Data")
+elif analyse:
+    try:
+        if uploaded_file is None and not server_file and not user_input:
+            st.warning("Please upload a file or input numerical data.")
+            stop()
+        dataset_key = source_key()
 
-        # Plot standard normal distribution curve
-        x = np.linspace(min(data), max(data), 1000)
-        ax.plot(x, norm.pdf(x, 0, 1), 'r--', label="Standard Normal (mean=0, std_dev=1)")
+        def load_sample():
+            # Tokens in the pasted data that are not finite numbers
+            parse_errors = []
+            if binary:
+                # The binary values are memory-mapped; dropping missing values copies them into memory once
+                with stage("open dataset"):
+                    data = open_binary().values
+                    data = data[~np.isnan(data)]
+                preview = pd.DataFrame({"Values": data[:5]})
+            elif uploaded_file is not None:
+                # Load data from CSV file
+                with stage("pd.read_csv"):
+                    df = pd.read_csv(uploaded_file)
 
-        # Plot actual data's normal curve
-        ax.plot(x, norm.pdf(x, mean, std_dev), 'g-', label=f"Actual (mean={mean:.2f}, std_dev={std_dev:.2f})")
+                # Assume data is in the first column
+                data = df.iloc[:, 0].dropna().values
+                preview = df.head()
+            else:
+                # Process input data from text area in one bulk conversion
+                with stage("parse text"):
+                    data, parse_errors = parse_numbers(user_input)
+                preview = None
 
-        ax.set_title("Normal Distribution Comparison")
-        ax.set_xlabel("Values")
-        ax.set_ylabel("Density")
+            # Sort the data and calculate its moments once for every test
+            with stage("sort and moments"):
+                sample = NormalitySample(data)
+            return preview, sample, parse_errors
 
-        # Place legend outside the graph
-        ax.legend(loc='upper center', bbox_to_anchor=(0.5, -0.1), fancybox=True, shadow=True, ncol=1)
+        with stage("load data"):
+            preview, sample, parse_errors = cache.get_or_compute(dataset_key, load_sample)
+        if parse_errors:
+            shown = ", ".join(f"'{e.token}' (value {e.position}, line {e.line}, column {e.column})" for e in parse_errors[:10])
+            more = f" and {len(parse_errors) - 10} more" if len(parse_errors) > 10 else ""
+            st.warning(f"Skipped {len(parse_errors)} entries that are not finite numbers: {shown}{more}.")
+        if sample.n == 0:
+            st.warning("No numerical values were found in the data.")
+            stop()
+        if binary:
+            show_params()
+        if preview is not None:
+            st.write("### Uploaded Data Preview:")
+            st.write(preview)
 
-        st.pyplot(fig)
+        mean = sample.moments.mean
+        std_dev = sample.moments.std
+
+        st.write("### Input Data Statistics:")
+        st.write(f"Mean: {mean}")
+        st.write(f"Standard Deviation: {std_dev}")
+
+        # Perform the selected test for normality
+        with stage("normality test"):
+            result = cache.get_or_compute(dataset_key + (test_name,), lambda: run_test(test_name, sample))
+        st.write(f"### {result.name} Test for Normality:")
+        if result.n_used < sample.n:
+            st.info(f"The test was run on a reproducible stratified subsample of {result.n_used} out of {sample.n} points.")
+        st.write(f"Statistic: {result.statistic}, p-value: {result.p_value}")
+
+        if result.p_value > alpha:
+            st.success(f"The data follows a Normal Distribution based on the {result.name} test.")
+        else:
+            st.warning(f"The data does not follow a Normal Distribution based on the {result.name} test.")
+
+        # Plot the data against a Normal Distribution: a histogram of the sample, and a Q-Q plot of its exact quantiles
+        with stage("histogram"):
+            histogram = cache.get_or_compute(dataset_key + ("histogram",), lambda: HistogramSketch().update(sample.sorted))
+        show_distribution_figures(sample.moments, histogram, np.quantile(sample.sorted, qq_probabilities()))
 
     except Exception as e:
         st.error(f"An error occurred: {e}")
 
+show_cache_stats(cache)
+
+# Once the page is drawn, preload the heavy libraries and caches in the background (once per server process)
+start_warm_up()
+
+finish_run()
@@ -1,9 +1,26 @@
 import streamlit as st
-from scipy.stats import norm, t, chi2
-import numpy as np
-import matplotlib.pyplot as plt
+from statsapp.cache import get_cache, content_hash, show_cache_stats
+from statsapp.export import to_csv_bytes
+from statsapp.core.significance import batch_significance, single_test, critical_values, TAILS, CORRECTIONS
+from statsapp.core.categorical import (
+    count_categories, crosstab, goodness_of_fit, independence, table_frame,
+    TESTS as CATEGORICAL_TESTS, GOODNESS_OF_FIT, METHODS as P_VALUE_METHODS, AUTOMATIC, MONTE_CARLO,
+    DEFAULT_PERMUTATIONS, DEFAULT_TARGET_SE, MIN_PERMUTATIONS,
+)
+from statsapp.parsing import parse_proportions
+from statsapp.generator import new_seed
+from statsapp.parallel import default_workers
+from statsapp.plotting import test_figure, test_chart_data, show_figure
+from statsapp.instrumentation import start_run, finish_run, stage, stop
+from statsapp.lazy import lazy_module
+from statsapp.warmup import start_warm_up
+
+# Heavy libraries are imported on first use, so the page opens without loading them
+pd = lazy_module("pandas")
 
 st.set_page_config(page_title="Significance Level Calculator", page_icon="🧮")
+# Opt-in profiling of this run (STATSAPP_PROFILE=1 or ?profile=1)
+start_run("Significance Level Calculator")
 
 st.title("Significance Level Calculator")
 
@@ -20,30 +37,225 @@ st.markdown(
     """
 )
 
+lightweight = st.sidebar.checkbox(
+    "Lightweight charts",
+    help="Draw the distributions with Streamlit's native charts instead of rendering images on the server.",
+)
+
 # Input for alpha
 alpha = st.number_input("Set Significance Level (Alpha, α):", value=0.05, min_value=0.001, max_value=0.1, step=0.001, format="%.3f")
 
 # Input fields for significance level calculation
 test_type = st.selectbox("Select Test Type:", ["Z-Test", "T-Test", "Chi-Square Test"])
+input_modes = ["Single Statistic", "Batch (CSV Upload)"]
+if test_type == "Chi-Square Test":
+    input_modes.append("Raw Categorical Data (CSV Upload)")
+input_mode = st.radio("Input Mode:", input_modes, horizontal=True)
+
+# p-values and critical values are cached on the inputs that determine them
+cache = get_cache("significance")
+
+if input_mode == "Batch (CSV Upload)":
+    st.markdown(
+        """
+        Upload a CSV file with a `statistic` column. Optional `df` and `tail` columns
+        (`two`, `left` or `right`) override the defaults below for each row.
+        """
+    )
+    batch_file = st.file_uploader("Upload a CSV file of test statistics:", type=["csv"])
+    distribution = {"Z-Test": "norm", "T-Test": "t", "Chi-Square Test": "chi2"}[test_type]
+    default_df = None if test_type == "Z-Test" else st.number_input("Default Degrees of Freedom:", value=1, min_value=1, step=1)
+    default_tail = "Right-Tailed" if test_type == "Chi-Square Test" else st.radio("Default Tail Type:", TAILS)
+    correction = st.selectbox("Multiple Testing Correction:", CORRECTIONS)
+
+    if st.button("Calculate p-values"):
+        try:
+            if batch_file is None:
+                st.warning("Please upload a CSV file of test statistics.")
+                stop()
+
+            # All rows are evaluated in one vectorised call per quantity
+            with stage("batch p-values"):
+                results = cache.get_or_compute(
+                    ("batch", content_hash(batch_file), distribution, default_df, default_tail, alpha, correction),
+                    lambda: batch_significance(
+                        pd.read_csv(batch_file), distribution, alpha,
+                        default_df=default_df, default_tail=default_tail, correction=correction,
+                    ),
+                )
+
+            rejected = int(results["reject"].sum())
+            st.write(f"### Results for {len(results)} Statistics:")
+            st.success(f"The null hypothesis is rejected for {rejected} of {len(results)} statistics at α = {alpha:.3f}.")
+            st.dataframe(results.head(1000))
+            if len(results) > 1000:
+                st.caption("Showing the first 1000 rows. Download the file for the full results.")
+
+            with stage("results file"):
+                st.download_button(
+                    label="Download Results CSV",
+                    data=to_csv_bytes(results),
+                    file_name="p_values.csv",
+                    mime="text/csv",
+                )
+
+        except Exception as e:
+            st.error(f"An error occurred: {e}")
+
+elif input_mode == "Raw Categorical Data (CSV Upload)":
+    st.markdown(
+        """
+        Upload a CSV file with one row per observation. **Goodness of Fit** compares the counts of one column with
+        expected proportions; **Independence** checks whether two columns are related, from their contingency table.
+        """
+    )
+    data_file = st.file_uploader("Upload a CSV file of categorical data:", type=["csv"])
+    categorical_test = st.radio("Chi-Square Test:", CATEGORICAL_TESTS, horizontal=True)
+    column_names = []
+    if data_file is not None:
+        try:
+            column_names = list(pd.read_csv(data_file, nrows=0).columns)
+        except Exception as e:
+            st.error(f"An error occurred: {e}")
+        data_file.seek(0)
+
+    if categorical_test == GOODNESS_OF_FIT:
+        selected_columns = [st.selectbox("Category Column:", column_names)]
+        proportions_text = st.text_input(
+            "Expected Proportions (optional):", "",
+            help="For example `A=0.5, B=0.3, C=0.2`; counts work too. Leave empty for equal proportions.",
+        )
+    else:
+        selected_columns = [
+            st.selectbox("Row Variable:", column_names),
+            st.selectbox("Column Variable:", column_names, index=1 if len(column_names) > 1 else 0),
+        ]
+        proportions_text = ""
+    p_value_method = st.radio(
+        "p-value From:", P_VALUE_METHODS, horizontal=True,
+        help="Automatic switches to Monte Carlo when expected counts are too small for the chi-square distribution.",
+    )
+    permutations = st.number_input(
+        "Maximum Monte Carlo Permutations:", value=DEFAULT_PERMUTATIONS, min_value=MIN_PERMUTATIONS, max_value=1_000_000,
+        step=1000, help="Permutations stop earlier once the standard error of the p-value reaches the target.",
+    )
+    target_se = st.number_input(
+        "Target Standard Error:", value=DEFAULT_TARGET_SE, min_value=0.0005, max_value=0.05, step=0.0005, format="%.4f"
+    )
+    workers = st.number_input("Worker Processes:", value=default_workers(), min_value=1, max_value=64, step=1)
+    seed_input = st.text_input("Random Seed (optional):", "", help="Use the same seed to get the same Monte Carlo p-value again.")
+
+    if st.button("Calculate p-value"):
+        try:
+            if data_file is None:
+                st.warning("Please upload a CSV file of categorical data.")
+                stop()
+            if len(set(selected_columns)) < len(selected_columns):
+                st.warning("Please choose two different columns.")
+                stop()
+            seed = int(seed_input) if seed_input.strip() else new_seed()
+            weights = parse_proportions(proportions_text) if proportions_text.strip() else None
+
+            def count():
+                # Categories are read as codes, so counting never touches the labels again
+                frame = pd.read_csv(data_file, usecols=selected_columns, dtype="category")
+                if categorical_test == GOODNESS_OF_FIT:
+                    return count_categories(frame[selected_columns[0]])
+                return crosstab(frame[selected_columns[0]], frame[selected_columns[1]])
+
+            with stage("count categories"):
+                counts = cache.get_or_compute(
+                    ("categorical counts", content_hash(data_file), categorical_test, tuple(selected_columns)), count
+                )
+
+            def show_progress():
+                # Only drawn when the test actually runs, not when it comes from the cache
+                bar = st.progress(0.0, text="Running Monte Carlo permutations...")
+                return lambda done, total: bar.progress(done / total, text=f"{done:,} of at most {total:,} permutations")
+
+            # The Monte Carlo p-value depends on the seed but not on the number of workers
+            with stage("chi-square test"):
+                if categorical_test == GOODNESS_OF_FIT:
+                    result, expected_table = cache.get_or_compute(
+                        ("goodness of fit", content_hash(data_file), selected_columns[0], proportions_text,
+                         p_value_method, permutations, target_se, seed),
+                        lambda: goodness_of_fit(
+                            counts, weights, p_value_method, int(permutations), seed, int(workers), target_se, show_progress(),
+                        ),
+                    )
+                else:
+                    result = cache.get_or_compute(
+                        ("independence", content_hash(data_file), tuple(selected_columns), p_value_method, permutations,
+                         target_se, seed),
+                        lambda: independence(
+                            counts, p_value_method, int(permutations), seed, int(workers), target_se, show_progress(),
+                        ),
+                    )
+                critical_value = float(critical_values("chi2", alpha, result.df))
+
+            st.write(f"### Chi-Square Statistic: {result.statistic:.4f} (df = {result.df:,})")
+            st.write(f"### P-Value: {result.p_value:.4f}")
+            if result.method == MONTE_CARLO:
+                st.info(
+                    f"Monte Carlo p-value from {result.permutations:,} permutations (seed {seed}), "
+                    f"standard error {result.standard_error:.4f}."
+                )
+            elif result.small_expected and p_value_method == AUTOMATIC:
+                st.info(
+                    f"Expected counts are small, but a Monte Carlo p-value would take too long for this table. With "
+                    f"{result.df:,} degrees of freedom the statistic is a sum of many cells, so the chi-square "
+                    "distribution is still accurate."
+                )
+            elif result.small_expected:
+                st.warning(
+                    f"Some expected counts are small (the smallest is {result.min_expected:.3g}), so the chi-square "
+                    "p-value may be inaccurate. Choose Monte Carlo or Automatic for a reliable one."
+                )
+            if result.p_value < alpha:
+                st.success("Reject the null hypothesis: The result is statistically significant.")
+            else:
+                st.warning("Fail to reject the null hypothesis: The result is not statistically significant.")
+            if counts.missing:
+                st.caption(f"{counts.missing:,} rows with a missing value were left out.")
+
+            if categorical_test == GOODNESS_OF_FIT:
+                st.write("### Observed and Expected Counts:")
+                st.dataframe(expected_table.head(1000))
+            elif len(counts.row_labels) * len(counts.column_labels) <= 10_000:
+                st.write("### Contingency Table:")
+                st.dataframe(table_frame(counts))
+            else:
+                st.caption(
+                    f"The contingency table has {len(counts.row_labels):,} rows and {len(counts.column_labels):,} "
+                    f"columns ({len(counts.cells):,} non-empty cells), too many to show."
+                )
 
-if test_type == "Z-Test":
+            st.write("### Visualisation:")
+            with stage("figure"):
+                rejection_areas = [(critical_value, float("inf"))]
+                high = 1.2 * max(result.statistic, critical_value)
+                if lightweight:
+                    st.area_chart(test_chart_data("chi2", result.df, rejection_areas, xlabel="Chi-Square Statistic", high=high))
+                else:
+                    show_figure(test_figure(
+                        "chi2", result.df, rejection_areas, result.statistic,
+                        title="Chi-Square Test Visualisation", xlabel="Chi-Square Statistic",
+                        curve_label="Chi-Square Distribution", score_label="Chi-Square Statistic", high=high,
+                    ))
+
+        except Exception as e:
+            st.error(f"An error occurred: {e}")
+
+elif test_type == "Z-Test":
     z_score = st.number_input("Enter Z-Score:", value=0.0, step=0.01)
-    tail = st.radio("Tail Type:", ["Two-Tailed", "Left-Tailed", "Right-Tailed"])
+    tail = st.radio("Tail Type:", TAILS)
     
     if st.button("Calculate p-value"):
         try:
-            if tail == "Two-Tailed":
-                p_value = 2 * (1 - norm.cdf(abs(z_score)))
-                critical_value = norm.ppf(1 - alpha / 2)
-                rejection_areas = [(-np.inf, -critical_value), (critical_value, np.inf)]
-            elif tail == "Left-Tailed":
-                p_value = norm.cdf(z_score)
-                critical_value = norm.ppf(alpha)
-                rejection_areas = [(-np.inf, critical_value)]
-            else:  # Right-Tailed
-                p_value = 1 - norm.cdf(z_score)
-                critical_value = norm.ppf(1 - alpha)
-                rejection_areas = [(critical_value, np.inf)]
+            with stage("p-value"):
+                p_value, critical_value, rejection_areas = cache.get_or_compute(
+                    ("z", z_score, tail, alpha), lambda: single_test("norm", z_score, alpha, tail=tail)
+                )
 
             st.write(f"### P-Value: {p_value:.4f}")
             if p_value < alpha:
@@ -53,21 +265,15 @@ if test_type == "Z-Test":
 
             # Plot the distribution with a **static** rejection region
             st.write("### Visualisation:")
-            x = np.linspace(-4, 4, 1000)
-            y = norm.pdf(x)
-            fig, ax = plt.subplots()
-            ax.plot(x, y, label="Normal Distribution", color="black")
-
-            for area in rejection_areas:
-                ax.fill_between(x, 0, y, where=(x >= area[0]) & (x <= area[1]), color="red", alpha=0.5, label="Rejection Region")
-
-            ax.scatter([z_score], [norm.pdf(z_score)], color="blue", s=100, label="P-Value (Z-Score)")
-            ax.axhline(0, color="gray", linewidth=0.5)
-            ax.set_title("Z-Test Visualisation")
-            ax.set_xlabel("Z-Score")
-            ax.set_ylabel("Density")
-            ax.legend(loc='upper left', bbox_to_anchor=(1, 1))
-            st.pyplot(fig)
+            with stage("figure"):
+                if lightweight:
+                    st.area_chart(test_chart_data("norm", None, rejection_areas, xlabel="Z-Score"))
+                else:
+                    show_figure(test_figure(
+                        "norm", None, rejection_areas, z_score,
+                        title="Z-Test Visualisation", xlabel="Z-Score",
+                        curve_label="Normal Distribution", score_label="P-Value (Z-Score)",
+                    ))
 
         except Exception as e:
             st.error(f"An error occurred: {e}")
@@ -75,22 +281,15 @@ if test_type == "Z-Test":
 elif test_type == "T-Test":
     t_score = st.number_input("Enter T-Score:", value=0.0, step=0.01)
     degrees_of_freedom = st.number_input("Enter Degrees of Freedom:", value=1, min_value=1, step=1)
-    tail = st.radio("Tail Type:", ["Two-Tailed", "Left-Tailed", "Right-Tailed"])
+    tail = st.radio("Tail Type:", TAILS)
     
     if st.button("Calculate p-value"):
         try:
-            if tail == "Two-Tailed":
-                p_value = 2 * (1 - t.cdf(abs(t_score), df=degrees_of_freedom))
-                critical_value = t.ppf(1 - alpha / 2, df=degrees_of_freedom)
-                rejection_areas = [(-np.inf, -critical_value), (critical_value, np.inf)]
-            elif tail == "Left-Tailed":
-                p_value = t.cdf(t_score, df=degrees_of_freedom)
-                critical_value = t.ppf(alpha, df=degrees_of_freedom)
-                rejection_areas = [(-np.inf, critical_value)]
-            else:  # Right-Tailed
-                p_value = 1 - t.cdf(t_score, df=degrees_of_freedom)
-                critical_value = t.ppf(1 - alpha, df=degrees_of_freedom)
-                rejection_areas = [(critical_value, np.inf)]
+            with stage("p-value"):
+                p_value, critical_value, rejection_areas = cache.get_or_compute(
+                    ("t", t_score, degrees_of_freedom, tail, alpha),
+                    lambda: single_test("t", t_score, alpha, df=degrees_of_freedom, tail=tail),
+                )
 
             st.write(f"### P-Value: {p_value:.4f}")
             if p_value < alpha:
@@ -100,21 +299,15 @@ elif test_type == "T-Test":
 
             # Static rejection region for T-Test
             st.write("### Visualisation:")
-            x = np.linspace(-4, 4, 1000)
-            y = t.pdf(x, df=degrees_of_freedom)
-            fig, ax = plt.subplots()
-            ax.plot(x, y, label="T-Distribution", color="black")
-
-            for area in rejection_areas:
-                ax.fill_between(x, 0, y, where=(x >= area[0]) & (x <= area[1]), color="red", alpha=0.5, label="Rejection Region")
-
-            ax.scatter([t_score], [t.pdf(t_score, df=degrees_of_freedom)], color="blue", s=100, label="P-Value (T-Score)")
-            ax.axhline(0, color="gray", linewidth=0.5)
-            ax.set_title("T-Test Visualisation")
-            ax.set_xlabel("T-Score")
-            ax.set_ylabel("Density")
-            ax.legend(loc='upper left', bbox_to_anchor=(1, 1))
-            st.pyplot(fig)
+            with stage("figure"):
+                if lightweight:
+                    st.area_chart(test_chart_data("t", degrees_of_freedom, rejection_areas, xlabel="T-Score"))
+                else:
+                    show_figure(test_figure(
+                        "t", degrees_of_freedom, rejection_areas, t_score,
+                        title="T-Test Visualisation", xlabel="T-Score",
+                        curve_label="T-Distribution", score_label="P-Value (T-Score)",
+                    ))
 
         except Exception as e:
             st.error(f"An error occurred: {e}")
@@ -125,8 +318,11 @@ elif test_type == "Chi-Square Test":
 
     if st.button("Calculate p-value"):
         try:
-            p_value = 1 - chi2.cdf(chi_square, df=degrees_of_freedom)
-            critical_value = chi2.ppf(1 - alpha, df=degrees_of_freedom)
+            with stage("p-value"):
+                p_value, critical_value, rejection_areas = cache.get_or_compute(
+                    ("chi2", chi_square, degrees_of_freedom, alpha),
+                    lambda: single_test("chi2", chi_square, alpha, df=degrees_of_freedom),
+                )
 
             st.write(f"### P-Value: {p_value:.4f}")
             if p_value < alpha:
@@ -136,21 +332,22 @@ elif test_type == "Chi-Square Test":
 
             # Static rejection region for Chi-Square Test
             st.write("### Visualisation:")
-            x = np.linspace(0, 10, 1000)
-            y = chi2.pdf(x, df=degrees_of_freedom)
-            fig, ax = plt.subplots()
-            ax.plot(x, y, label="Chi-Square Distribution", color="black")
-
-            ax.fill_between(x, 0, y, where=(x >= critical_value), color="red", alpha=0.5, label="Rejection Region")
-            ax.scatter([chi_square], [chi2.pdf(chi_square, df=degrees_of_freedom)], color="blue", s=100, label="P-Value (Chi-Square)")
-
-            ax.axhline(0, color="gray", linewidth=0.5)
-            ax.set_title("Chi-Square Test Visualisation")
-            ax.set_xlabel("Chi-Square Statistic")
-            ax.set_ylabel("Density")
-            ax.legend(loc='upper left', bbox_to_anchor=(1, 1))
-            st.pyplot(fig)
+            with stage("figure"):
+                if lightweight:
+                    st.area_chart(test_chart_data("chi2", degrees_of_freedom, rejection_areas, xlabel="Chi-Square Statistic"))
+                else:
+                    show_figure(test_figure(
+                        "chi2", degrees_of_freedom, rejection_areas, chi_square,
+                        title="Chi-Square Test Visualisation", xlabel="Chi-Square Statistic",
+                        curve_label="Chi-Square Distribution", score_label="P-Value (Chi-Square)",
+                    ))
 
         except Exception as e:
             st.error(f"An error occurred: {e}")
-            
\ No newline at end of file
+
+show_cache_stats(cache)
+
+# Once the page is drawn, preload the heavy libraries and caches in the background (once per server process)
+start_warm_up()
+
+finish_run()
@@ -1,9 +1,23 @@
-import streamlit as st
-from scipy.stats import norm, t
 import numpy as np
-import matplotlib.pyplot as plt
+import streamlit as st
+from statsapp.cache import get_cache, show_cache_stats, content_hash
+from statsapp.export import to_csv_bytes
+from statsapp.plotting import interval_figure, interval_chart_data, bootstrap_figure, bootstrap_chart_data, show_figure
+from statsapp.core.intervals import mean_interval, proportion_interval, batch_proportions, proportion_summary, PROPORTION_METHODS
+from statsapp.core.bootstrap import bootstrap_interval, METHODS, DEFAULT_RESAMPLES, MIN_RESAMPLES
+from statsapp.dataset import open_dataset, is_binary
+from statsapp.generator import new_seed
+from statsapp.parallel import default_workers
+from statsapp.instrumentation import start_run, finish_run, stage, stop
+from statsapp.lazy import lazy_module
+from statsapp.warmup import start_warm_up
+
+# Heavy libraries are imported on first use, so the page opens without loading them
+pd = lazy_module("pandas")
 
 st.set_page_config(page_title="Confidence Interval Calculator", page_icon="📏")
+# Opt-in profiling of this run (STATSAPP_PROFILE=1 or ?profile=1)
+start_run("Confidence Interval Calculator")
 
 st.title("Confidence Interval Calculator")
 
@@ -11,6 +25,8 @@ st.markdown(
     """
     This tool allows you to calculate confidence intervals for means or proportions based on your input data.
     Confidence intervals provide a range of values that likely contain the population parameter of interest.
+    With a raw sample, bootstrap intervals for the mean, median or any quantile make no assumption about the
+    shape of the distribution.
 
     ### What is Alpha (α)?
     Alpha (α) represents the complement of the confidence level (1 - Confidence Level). 
@@ -18,8 +34,16 @@ st.markdown(
     """
 )
 
+lightweight = st.sidebar.checkbox(
+    "Lightweight charts",
+    help="Draw the intervals with Streamlit's native charts instead of rendering images on the server.",
+)
+
 # Select calculation type
-calc_type = st.selectbox("Select Calculation Type:", ["Mean", "Proportion"])
+calc_type = st.selectbox("Select Calculation Type:", ["Mean", "Proportion", "Bootstrap (Raw Sample)"])
+
+# Intervals are cached on the inputs that determine them
+cache = get_cache("confidence_interval")
 
 if calc_type == "Mean":
     # Input fields
@@ -31,21 +55,12 @@ if calc_type == "Mean":
 
     if st.button("Calculate Confidence Interval"):
         try:
-            # Calculate standard error
-            standard_error = sample_std_dev / np.sqrt(sample_size)
-
-            # Determine z or t critical value
-            if sample_size >= 30:
-                critical_value = norm.ppf(1 - (1 - confidence_level / 100) / 2)
-            else:
-                critical_value = t.ppf(1 - (1 - confidence_level / 100) / 2, df=sample_size - 1)
-
-            # Calculate margin of error
-            margin_of_error = critical_value * standard_error
-
-            # Confidence interval
-            lower_bound = sample_mean - margin_of_error
-            upper_bound = sample_mean + margin_of_error
+            # z interval for samples of 30 or more, t interval otherwise
+            with stage("interval"):
+                _, standard_error, lower_bound, upper_bound = cache.get_or_compute(
+                    ("mean", sample_mean, sample_std_dev, sample_size, confidence_level),
+                    lambda: mean_interval(sample_mean, sample_std_dev, sample_size, confidence_level / 100),
+                )
 
             st.write(f"### Confidence Interval:")
             st.success(f"({lower_bound:.2f}, {upper_bound:.2f})")
@@ -58,82 +73,207 @@ if calc_type == "Mean":
 
             # Plot confidence interval
             st.write("### Visualisation:")
-            fig, ax = plt.subplots()
-            x = np.linspace(lower_bound - 2, upper_bound + 2, 500)
-            y = norm.pdf(x, loc=sample_mean, scale=standard_error)
-            ax.plot(x, y, label="Normal Distribution", color="black")
-            ax.axvline(lower_bound, color="red", linestyle="--", label=f"Lower Bound ({lower_bound:.2f})")
-            ax.axvline(upper_bound, color="red", linestyle="--", label=f"Upper Bound ({upper_bound:.2f})")
-            ax.axvline(sample_mean, color="blue", linestyle="--", label=f"Mean ({sample_mean:.2f})")
-
-            # X-value as a dot
-            ax.scatter([x_value], [norm.pdf(x_value, loc=sample_mean, scale=standard_error)], 
-                       color="purple", s=100, label=f"X-Value ({x_value:.2f})")
-
-            ax.fill_between(x, 0, y, where=(x >= lower_bound) & (x <= upper_bound), color="green", alpha=0.2, label="Confidence Interval")
-            ax.set_title("Confidence Interval for Mean")
-            ax.set_xlabel("Values")
-            ax.set_ylabel("Density")
-            ax.legend(loc='upper left', bbox_to_anchor=(1, 1))
-            st.pyplot(fig)
+            x_range = (lower_bound - 2, upper_bound + 2)
+            with stage("figure"):
+                if lightweight:
+                    st.area_chart(interval_chart_data(sample_mean, standard_error, lower_bound, upper_bound, x_range, xlabel="Values"))
+                else:
+                    show_figure(interval_figure(
+                        sample_mean, standard_error, lower_bound, upper_bound, x_value, x_range,
+                        title="Confidence Interval for Mean", xlabel="Values", center_label="Mean",
+                    ))
 
         except Exception as e:
             st.error(f"An error occurred: {e}")
 
 elif calc_type == "Proportion":
+    input_mode = st.radio("Input Mode:", ["Single Cohort", "Batch (CSV Upload)"], horizontal=True)
+    method = st.selectbox(
+        "Interval Method:", PROPORTION_METHODS,
+        help="Wilson, Agresti-Coull and the exact Clopper-Pearson interval stay sensible at 0 or all successes; "
+             "the Wald interval collapses to a single point there.",
+    )
+
+    if input_mode == "Batch (CSV Upload)":
+        st.markdown(
+            """
+            Upload a CSV file with `successes` and `trials` columns, one row per cohort.
+            Other columns, such as a cohort name, are kept in the results.
+            """
+        )
+        batch_file = st.file_uploader("Upload a CSV file of cohorts:", type=["csv"])
+        confidence_level = st.slider("Select Confidence Level (%):", 80, 99, 95)
+
+        if st.button("Calculate Confidence Intervals"):
+            try:
+                if batch_file is None:
+                    st.warning("Please upload a CSV file of cohorts.")
+                    stop()
+
+                # All cohorts are evaluated in one vectorised call
+                with stage("batch intervals"):
+                    results = cache.get_or_compute(
+                        ("proportion batch", content_hash(batch_file), method, confidence_level),
+                        lambda: batch_proportions(pd.read_csv(batch_file), confidence_level / 100, method),
+                    )
+                    summary = proportion_summary(results, confidence_level / 100, method)
+
+                st.write(f"### Results for {summary.cohorts} Cohorts:")
+                if summary.valid < summary.cohorts:
+                    st.warning(f"{summary.cohorts - summary.valid} rows have missing or inconsistent counts and were skipped.")
+                if summary.pooled is not None:
+                    st.success(
+                        f"Pooled proportion: {summary.pooled.estimate:.4f} "
+                        f"({summary.pooled.lower:.4f}, {summary.pooled.upper:.4f}) "
+                        f"from {summary.successes:,.0f} successes in {summary.trials:,.0f} trials."
+                    )
+                    st.write(
+                        f"Median interval width: {summary.median_width:.4f}. "
+                        f"{summary.excluding_pooled} of {summary.valid} cohort intervals exclude the pooled proportion."
+                    )
+                st.dataframe(results.head(1000))
+                if len(results) > 1000:
+                    st.caption("Showing the first 1000 rows. Download the file for the full results.")
+
+                with stage("results file"):
+                    st.download_button(
+                        label="Download Results CSV",
+                        data=to_csv_bytes(results),
+                        file_name="proportion_intervals.csv",
+                        mime="text/csv",
+                    )
+
+            except Exception as e:
+                st.error(f"An error occurred: {e}")
+
+    else:
+        # Input fields
+        successes = st.number_input("Enter Number of Successes:", value=0, min_value=0, step=1)
+        trials = st.number_input("Enter Number of Trials:", value=1, min_value=1, step=1)
+        confidence_level = st.slider("Select Confidence Level (%):", 80, 99, 95)
+        x_value = st.number_input("Enter Proportion to Check (optional):", value=0.0, min_value=0.0, max_value=1.0, step=0.01)
+
+        if st.button("Calculate Confidence Interval"):
+            try:
+                if successes > trials:
+                    st.warning("The number of successes cannot exceed the number of trials.")
+                    stop()
+
+                with stage("interval"):
+                    sample_proportion, standard_error, lower_bound, upper_bound = cache.get_or_compute(
+                        ("proportion", successes, trials, confidence_level, method),
+                        lambda: proportion_interval(successes, trials, confidence_level / 100, method),
+                    )
+
+                st.write(f"### Confidence Interval:")
+                st.success(f"({lower_bound:.4f}, {upper_bound:.4f})")
+
+                # Check if x_value lies within the confidence interval
+                if lower_bound <= x_value <= upper_bound:
+                    st.info(f"With a {confidence_level}% confidence level, the value {x_value:.2f} lies within the confidence interval.")
+                else:
+                    st.warning(f"With a {confidence_level}% confidence level, the value {x_value:.2f} lies outside the confidence interval.")
+
+                # Plot confidence interval (a zero-width Wald interval has no curve to draw)
+                if standard_error > 0:
+                    st.write("### Visualisation:")
+                    x_range = (0, 1)
+                    with stage("figure"):
+                        if lightweight:
+                            st.area_chart(interval_chart_data(sample_proportion, standard_error, lower_bound, upper_bound, x_range, xlabel="Proportion Values"))
+                        else:
+                            show_figure(interval_figure(
+                                sample_proportion, standard_error, lower_bound, upper_bound, x_value, x_range,
+                                title="Confidence Interval for Proportion", xlabel="Proportion Values", center_label="Proportion",
+                            ))
+
+            except Exception as e:
+                st.error(f"An error occurred: {e}")
+
+elif calc_type == "Bootstrap (Raw Sample)":
     # Input fields
-    successes = st.number_input("Enter Number of Successes:", value=0, min_value=0, step=1)
-    trials = st.number_input("Enter Number of Trials:", value=1, min_value=1, step=1)
+    sample_file = st.file_uploader(
+        "Upload a Sample (CSV, .sds or .npy):", type=["csv", "sds", "npy"],
+        help="The first column of a CSV file is used. Binary datasets from the Generator are read without parsing.",
+    )
+    statistic = st.selectbox("Statistic:", ["Mean", "Median", "Quantile"])
+    quantile = 0.5
+    if statistic == "Quantile":
+        quantile = st.number_input("Quantile:", value=0.9, min_value=0.001, max_value=0.999, step=0.01, format="%.3f")
+    method = st.radio(
+        "Interval Method:", METHODS, horizontal=True,
+        help="BCa corrects the percentile interval for bias and skewness of the estimate.",
+    )
     confidence_level = st.slider("Select Confidence Level (%):", 80, 99, 95)
-    x_value = st.number_input("Enter Proportion to Check (optional):", value=0.0, min_value=0.0, max_value=1.0, step=0.01)
+    max_resamples = st.number_input(
+        "Maximum Resamples:", value=DEFAULT_RESAMPLES, min_value=MIN_RESAMPLES, max_value=100_000, step=1000,
+        help="Resampling stops earlier once both ends of the interval have stabilised.",
+    )
+    workers = default_workers()
+    if statistic == "Mean":
+        # Quantile replicates are cheap enough to draw in this process
+        workers = st.number_input("Worker Processes:", value=default_workers(), min_value=1, max_value=64, step=1)
+    seed_input = st.text_input("Random Seed (optional):", "", help="Use the same seed to get the same interval again.")
 
     if st.button("Calculate Confidence Interval"):
         try:
-            # Calculate sample proportion
-            sample_proportion = successes / trials
-
-            # Standard error for proportion
-            standard_error = np.sqrt(sample_proportion * (1 - sample_proportion) / trials)
+            if sample_file is None:
+                st.warning("Please upload a sample first.")
+                stop()
+            seed = int(seed_input) if seed_input.strip() else new_seed()
 
-            # Z critical value (large sample assumption)
-            critical_value = norm.ppf(1 - (1 - confidence_level / 100) / 2)
+            def load_sample():
+                if is_binary(sample_file.name):
+                    return open_dataset(sample_file).values
+                return pd.read_csv(sample_file, usecols=[0]).iloc[:, 0].to_numpy(dtype=np.float64)
 
-            # Margin of error
-            margin_of_error = critical_value * standard_error
+            def compute():
+                with stage("load sample"):
+                    values = load_sample()
+                return bootstrap_interval(
+                    values,
+                    statistic="mean" if statistic == "Mean" else "quantile",
+                    q=quantile,
+                    confidence=confidence_level / 100,
+                    method=method,
+                    max_resamples=int(max_resamples),
+                    seed=seed,
+                    workers=int(workers),
+                )
 
-            # Confidence interval
-            lower_bound = sample_proportion - margin_of_error
-            upper_bound = sample_proportion + margin_of_error
+            # The result depends on the seed but not on the number of workers
+            with stage("bootstrap"):
+                result = cache.get_or_compute(
+                    ("bootstrap", content_hash(sample_file), statistic, quantile, method, confidence_level, max_resamples, seed),
+                    compute,
+                )
 
             st.write(f"### Confidence Interval:")
-            st.success(f"({lower_bound:.2f}, {upper_bound:.2f})")
-
-            # Check if x_value lies within the confidence interval
-            if lower_bound <= x_value <= upper_bound:
-                st.info(f"With a {confidence_level}% confidence level, the value {x_value:.2f} lies within the confidence interval.")
+            st.success(f"({result.lower:.4g}, {result.upper:.4g})")
+            label = "Mean" if statistic == "Mean" else ("Median" if statistic == "Median" else f"{quantile:g} Quantile")
+            st.write(f"Seed: **{seed}**, {label}: {result.estimate:.4g}, Bootstrap Standard Error: {result.standard_error:.4g}")
+            if result.converged:
+                st.info(f"The interval stabilised after {result.resamples:,} resamples.")
             else:
-                st.warning(f"With a {confidence_level}% confidence level, the value {x_value:.2f} lies outside the confidence interval.")
+                st.info(f"Used all {result.resamples:,} resamples; the interval may still move slightly with more.")
 
-            # Plot confidence interval
+            # Plot the bootstrap distribution
             st.write("### Visualisation:")
-            fig, ax = plt.subplots()
-            x = np.linspace(0, 1, 500)
-            y = norm.pdf(x, loc=sample_proportion, scale=standard_error)
-            ax.plot(x, y, label="Normal Distribution", color="black")
-            ax.axvline(lower_bound, color="red", linestyle="--", label=f"Lower Bound ({lower_bound:.2f})")
-            ax.axvline(upper_bound, color="red", linestyle="--", label=f"Upper Bound ({upper_bound:.2f})")
-            ax.axvline(sample_proportion, color="blue", linestyle="--", label=f"Proportion ({sample_proportion:.2f})")
-
-            # X-value as a dot
-            ax.scatter([x_value], [norm.pdf(x_value, loc=sample_proportion, scale=standard_error)], 
-                       color="purple", s=100, label=f"X-Value ({x_value:.2f})")
-
-            ax.fill_between(x, 0, y, where=(x >= lower_bound) & (x <= upper_bound), color="green", alpha=0.2, label="Confidence Interval")
-            ax.set_title("Confidence Interval for Proportion")
-            ax.set_xlabel("Proportion Values")
-            ax.set_ylabel("Density")
-            ax.legend(loc='upper left', bbox_to_anchor=(1, 1))
-            st.pyplot(fig)
+            with stage("figure"):
+                if lightweight:
+                    st.bar_chart(bootstrap_chart_data(result.replicates, result.lower, result.upper, xlabel=label))
+                else:
+                    show_figure(bootstrap_figure(
+                        result.replicates, result.estimate, result.lower, result.upper,
+                        title=f"Bootstrap Distribution of the {label}", xlabel=label,
+                    ))
 
         except Exception as e:
-            st.error(f"An error occurred: {e}")
\ No newline at end of file
+            st.error(f"An error occurred: {e}")
+
+show_cache_stats(cache)
+
+# Once the page is drawn, preload the heavy libraries and caches in the background (once per server process)
+start_warm_up()
+
+finish_run()
@@ -0,0 +1,201 @@
+import streamlit as st
+from statsapp.cache import get_cache, show_cache_stats
+from statsapp.core.power import (
+    analytic_power, analytic_sample_size, simulate_power, simulated_sample_size, has_closed_form, min_size,
+    TESTS, CHI_SQUARE, DISTRIBUTIONS, NORMAL, DEFAULT_SIMULATIONS, MIN_SIMULATIONS, DEFAULT_TARGET_SE,
+    MAX_SIZE, MAX_DRAWS,
+)
+from statsapp.core.significance import TAILS, RIGHT_TAILED
+from statsapp.plotting import power_curve_sizes, power_figure, power_chart_data, show_figure
+from statsapp.instrumentation import start_run, finish_run, stage
+from statsapp.generator import new_seed
+from statsapp.parallel import default_workers
+from statsapp.warmup import start_warm_up
+
+st.set_page_config(page_title="Power and Sample Size Calculator", page_icon="🎯")
+# Opt-in profiling of this run (STATSAPP_PROFILE=1 or ?profile=1)
+start_run("Power and Sample Size Calculator")
+
+st.title("Power and Sample Size Calculator")
+
+st.markdown(
+    """
+    This tool estimates the power of a Z-Test, T-Test or Chi-Square Test, or the sample size needed to reach a
+    target power, before any data is collected.
+
+    ### What is Power?
+    Power is the probability of rejecting the null hypothesis (H₀) when the effect you are looking for is real.
+    A power of 0.8 means that four in five studies of this size would detect the effect.
+
+    ### What is the Effect Size?
+    For the Z-Test and T-Test it is Cohen's d: the difference between the true mean and the mean under H₀, in
+    standard deviations (0.2 is small, 0.5 medium, 0.8 large). For the Chi-Square goodness-of-fit test it is
+    Cohen's w (0.1 is small, 0.3 medium, 0.5 large), with equally likely categories under H₀.
+
+    ### How is it Calculated?
+    For normal data, the power follows from a formula. For skewed or heavy-tailed data, or when you ask for it,
+    thousands of studies are simulated and the power is the share of them that rejects H₀. Simulation stops as
+    soon as the standard error of that share reaches the target.
+    """
+)
+
+lightweight = st.sidebar.checkbox(
+    "Lightweight charts",
+    help="Draw the power curve with Streamlit's native charts instead of rendering an image on the server.",
+)
+
+goal = st.radio("Calculate:", ["Power", "Sample Size"], horizontal=True)
+test_type = st.selectbox("Select Test Type:", TESTS)
+alpha = st.number_input("Set Significance Level (Alpha, α):", value=0.05, min_value=0.001, max_value=0.1, step=0.001, format="%.3f")
+
+if test_type == CHI_SQUARE:
+    degrees_of_freedom = st.number_input("Enter Degrees of Freedom:", value=1, min_value=1, max_value=100, step=1)
+    effect = st.number_input("Effect Size (Cohen's w):", value=0.3, min_value=0.0, max_value=1.0, step=0.05, format="%.3f")
+    tail = RIGHT_TAILED
+    # Category counts are simulated directly, whatever the distribution of the underlying data
+    distribution = NORMAL
+else:
+    degrees_of_freedom = 1
+    effect = st.number_input("Effect Size (Cohen's d):", value=0.5, min_value=-5.0, max_value=5.0, step=0.05, format="%.3f")
+    tail = st.radio("Tail Type:", TAILS)
+    distribution = st.selectbox(
+        "Data Distribution:", DISTRIBUTIONS,
+        help="Shape of the data, each scaled to the same standard deviation. Only normal data has a closed form.",
+    )
+
+if goal == "Power":
+    # Other data is drawn in full, so its samples are kept small enough to simulate
+    max_sample = MAX_SIZE if distribution == NORMAL else MAX_DRAWS // MIN_SIMULATIONS
+    size = st.number_input("Sample Size (n):", value=30, min_value=min_size(test_type), max_value=max_sample, step=1)
+else:
+    target_power = st.number_input("Target Power:", value=0.8, min_value=0.5, max_value=0.99, step=0.05, format="%.2f")
+
+closed_form = has_closed_form(test_type, distribution)
+simulate = not closed_form or st.checkbox(
+    "Check the formula by simulation",
+    help="The Chi-Square formula is an approximation for large samples; simulation is exact up to its standard error.",
+)
+
+if simulate:
+    max_simulations = st.number_input(
+        "Maximum Simulations:", value=DEFAULT_SIMULATIONS, min_value=MIN_SIMULATIONS, max_value=1_000_000, step=10_000,
+        help="Simulation stops earlier once the standard error of the power reaches the target.",
+    )
+    target_se = st.number_input(
+        "Target Standard Error:", value=DEFAULT_TARGET_SE, min_value=0.0005, max_value=0.05, step=0.0005, format="%.4f"
+    )
+    workers = st.number_input("Worker Processes:", value=default_workers(), min_value=1, max_value=64, step=1)
+    seed_input = st.text_input("Random Seed (optional):", "", help="Use the same seed to get the same result again.")
+
+# Results are cached on the inputs that determine them
+cache = get_cache("power")
+
+if st.button("Calculate"):
+    try:
+        seed = None
+        if simulate:
+            seed = int(seed_input) if seed_input.strip() else new_seed()
+            st.write(f"Seed: **{seed}**")
+        settings = (test_type, effect, alpha, tail, degrees_of_freedom)
+        simulation = (distribution, int(max_simulations), target_se, seed) if simulate else None
+
+        if goal == "Power":
+            exact = None
+            if closed_form:
+                with stage("closed form"):
+                    exact = cache.get_or_compute(
+                        ("analytic power", size) + settings,
+                        lambda: float(analytic_power(test_type, effect, size, alpha, tail, degrees_of_freedom)),
+                    )
+            simulated = None
+            if simulate:
+                # The result depends on the seed but not on the number of workers
+                with stage("simulation"):
+                    simulated = cache.get_or_compute(
+                        ("simulated power", size) + settings + simulation,
+                        lambda: simulate_power(
+                            test_type, effect, size, alpha, tail, degrees_of_freedom, distribution,
+                            int(max_simulations), target_se, seed, int(workers),
+                        ),
+                    )
+
+            st.write(f"### Power: {exact if simulated is None else simulated.power:.4f}")
+            points = []
+            if simulated is not None:
+                points = [(size, simulated.power, simulated.standard_error)]
+                st.write(f"Simulated Power: {simulated.power:.4f} ± {1.96 * simulated.standard_error:.4f} (95%), Standard Error: {simulated.standard_error:.4f}")
+            if exact is not None:
+                st.write(f"Closed-Form Power: {exact:.4f}")
+            target = None
+
+        else:
+            exact = None
+            if closed_form:
+                with stage("closed form"):
+                    exact = cache.get_or_compute(
+                        ("analytic size", target_power) + settings,
+                        lambda: analytic_sample_size(test_type, effect, target_power, alpha, tail, degrees_of_freedom),
+                    )
+            simulated = None
+            if simulate:
+                with stage("simulation"):
+                    simulated = cache.get_or_compute(
+                        ("simulated size", target_power) + settings + simulation,
+                        lambda: simulated_sample_size(
+                            test_type, effect, target_power, alpha, tail, degrees_of_freedom, distribution,
+                            int(max_simulations), target_se, seed, int(workers),
+                        ),
+                    )
+
+            result = exact if simulated is None else simulated
+            size = result.size
+            st.write(f"### Sample Size: {size:,}")
+            st.success(f"A sample of {size:,} reaches a power of {result.power:.4f} (target {target_power:.2f}).")
+            points = []
+            if simulated is not None:
+                points = [(n, r.power, r.standard_error) for n, r in simulated.evaluations]
+                st.write(f"Simulated sizes: {', '.join(f'{n:,}' for n, _ in simulated.evaluations)}")
+            if exact is not None and simulated is not None:
+                st.write(f"Closed-Form Sample Size: {exact.size:,} (power {exact.power:.4f})")
+            target = target_power
+
+        if simulate and goal == "Power":
+            if simulated.converged:
+                st.info(f"The estimate reached the target standard error after {simulated.simulations:,} simulations.")
+            else:
+                st.info(f"Used all {simulated.simulations:,} simulations; the standard error is still above the target.")
+        elif simulate:
+            runs = [r for _, r in simulated.evaluations]
+            if all(r.converged for r in runs):
+                st.info(f"Every one of the {len(runs)} simulated sample sizes reached the target standard error.")
+            else:
+                st.info(f"Some sample sizes used all {int(max_simulations):,} simulations; their standard error is still above the target.")
+        if not closed_form:
+            st.caption("No closed form exists for this data distribution; the normal-data curve is shown for comparison.")
+
+        # Plot power against sample size
+        st.write("### Visualisation:")
+        with stage("figure"):
+            sizes = power_curve_sizes(size, min_size(test_type))
+            curve_label = "Closed Form (Normal Data)" if test_type != CHI_SQUARE else "Closed Form (Noncentral Chi-Square)"
+            curve = cache.get_or_compute(
+                ("curve", int(size)) + settings,
+                lambda: analytic_power(test_type, effect, sizes, alpha, tail, degrees_of_freedom),
+            )
+            if lightweight:
+                st.line_chart(power_chart_data(sizes, curve, points, curve_label=curve_label))
+            else:
+                show_figure(power_figure(
+                    sizes, curve, points, size, target,
+                    title=f"{test_type} Power Curve", curve_label=curve_label,
+                ))
+
+    except Exception as e:
+        st.error(f"An error occurred: {e}")
+
+show_cache_stats(cache)
+
+# Once the page is drawn, preload the heavy libraries and caches in the background (once per server process)
+start_warm_up()
+
+finish_run()
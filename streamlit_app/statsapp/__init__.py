@@ -0,0 +1,5 @@
+"""Computation helpers shared by the Streamlit pages."""
+import os
+
+# Figures are only ever rendered to PNG on the server, so matplotlib never needs a GUI backend
+os.environ.setdefault("MPLBACKEND", "Agg")
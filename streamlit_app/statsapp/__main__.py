@@ -0,0 +1,160 @@
+"""Command line for the calculators and the headless service.
+
+    python -m statsapp serve --port 8765
+    python -m statsapp warmup
+    python -m statsapp p_value requests.jsonl --output results.jsonl
+    python -m statsapp proportion_interval cohorts.csv --set method=Wilson
+    echo '{"statistic": 2.1, "dist": "t", "df": 12}' | python -m statsapp p_value
+
+Input is read from a file or stdin: JSON lines (one object of parameters
+per line) or, for files ending in ``.csv`` or with ``--format csv``, a table
+whose columns are the parameters. Results are written in the same format, in
+input order, and the input is evaluated in vectorised batches of
+``--batch-size`` requests.
+"""
+import argparse
+import json
+import sys
+
+from statsapp import api, service, warmup
+
+DEFAULT_BATCH_SIZE = 10_000
+
+
+class InvalidLine:
+    """Stands in for an input line that is not JSON, so its error keeps its place in the output."""
+
+    def __init__(self, message):
+        self.message = message
+
+
+def _value(text):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def parse_assignments(assignments):
+    """``["method=Wilson", "confidence=0.99"]`` as a dictionary of parameters."""
+    defaults = {}
+    for assignment in assignments:
+        name, separator, value = assignment.partition("=")
+        if not separator or not name:
+            raise ValueError(f"Expected name=value, got: {assignment}")
+        defaults[name.strip()] = _value(value)
+    return defaults
+
+
+def _jsonl_batches(handle, batch_size):
+    batch = []
+    for number, line in enumerate(handle, start=1):
+        if not line.strip():
+            continue
+        try:
+            batch.append(json.loads(line))
+        except ValueError:
+            batch.append(InvalidLine(f"Line {number} is not valid JSON."))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _csv_batches(handle, batch_size):
+    import pandas as pd
+
+    for chunk in pd.read_csv(handle, chunksize=batch_size):
+        # Empty cells are left out, so defaults apply to them
+        yield [{name: value for name, value in row.items() if not pd.isna(value)} for row in chunk.to_dict("records")]
+
+
+def _evaluate(operation, batch, defaults):
+    requests = [dict(defaults, **params) if isinstance(params, dict) else params for params in batch]
+    results = iter(api.handle(operation, [params for params in requests if not isinstance(params, InvalidLine)]))
+    return [{"error": params.message} if isinstance(params, InvalidLine) else next(results) for params in requests]
+
+
+def run_operation(args):
+    try:
+        defaults = parse_assignments(args.set)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    csv = args.format == "csv" or (args.format is None and args.input.lower().endswith(".csv"))
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8", newline="")
+    target = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")
+    errors = 0
+    try:
+        batches = _csv_batches(source, args.batch_size) if csv else _jsonl_batches(source, args.batch_size)
+        columns = None
+        for batch in batches:
+            results = _evaluate(args.operation, batch, defaults)
+            errors += sum("error" in result for result in results)
+            if csv:
+                import pandas as pd
+
+                frame = pd.DataFrame([dict(params, **result) for params, result in zip(batch, results)])
+                # Every chunk is written with the columns of the first, so the table stays rectangular
+                header = columns is None
+                if header:
+                    inputs = [name for name in frame.columns if name not in api.RESULT_FIELDS[args.operation] + ["error"]]
+                    columns = inputs + api.RESULT_FIELDS[args.operation] + ["error"]
+                frame.reindex(columns=columns).to_csv(target, header=header, index=False)
+            else:
+                target.writelines(json.dumps(result, allow_nan=False) + "\n" for result in results)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+    if errors:
+        print(f"{errors} request(s) failed; see the 'error' field.", file=sys.stderr)
+    return 1 if errors else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m statsapp", description="StatsApp calculators without a browser.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = subparsers.add_parser("serve", help="Run the HTTP service.")
+    serve_parser.add_argument("--host", default=service.DEFAULT_HOST, help="Address to listen on (default: %(default)s).")
+    serve_parser.add_argument("--port", type=int, default=service.DEFAULT_PORT, help="Port (default: %(default)s).")
+    serve_parser.add_argument("--batch-window", type=float, default=service.DEFAULT_BATCH_WINDOW * 1000,
+                              help="Milliseconds to wait for more requests to batch together (default: %(default)s).")
+    serve_parser.add_argument("--max-batch", type=int, default=service.DEFAULT_MAX_BATCH,
+                              help="Requests per batch at most (default: %(default)s).")
+
+    subparsers.add_parser(
+        "warmup", help="Import the libraries and build the on-disk caches, e.g. when building a container image."
+    )
+
+    for operation, function in api.OPERATIONS.items():
+        operation_parser = subparsers.add_parser(
+            operation, help=function.__doc__.splitlines()[0],
+            description=function.__doc__, formatter_class=argparse.RawDescriptionHelpFormatter,
+        )
+        operation_parser.add_argument("input", nargs="?", default="-", help="JSON lines or CSV file (default: stdin).")
+        operation_parser.add_argument("--output", default="-", help="Results file (default: stdout).")
+        operation_parser.add_argument("--format", choices=["jsonl", "csv"],
+                                      help="Input and output format (default: csv for .csv files, else jsonl).")
+        operation_parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE",
+                                      help="Parameter for requests that do not give it, e.g. --set dist=t.")
+        operation_parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                                      help="Requests evaluated per vectorised call (default: %(default)s).")
+
+    args = parser.parse_args(argv)
+    if args.command == "serve":
+        service.serve(args.host, args.port, args.batch_window / 1000, args.max_batch)
+        return 0
+    if args.command == "warmup":
+        for step, seconds in warmup.warm_up().items():
+            print(f"{step:30} {seconds:.3f}s")
+        return 0
+    args.operation = args.command
+    return run_operation(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,361 @@
+"""The calculators as batch operations on plain (JSON-compatible) parameters.
+
+Used by the HTTP service and the command line, so programs can call the same
+statistics as the pages without a browser session. Every operation takes a
+list of parameter dictionaries and returns one result dictionary per request,
+in order. Requests that share an operation are evaluated in one vectorised
+call; a request with bad parameters gets an ``{"error": ...}`` result and
+does not affect the others.
+"""
+import math
+
+import numpy as np
+
+from statsapp.core.intervals import PROPORTION_METHODS, WALD, mean_interval, proportion_interval
+from statsapp.core.normality import AUTO, NormalitySample, run_test
+from statsapp.core.significance import TAILS, TWO_TAILED, critical_values, p_values
+from statsapp.generator import generate_chunks, new_seed
+
+DISTRIBUTIONS = ["norm", "t", "chi2"]
+# Larger datasets belong in files made by the Generator page, not in a response
+MAX_GENERATE = 1_000_000
+MAX_NORMALITY = 10_000_000
+
+_REQUIRED = object()
+_TAIL_LABELS = set(TAILS) | {"two", "left", "right"}
+
+
+def _number(params, name, default=_REQUIRED):
+    value = params.get(name, default)
+    if value is _REQUIRED:
+        raise ValueError(f"Missing parameter '{name}'.")
+    if value is None:
+        return math.nan
+    if isinstance(value, bool):
+        raise ValueError(f"'{name}' must be a number.")
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{name}' must be a number.") from None
+
+
+def _finite(params, name, default=_REQUIRED):
+    value = _number(params, name, default)
+    if not math.isfinite(value):
+        raise ValueError(f"'{name}' must be a finite number.")
+    return value
+
+
+def _fraction(params, name, default=_REQUIRED):
+    value = _number(params, name, default)
+    if not 0 < value < 1:
+        raise ValueError(f"'{name}' must be between 0 and 1.")
+    return value
+
+
+def _distribution(params):
+    dist = params.get("dist", "norm")
+    if dist not in DISTRIBUTIONS:
+        raise ValueError(f"'dist' must be one of {', '.join(DISTRIBUTIONS)}.")
+    return dist
+
+
+def _plain(value):
+    """Python scalar for JSON; non-finite numbers become None."""
+    value = value.item() if isinstance(value, np.generic) else value
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def _json_list(column):
+    """A result column as a list of Python values, with None for non-finite numbers."""
+    if isinstance(column, list):
+        return column
+    column = np.atleast_1d(column)
+    if column.dtype.kind != "f":
+        return column.tolist()
+    # Converting the whole column at once is much cheaper than one value at a time
+    values = column.astype(object)
+    values[~np.isfinite(column)] = None
+    return values.tolist()
+
+
+def _records(columns):
+    """``{"name": column}`` as one dictionary per row."""
+    names = list(columns)
+    return [dict(zip(names, row)) for row in zip(*(_json_list(column) for column in columns.values()))]
+
+
+def _evaluate(requests, parse, compute):
+    """Parse each request, then ``compute`` the valid ones together.
+
+    ``parse(params)`` returns a tuple of values (or raises ValueError) and
+    ``compute(columns)`` receives one array per position of those tuples and
+    returns the results as ``{"field": column}``. If the vectorised call
+    fails, the requests are computed one by one so the error stays with its
+    request.
+    """
+    results = [None] * len(requests)
+    valid, rows = [], []
+    for index, params in enumerate(requests):
+        try:
+            if not isinstance(params, dict):
+                raise ValueError("A request must be an object of parameters.")
+            rows.append(parse(params))
+            valid.append(index)
+        except ValueError as e:
+            results[index] = {"error": str(e)}
+    if not rows:
+        return results
+
+    def run(batch):
+        columns = [np.array(column) for column in zip(*batch)]
+        return _records(compute(columns))
+
+    try:
+        computed = run(rows)
+    except Exception:
+        computed = []
+        for row in rows:
+            try:
+                computed += run([row])
+            except Exception as e:
+                computed.append({"error": str(e)})
+    for index, result in zip(valid, computed):
+        results[index] = result
+    return results
+
+
+def _grouped(requests, key, evaluate):
+    """Evaluate the requests in groups of the same ``key(params)`` (e.g. one per distribution)."""
+    results = [None] * len(requests)
+    groups = {}
+    for index, params in enumerate(requests):
+        try:
+            if not isinstance(params, dict):
+                raise ValueError("A request must be an object of parameters.")
+            groups.setdefault(key(params), []).append(index)
+        except ValueError as e:
+            results[index] = {"error": str(e)}
+    for group, indices in groups.items():
+        for index, result in zip(indices, evaluate(group, [requests[index] for index in indices])):
+            results[index] = result
+    return results
+
+
+def _df(params, dist):
+    if dist == "norm":
+        return math.nan
+    df = _number(params, "df")
+    if not df > 0:
+        raise ValueError("'df' must be positive.")
+    return df
+
+
+def _tail(params, dist):
+    tail = params.get("tail", TWO_TAILED)
+    if tail in _TAIL_LABELS:
+        return tail
+    if dist != "chi2" and str(tail).strip().lower().split("-")[0] not in ("two", "left", "right"):
+        raise ValueError(f"Unknown tail type: {tail}")
+    return str(tail)
+
+
+def p_value(requests):
+    """p-value of a test statistic; with ``alpha``, also the critical value and the decision.
+
+    Without ``alpha``, ``critical_value`` and ``reject`` are null.
+
+    Parameters: ``statistic``, ``dist`` ("norm", "t" or "chi2"; default
+    "norm"), ``df`` (t and chi2), ``tail`` (default "Two-Tailed"), ``alpha``.
+    """
+    def evaluate(dist, group):
+        def parse(params):
+            return (
+                _number(params, "statistic"), _df(params, dist), _tail(params, dist),
+                math.nan if params.get("alpha") is None else _fraction(params, "alpha"),
+            )
+
+        def compute(columns):
+            statistic, df, tail, alpha = columns
+            df = None if dist == "norm" else df
+            p = p_values(dist, statistic, df, tail)
+            tested = ~np.isnan(alpha)
+            critical = np.full(p.size, np.nan)
+            reject = np.full(p.size, None, dtype=object)
+            if tested.any():
+                # Only requests with an alpha get a critical value and a decision
+                critical[tested] = critical_values(
+                    dist, alpha[tested], None if df is None else df[tested], tail[tested]
+                )
+                reject[tested] = p[tested] < alpha[tested]
+            return {"p_value": p, "critical_value": critical, "reject": reject}
+
+        return _evaluate(group, parse, compute)
+
+    return _grouped(requests, _distribution, evaluate)
+
+
+def critical_value(requests):
+    """Critical value at significance level ``alpha``.
+
+    Parameters: ``alpha``, ``dist`` (default "norm"), ``df`` (t and chi2),
+    ``tail`` (default "Two-Tailed"). Two-tailed values are the positive bound.
+    """
+    def evaluate(dist, group):
+        def parse(params):
+            return _fraction(params, "alpha"), _df(params, dist), _tail(params, dist)
+
+        def compute(columns):
+            alpha, df, tail = columns
+            values = critical_values(dist, alpha, None if dist == "norm" else df, tail)
+            return {"critical_value": values}
+
+        return _evaluate(group, parse, compute)
+
+    return _grouped(requests, _distribution, evaluate)
+
+
+def _interval_results(interval):
+    return {
+        "estimate": interval.estimate, "standard_error": interval.standard_error,
+        "lower": interval.lower, "upper": interval.upper,
+    }
+
+
+def mean_confidence_interval(requests):
+    """Interval for a population mean.
+
+    Parameters: ``mean``, ``std_dev``, ``size``, ``confidence`` (default 0.95).
+    """
+    def parse(params):
+        std_dev, size = _finite(params, "std_dev"), _finite(params, "size")
+        if std_dev < 0:
+            raise ValueError("'std_dev' must not be negative.")
+        if size < 2:
+            raise ValueError("'size' must be at least 2.")
+        return _finite(params, "mean"), std_dev, size, _fraction(params, "confidence", 0.95)
+
+    return _evaluate(requests, parse, lambda columns: _interval_results(mean_interval(*columns)))
+
+
+def proportion_confidence_interval(requests):
+    """Interval for a proportion.
+
+    Parameters: ``successes``, ``trials``, ``confidence`` (default 0.95),
+    ``method`` (Wilson, Agresti-Coull, Clopper-Pearson or Wald; default Wald,
+    as on the page).
+    """
+    def evaluate(method, group):
+        def parse(params):
+            successes, trials = _finite(params, "successes"), _finite(params, "trials")
+            if not 0 <= successes <= trials or trials <= 0:
+                raise ValueError("'successes' must be between 0 and 'trials', and 'trials' positive.")
+            return successes, trials, _fraction(params, "confidence", 0.95)
+
+        def compute(columns):
+            return _interval_results(proportion_interval(*columns, method=method))
+
+        return _evaluate(group, parse, compute)
+
+    def method_of(params):
+        method = params.get("method", WALD)
+        if method not in PROPORTION_METHODS:
+            raise ValueError(f"'method' must be one of {', '.join(PROPORTION_METHODS)}.")
+        return method
+
+    return _grouped(requests, method_of, evaluate)
+
+
+def generate(requests):
+    """Normally distributed values, reproducible with the returned seed.
+
+    Parameters: ``mean`` (default 0), ``std_dev`` (default 1), ``size``,
+    ``seed`` (default: a fresh one). At most ``MAX_GENERATE`` values.
+    """
+    def parse(params):
+        size, std_dev = _finite(params, "size"), _finite(params, "std_dev", 1.0)
+        if not 1 <= size <= MAX_GENERATE or size % 1:
+            raise ValueError(f"'size' must be a whole number between 1 and {MAX_GENERATE}.")
+        if std_dev < 0:
+            raise ValueError("'std_dev' must not be negative.")
+        seed = params.get("seed")
+        if seed is None:
+            seed = new_seed()
+        elif isinstance(seed, bool) or not isinstance(seed, int) or seed < 0:
+            raise ValueError("'seed' must be a non-negative integer.")
+        return _finite(params, "mean", 0.0), std_dev, int(size), seed
+
+    def compute(columns):
+        # Every request has its own seed and size, so there is nothing to vectorise
+        return {
+            "seed": [int(seed) for seed in columns[3]],
+            "values": [
+                np.concatenate(list(generate_chunks(mean, std_dev, size, seed))).tolist()
+                for mean, std_dev, size, seed in zip(*columns)
+            ],
+        }
+
+    return _evaluate(requests, parse, compute)
+
+
+def normality(requests):
+    """Normality test of a sample.
+
+    Parameters: ``data`` (list of numbers), ``test`` (default "Auto"),
+    ``alpha`` (default 0.05).
+    """
+    results = []
+    for params in requests:
+        try:
+            if not isinstance(params, dict):
+                raise ValueError("A request must be an object of parameters.")
+            data = params.get("data")
+            if not isinstance(data, list) or len(data) > MAX_NORMALITY:
+                raise ValueError(f"'data' must be a list of at most {MAX_NORMALITY} numbers.")
+            try:
+                data = np.asarray(data, dtype=np.float64)
+            except (TypeError, ValueError):
+                raise ValueError("'data' must only contain numbers.") from None
+            data = data[~np.isnan(data)]
+            if not np.isfinite(data).all():
+                raise ValueError("'data' must only contain finite numbers.")
+            if data.size < 3:
+                raise ValueError("'data' needs at least 3 numbers.")
+            alpha = _fraction(params, "alpha", 0.05)
+            result = run_test(params.get("test", AUTO), NormalitySample(data))
+            results.append({
+                "test": result.name, "statistic": _plain(result.statistic), "p_value": _plain(result.p_value),
+                "n_used": int(result.n_used), "normal": bool(result.p_value > alpha),
+            })
+        except ValueError as e:
+            results.append({"error": str(e)})
+    return results
+
+
+OPERATIONS = {
+    "p_value": p_value,
+    "critical_value": critical_value,
+    "mean_interval": mean_confidence_interval,
+    "proportion_interval": proportion_confidence_interval,
+    "generate": generate,
+    "normality": normality,
+}
+
+# Fields of a successful result, e.g. for the columns of a results table; failed requests have "error" instead
+RESULT_FIELDS = {
+    "p_value": ["p_value", "critical_value", "reject"],
+    "critical_value": ["critical_value"],
+    "mean_interval": ["estimate", "standard_error", "lower", "upper"],
+    "proportion_interval": ["estimate", "standard_error", "lower", "upper"],
+    "generate": ["seed", "values"],
+    "normality": ["test", "statistic", "p_value", "n_used", "normal"],
+}
+
+
+def handle(operation, requests):
+    """Results of a batch of ``requests`` for the named operation."""
+    if operation not in OPERATIONS:
+        raise KeyError(operation)
+    return OPERATIONS[operation](list(requests))
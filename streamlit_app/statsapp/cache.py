@@ -0,0 +1,109 @@
+"""Session-level result cache shared by the calculator pages.
+
+Streamlit reruns the whole page script on every widget interaction. Results
+are stored under a key built from the inputs (or a content hash of uploaded
+bytes), so repeating a calculation does no parsing or statistics work again.
+
+Size and lifetime are configurable through the ``STATSAPP_CACHE_SIZE`` and
+``STATSAPP_CACHE_TTL`` (seconds) environment variables.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = int(os.environ.get("STATSAPP_CACHE_SIZE", 32))
+DEFAULT_TTL = float(os.environ.get("STATSAPP_CACHE_TTL", 3600))
+
+_SESSION_KEY = "statsapp_caches"
+
+
+class ResultCache:
+    """Least-recently-used cache with a time-to-live and hit/miss counters."""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL, clock=time.monotonic):
+        if max_entries < 1:
+            raise ValueError("The cache must hold at least one entry.")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for ``key``, calling ``compute()`` on a miss."""
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (self.ttl is None or now - entry[0] <= self.ttl):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                # Expired entry
+                del self._entries[key]
+                self.evictions += 1
+            self.misses += 1
+
+        # Compute outside the lock so a slow calculation does not block other readers
+        value = compute()
+
+        with self._lock:
+            self._entries[key] = (self.clock(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def content_hash(data):
+    """SHA-256 of uploaded bytes or text, used as a cache key for datasets."""
+    if hasattr(data, "getbuffer"):
+        # Streamlit's UploadedFile is a BytesIO: hash its buffer without copying it
+        data = data.getbuffer()
+    elif isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+def get_cache(name, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL):
+    """Return the named cache stored in the current Streamlit session."""
+    import streamlit as st
+
+    caches = st.session_state.setdefault(_SESSION_KEY, {})
+    if name not in caches:
+        caches[name] = ResultCache(max_entries=max_entries, ttl=ttl)
+    return caches[name]
+
+
+def show_cache_stats(cache):
+    """Display the hit/miss counters of a cache in the sidebar."""
+    import streamlit as st
+
+    stats = cache.stats()
+    st.sidebar.caption(
+        f"Result cache: {stats['hits']} hits, {stats['misses']} misses, "
+        f"{stats['entries']} entries ({stats['hit_rate']:.0%} hit rate)"
+    )
@@ -0,0 +1,18 @@
+"""Pure statistics functions behind the pages.
+
+Nothing in this package imports Streamlit, so the same code can be called
+from batch jobs and worker processes or timed in isolation. Functions accept
+scalars or NumPy arrays.
+
+- ``streaming``: one-pass moments and histograms of large inputs
+- ``sketches``: fixed-memory, mergeable histogram and quantile sketches
+- ``incremental``: analysis updated batch by batch as data arrives
+- ``normality``: normality tests on a sorted sample or on its moments
+- ``columns``: normality analysis of every numerical column of a table
+- ``significance``: p-values, critical values and multiple-testing corrections
+- ``critical_values``: the precomputed t and chi-square quantile table
+- ``categorical``: chi-square goodness-of-fit and independence tests on raw categories
+- ``intervals``: confidence intervals for means and proportions
+- ``bootstrap``: percentile and BCa bootstrap intervals for means and quantiles
+- ``power``: closed-form and simulated power and sample size of the tests
+"""
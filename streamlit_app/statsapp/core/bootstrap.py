@@ -0,0 +1,227 @@
+"""Percentile and BCa bootstrap confidence intervals for means and quantiles.
+
+Resampling a large sample is expensive, so the replicates are produced in
+blocks, each from its own child of ``SeedSequence(seed)``, and checked for
+convergence every ``ROUND_BLOCKS`` blocks:
+
+- mean: each block draws a matrix of resample indices, a few rows at a time
+  so that at most ``BLOCK_ELEMENTS`` indices are held in memory, and takes
+  the row means. Blocks run in a process pool; the sample is sent to every
+  worker once, when the pool starts.
+- quantiles (including the median): a quantile of a resample only depends
+  on one or two order statistics of the resample indices. The k-th smallest
+  of n uniform indices is ``floor(n * U)`` with ``U ~ Beta(k, n - k + 1)``,
+  and the next one is drawn from its conditional distribution, so each
+  replicate costs O(1) instead of O(n) and is distributed exactly as with
+  explicit resampling.
+
+Sampling stops early once both interval endpoints move by less than
+``tolerance`` bootstrap standard errors for two consecutive rounds. The
+acceleration of the BCa interval comes from a grouped jackknife
+(``JACKKNIFE_GROUPS`` leave-one-group-out estimates), which is an ordinary
+jackknife for samples of up to that many points.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from statsapp.lazy import lazy_attributes
+from statsapp.parallel import process_pool, run_parallel
+
+norm = lazy_attributes("scipy.stats", "norm")
+
+PERCENTILE = "Percentile"
+BCA = "BCa"
+METHODS = [BCA, PERCENTILE]
+
+DEFAULT_RESAMPLES = 10_000
+MIN_RESAMPLES = 2000
+BLOCK_RESAMPLES = 125
+ROUND_BLOCKS = 8
+# Resample indices held in memory at once by one worker (with the gathered values, about 64 MB)
+BLOCK_ELEMENTS = 2 ** 22
+JACKKNIFE_GROUPS = 100
+DEFAULT_TOLERANCE = 0.02
+
+BootstrapResult = namedtuple(
+    "BootstrapResult", ["estimate", "lower", "upper", "standard_error", "resamples", "converged", "replicates"]
+)
+
+# The sample, as handed to each worker process by the pool initializer
+_shared = {}
+
+
+def _init_worker(values):
+    _shared["values"] = values
+
+
+def _mean_replicates(count, seed_sequence, values=None):
+    """Means of ``count`` resamples, drawn as index matrices of a bounded size."""
+    values = _shared["values"] if values is None else values
+    n = values.size
+    rng = np.random.default_rng(seed_sequence)
+    index_type = np.int32 if n < 2 ** 31 else np.int64
+    rows = max(1, min(count, BLOCK_ELEMENTS // n))
+    means = np.empty(count)
+    for start in range(0, count, rows):
+        stop = min(start + rows, count)
+        indices = rng.integers(0, n, size=(stop - start, n), dtype=index_type)
+        means[start:stop] = values[indices].mean(axis=1)
+    return means
+
+
+def _quantile_replicates(sorted_values, q, count, seed_sequence):
+    """``np.quantile(resample, q)`` for ``count`` resamples, from the order statistics of the indices."""
+    n = sorted_values.size
+    rng = np.random.default_rng(seed_sequence)
+    position = (n - 1) * q
+    k = int(np.floor(position))
+    fraction = position - k
+
+    # Uniform variate behind the (k + 1)-th smallest of n resample indices
+    u = rng.beta(k + 1, n - k, size=count)
+    lower = np.minimum((u * n).astype(np.intp), n - 1)
+    if fraction == 0 or k + 1 >= n:
+        return sorted_values[lower]
+    # Given it, the next order statistic is the smallest of n - k - 1 uniforms above it
+    u_next = u + (1 - u) * rng.beta(1, n - k - 1, size=count)
+    upper = np.minimum((u_next * n).astype(np.intp), n - 1)
+    return sorted_values[lower] + fraction * (sorted_values[upper] - sorted_values[lower])
+
+
+def _leave_out_index(removed, rank):
+    """Index in the sorted sample of the ``rank``-th (from 0) value left after dropping the ``removed`` indices."""
+    index = rank
+    while True:
+        # The answer is the smallest index with exactly ``rank`` kept values before it
+        shifted = rank + int(np.searchsorted(removed, index, side="right"))
+        if shifted == index:
+            return index
+        index = shifted
+
+
+def _jackknife(values, statistic, q, seed_sequence, groups=JACKKNIFE_GROUPS):
+    """Leave-one-group-out estimates over ``groups`` random groups of the sample.
+
+    For quantiles ``values`` must be sorted; every estimate is then read off
+    the sorted sample instead of computing a quantile of the rest from scratch.
+    """
+    n = values.size
+    groups = min(groups, n)
+    order = np.random.default_rng(seed_sequence).permutation(n)
+
+    if statistic == "mean":
+        labels = np.empty(n, dtype=np.intp)
+        labels[order] = np.arange(n) % groups
+        sums = np.bincount(labels, weights=values, minlength=groups)
+        counts = np.bincount(labels, minlength=groups)
+        return (values.sum() - sums) / (n - counts)
+
+    estimates = np.empty(groups)
+    for group in range(groups):
+        removed = np.sort(order[group::groups])
+        position = (n - removed.size - 1) * q
+        k = int(np.floor(position))
+        lower = values[_leave_out_index(removed, k)]
+        fraction = position - k
+        if fraction > 0:
+            upper = values[_leave_out_index(removed, k + 1)]
+            lower = lower + fraction * (upper - lower)
+        estimates[group] = lower
+    return estimates
+
+
+def acceleration(jackknife_estimates):
+    """BCa acceleration from jackknife estimates."""
+    deviations = jackknife_estimates.mean() - jackknife_estimates
+    denominator = 6 * np.sum(deviations ** 2) ** 1.5
+    return float(np.sum(deviations ** 3) / denominator) if denominator > 0 else 0.0
+
+
+def interval_endpoints(replicates, estimate, confidence, method=BCA, acceleration=0.0):
+    """Percentile or BCa interval from bootstrap replicates."""
+    alpha = 1 - confidence
+    probabilities = np.array([alpha / 2, 1 - alpha / 2])
+    if method == BCA:
+        # Bias correction: the share of replicates below the estimate, ties counted half
+        below = np.mean(replicates < estimate) + 0.5 * np.mean(replicates == estimate)
+        z0 = norm.ppf(below)
+        if not np.isfinite(z0):
+            raise ValueError("The BCa interval is undefined because every replicate lies on one side of the estimate.")
+        z = norm.ppf(probabilities)
+        probabilities = norm.cdf(z0 + (z0 + z) / (1 - acceleration * (z0 + z)))
+    elif method != PERCENTILE:
+        raise ValueError(f"Unknown bootstrap method: {method}")
+    lower, upper = np.quantile(replicates, probabilities)
+    return float(lower), float(upper)
+
+
+def bootstrap_interval(
+    values,
+    statistic="mean",
+    q=0.5,
+    confidence=0.95,
+    method=BCA,
+    max_resamples=DEFAULT_RESAMPLES,
+    seed=None,
+    workers=1,
+    tolerance=DEFAULT_TOLERANCE,
+    min_resamples=MIN_RESAMPLES,
+):
+    """Bootstrap interval for the mean (``statistic="mean"``) or the ``q`` quantile (``"quantile"``).
+
+    NaNs are ignored. Results depend only on the seed, never on ``workers``.
+    """
+    if statistic not in ("mean", "quantile"):
+        raise ValueError(f"Unknown statistic: {statistic}")
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    if values.size < 2:
+        raise ValueError("The bootstrap needs at least two values.")
+
+    root = np.random.SeedSequence(seed)
+    jackknife_seed = root.spawn(1)[0]
+    if statistic == "mean":
+        estimate = float(values.mean())
+    else:
+        sorted_values = np.sort(values)
+        estimate = float(np.quantile(sorted_values, q))
+    sample = values if statistic == "mean" else sorted_values
+    accel = acceleration(_jackknife(sample, statistic, q, jackknife_seed)) if method == BCA else 0.0
+
+    batches = []
+    total = 0
+    endpoints = None
+    stable_rounds = 0
+    converged = False
+    pool_workers = workers if statistic == "mean" else 1
+    with process_pool(pool_workers, _init_worker, (values,)) as pool:
+        while total < max_resamples:
+            counts = []
+            for _ in range(ROUND_BLOCKS):
+                count = min(BLOCK_RESAMPLES, max_resamples - total - sum(counts))
+                if count <= 0:
+                    break
+                counts.append(count)
+            seeds = root.spawn(len(counts))
+
+            if statistic == "mean":
+                # Inside the pool the workers already hold the sample
+                shared = None if pool is not None else values
+                tasks = [(count, seed_sequence, shared) for count, seed_sequence in zip(counts, seeds)]
+                batches.extend(run_parallel(_mean_replicates, tasks, pool_workers, pool=pool))
+            else:
+                batches.extend(_quantile_replicates(sorted_values, q, count, seed_sequence) for count, seed_sequence in zip(counts, seeds))
+            total += sum(counts)
+
+            replicates = np.concatenate(batches)
+            previous, endpoints = endpoints, interval_endpoints(replicates, estimate, confidence, method, accel)
+            standard_error = replicates.std(ddof=1)
+            if previous is not None and total >= min_resamples:
+                change = max(abs(endpoints[0] - previous[0]), abs(endpoints[1] - previous[1]))
+                stable_rounds = stable_rounds + 1 if change <= tolerance * standard_error else 0
+                if stable_rounds >= 2:
+                    converged = True
+                    break
+
+    return BootstrapResult(estimate, endpoints[0], endpoints[1], float(standard_error), total, converged, replicates)
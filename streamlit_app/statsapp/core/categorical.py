@@ -0,0 +1,409 @@
+"""Chi-square goodness-of-fit and independence tests on raw categorical data.
+
+Values are turned into integer codes once (``pd.factorize``, or the codes of
+a categorical column), so counting is a single ``np.bincount`` whatever the
+labels are. A contingency table is counted the same way on the combined code
+``row * columns + column``: densely while the table has at most
+``DENSE_CELLS`` cells, otherwise as a sparse list of the non-empty cells. The
+independence statistic only needs the non-empty cells and the margins,
+
+    X² = n * (sum of O² / (row total * column total) - 1),
+
+so high-cardinality columns never allocate the full table.
+
+When expected counts are small (any below 1, or more than a fifth below 5),
+the chi-square distribution is a poor approximation and the p-value comes
+from Monte Carlo instead: multinomial samples under the null hypothesis for
+goodness of fit, and random permutations of one column against the other
+for independence. Permuted tables are drawn directly with fixed margins
+(Patefield's algorithm, O(cells) per table) or, for sparse tables with
+many cells per row of data, by shuffling the column codes (O(rows) per
+table). Blocks of ``BLOCK_PERMUTATIONS`` run in a process pool, each from
+its own child of ``SeedSequence(seed)``, so the p-value depends only on the
+seed. They run ``ROUND_BLOCKS`` at a time and stop once the standard error
+of the p-value reaches ``target_se``.
+
+The work is estimated before it starts, in shuffled rows (a cell of a random
+table counts as ``PATEFIELD_CELL_COST`` rows). Above ``MAX_WORK`` the
+Automatic method uses the chi-square distribution when there are at least
+``LARGE_DF`` degrees of freedom: the statistic is then a sum of many terms
+and close to chi-square even when single cells are sparse. Otherwise a
+``ValueError`` says how many permutations fit.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from statsapp.lazy import lazy_attributes, lazy_module
+from statsapp.parallel import process_pool, run_parallel
+
+pd = lazy_module("pandas")
+chi2, random_table = lazy_attributes("scipy.stats", "chi2", "random_table")
+
+GOODNESS_OF_FIT = "Goodness of Fit"
+INDEPENDENCE = "Independence"
+TESTS = [GOODNESS_OF_FIT, INDEPENDENCE]
+
+AUTOMATIC = "Automatic"
+ASYMPTOTIC = "Chi-Square Distribution"
+MONTE_CARLO = "Monte Carlo"
+METHODS = [AUTOMATIC, ASYMPTOTIC, MONTE_CARLO]
+
+# Cochran's rule for the chi-square approximation
+MIN_EXPECTED = 5
+MAX_SMALL_SHARE = 0.2
+
+DEFAULT_PERMUTATIONS = 10_000
+MIN_PERMUTATIONS = 1000
+BLOCK_PERMUTATIONS = 250
+ROUND_BLOCKS = 8
+DEFAULT_TARGET_SE = 0.0025
+# Monte Carlo work allowed for one p-value, in shuffled rows (about 50 ns each, so under a minute on one core)
+MAX_WORK = 10 ** 9
+# Shuffled tables too large to count densely are sorted, at about three times the cost per row
+SORT_ROW_COST = 3
+LARGE_DF = 100
+# Largest table counted densely, and values held in memory at once by one worker (about 32 MB)
+DENSE_CELLS = 2 ** 22
+BLOCK_ELEMENTS = 2 ** 22
+# A cell of a random table costs about as much as four shuffled rows
+PATEFIELD_CELL_COST = 4
+# Relative tolerance for ties between a simulated and the observed statistic
+TIE_TOLERANCE = 1e-7
+
+CategoryCounts = namedtuple("CategoryCounts", ["labels", "counts", "missing"])
+ContingencyTable = namedtuple(
+    "ContingencyTable",
+    ["row_labels", "column_labels", "cells", "counts", "row_totals", "column_totals", "missing", "row_codes", "column_codes"],
+)
+ChiSquareResult = namedtuple(
+    "ChiSquareResult",
+    ["statistic", "df", "p_value", "method", "small_expected", "min_expected", "permutations", "standard_error"],
+)
+
+
+def category_codes(values):
+    """Integer codes (-1 for missing values) and the labels they stand for."""
+    if isinstance(values, pd.Series) and isinstance(values.dtype, pd.CategoricalDtype):
+        # Categorical columns (e.g. read with dtype="category") are already coded
+        values = values.cat.remove_unused_categories()
+        return values.cat.codes.to_numpy(), values.cat.categories.to_numpy()
+    codes, labels = pd.factorize(values, use_na_sentinel=True)
+    return codes, np.asarray(labels)
+
+
+def count_categories(values):
+    """Count of every category, in order of first appearance (or of the categories)."""
+    codes, labels = category_codes(values)
+    present = codes[codes >= 0]
+    return CategoryCounts(labels, np.bincount(present, minlength=len(labels)), int(codes.size - present.size))
+
+
+def crosstab(row_values, column_values):
+    """Contingency table of two equally long columns; pairs with a missing value are left out."""
+    row_codes, row_labels = category_codes(row_values)
+    column_codes, column_labels = category_codes(column_values)
+    if row_codes.size != column_codes.size:
+        raise ValueError("Both columns must have the same number of values.")
+    present = (row_codes >= 0) & (column_codes >= 0)
+    missing = int(present.size - np.count_nonzero(present))
+    if missing:
+        row_codes, column_codes = row_codes[present], column_codes[present]
+
+    # Categories seen only next to missing values drop out of the table
+    row_codes, row_labels = _compact(row_codes, row_labels)
+    column_codes, column_labels = _compact(column_codes, column_labels)
+    rows, columns = len(row_labels), len(column_labels)
+    keys = row_codes.astype(np.int64) * columns + column_codes
+    if rows * columns <= DENSE_CELLS:
+        dense = np.bincount(keys, minlength=rows * columns)
+        cells = np.flatnonzero(dense)
+        counts = dense[cells]
+    else:
+        cells, counts = np.unique(keys, return_counts=True)
+    row_totals = np.bincount(row_codes, minlength=rows)
+    column_totals = np.bincount(column_codes, minlength=columns)
+    return ContingencyTable(
+        row_labels, column_labels, cells, counts, row_totals, column_totals, missing, row_codes, column_codes
+    )
+
+
+def _compact(codes, labels):
+    used = np.bincount(codes, minlength=len(labels)) > 0
+    if used.all():
+        return codes, labels
+    remap = np.cumsum(used) - 1
+    return remap[codes], labels[used]
+
+
+def table_frame(table):
+    """The contingency table as a DataFrame with the labels on both axes."""
+    rows, columns = len(table.row_labels), len(table.column_labels)
+    dense = np.zeros(rows * columns, dtype=np.int64)
+    dense[table.cells] = table.counts
+    return pd.DataFrame(
+        dense.reshape(rows, columns),
+        index=pd.Index(table.row_labels, name="Row"),
+        columns=pd.Index(table.column_labels, name="Column"),
+    )
+
+
+def expected_proportions(labels, weights=None):
+    """Null-hypothesis proportions aligned with ``labels``; equal proportions when ``weights`` is None.
+
+    ``weights`` maps categories to proportions or counts of any scale.
+    Categories that only appear in ``weights`` are appended to the labels,
+    with an observed count of zero. Returns the labels and the proportions.
+    """
+    labels = np.asarray(labels, dtype=object)
+    if weights is None:
+        return labels, np.full(len(labels), 1 / len(labels))
+    keys = {str(key): value for key, value in weights.items()}
+    unknown = [str(label) for label in labels if str(label) not in keys]
+    if unknown:
+        raise ValueError(f"No expected proportion is given for: {', '.join(unknown[:5])}.")
+    extra = [key for key in keys if key not in {str(label) for label in labels}]
+    labels = np.concatenate([labels, np.array(extra, dtype=object)])
+    values = np.array([float(keys[str(label)]) for label in labels])
+    if (values <= 0).any() or not np.isfinite(values).all():
+        raise ValueError("Expected proportions must be positive numbers.")
+    return labels, values / values.sum()
+
+
+def _small_expected(expected_count, small_cells, cells):
+    return bool(expected_count < 1 or small_cells > MAX_SMALL_SHARE * cells)
+
+
+def _p_value(exceedances, permutations):
+    # The observed data counts as one of the permutations, so the p-value is never 0
+    p_value = (exceedances + 1) / (permutations + 1)
+    return p_value, float(np.sqrt(p_value * (1 - p_value) / permutations))
+
+
+def _use_monte_carlo(method, small):
+    if method not in METHODS:
+        raise ValueError(f"Unknown method: {method}")
+    return method == MONTE_CARLO or (method == AUTOMATIC and small)
+
+
+def _affordable(cost, permutations, df, method):
+    """Whether ``permutations`` Monte Carlo tables of ``cost`` rows each fit ``MAX_WORK``.
+
+    Returns False when the Automatic method should fall back to the
+    chi-square distribution, and raises when nothing sensible is left.
+    """
+    if cost * permutations <= MAX_WORK:
+        return True
+    if method == AUTOMATIC and df >= LARGE_DF:
+        return False
+    fitting = MAX_WORK // cost
+    advice = (
+        f"Use at most {fitting:,} permutations or the chi-square distribution."
+        if fitting >= MIN_PERMUTATIONS else "Use the chi-square distribution instead."
+    )
+    raise ValueError(
+        f"{permutations:,} Monte Carlo permutations would cost about {cost * permutations:.2g} shuffled rows, "
+        f"more than the limit of {MAX_WORK:.0e}. {advice}"
+    )
+
+
+def _monte_carlo(function, fixed, permutations, seed, workers, target_se, pool=None, extra=(), progress=None):
+    """Exceedances and permutations done, in rounds of blocks, until the p-value's standard error reaches ``target_se``.
+
+    Calls ``function(*fixed, count, seed_sequence, *extra)`` per block and
+    ``progress(done, permutations)`` after every round.
+    """
+    root = np.random.SeedSequence(seed)
+    exceedances = 0
+    done = 0
+    with process_pool(workers if pool is None else 1) as own_pool:
+        pool = pool or own_pool
+        while done < permutations:
+            counts = []
+            for _ in range(ROUND_BLOCKS):
+                count = min(BLOCK_PERMUTATIONS, permutations - done - sum(counts))
+                if count <= 0:
+                    break
+                counts.append(count)
+            seeds = root.spawn(len(counts))
+            tasks = [fixed + (count, seed_sequence) + extra for count, seed_sequence in zip(counts, seeds)]
+            exceedances += sum(run_parallel(function, tasks, workers, pool=pool))
+            done += sum(counts)
+            if progress is not None:
+                progress(done, permutations)
+            if done >= MIN_PERMUTATIONS and _p_value(exceedances, done)[1] <= target_se:
+                break
+    return exceedances, done
+
+
+def _multinomial_exceedances(total, proportions, observed, count, seed_sequence):
+    """How many of ``count`` goodness-of-fit statistics under the null reach ``observed``."""
+    rng = np.random.default_rng(seed_sequence)
+    expected = total * proportions
+    rows = max(1, min(count, BLOCK_ELEMENTS // proportions.size))
+    exceedances = 0
+    for start in range(0, count, rows):
+        samples = rng.multinomial(total, proportions, size=min(rows, count - start))
+        statistics = ((samples - expected) ** 2 / expected).sum(axis=1)
+        exceedances += int(np.count_nonzero(statistics >= observed * (1 - TIE_TOLERANCE)))
+    return exceedances
+
+
+def goodness_of_fit(
+    counts,
+    weights=None,
+    method=AUTOMATIC,
+    permutations=DEFAULT_PERMUTATIONS,
+    seed=None,
+    workers=1,
+    target_se=DEFAULT_TARGET_SE,
+    progress=None,
+):
+    """Chi-square goodness-of-fit test of ``CategoryCounts`` against ``weights`` (equal proportions by default).
+
+    Returns the result and a DataFrame of observed and expected counts.
+    """
+    labels, proportions = expected_proportions(counts.labels, weights)
+    observed = np.zeros(len(labels), dtype=np.int64)
+    observed[:len(counts.counts)] = counts.counts
+    total = int(observed.sum())
+    if len(labels) < 2:
+        raise ValueError("The goodness-of-fit test needs at least two categories.")
+    if total == 0:
+        raise ValueError("There are no values to count.")
+
+    expected = total * proportions
+    statistic = float(((observed - expected) ** 2 / expected).sum())
+    df = len(labels) - 1
+    small = _small_expected(expected.min(), np.count_nonzero(expected < MIN_EXPECTED), len(labels))
+    frame = pd.DataFrame({"Observed": observed, "Expected": expected}, index=pd.Index(labels, name="Category"))
+
+    # A multinomial draw costs about one row per category
+    if not _use_monte_carlo(method, small) or not _affordable(len(labels), permutations, df, method):
+        return ChiSquareResult(statistic, df, float(chi2.sf(statistic, df)), ASYMPTOTIC, small, float(expected.min()), 0, 0.0), frame
+
+    exceedances, done = _monte_carlo(
+        _multinomial_exceedances, (total, proportions, statistic), permutations, seed, workers, target_se,
+        progress=progress,
+    )
+    p_value, standard_error = _p_value(exceedances, done)
+    result = ChiSquareResult(statistic, df, p_value, MONTE_CARLO, small, float(expected.min()), done, standard_error)
+    return result, frame
+
+
+def _independence_statistic(cells, counts, row_totals, column_totals, columns, total):
+    row_index, column_index = np.divmod(cells, columns)
+    row_sums = row_totals[row_index].astype(np.float64)
+    column_sums = column_totals[column_index].astype(np.float64)
+    return float(total * ((counts.astype(np.float64) ** 2 / (row_sums * column_sums)).sum() - 1))
+
+
+def _small_cells(row_totals, column_totals, total):
+    """Number of cells whose expected count ``row * column / total`` is below ``MIN_EXPECTED``."""
+    sorted_columns = np.sort(column_totals).astype(np.float64)
+    # For each row, the columns with column total < MIN_EXPECTED * total / row total
+    limits = MIN_EXPECTED * total / row_totals.astype(np.float64)
+    return int(np.searchsorted(sorted_columns, limits, side="left").sum())
+
+
+# The codes of the two columns, as handed to each worker process by the pool initializer
+_shared = {}
+
+
+def _init_worker(row_codes, column_codes):
+    _shared["row_codes"] = row_codes
+    _shared["column_codes"] = column_codes
+
+
+def _table_exceedances(row_totals, column_totals, observed, count, seed_sequence):
+    """Exceedances among ``count`` random tables with the observed margins (Patefield's algorithm)."""
+    rng = np.random.default_rng(seed_sequence)
+    total = int(row_totals.sum())
+    inverse = 1.0 / np.outer(row_totals, column_totals).astype(np.float64)
+    rows = max(1, min(count, BLOCK_ELEMENTS // inverse.size))
+    distribution = random_table(row_totals, column_totals)
+    exceedances = 0
+    for start in range(0, count, rows):
+        tables = distribution.rvs(min(rows, count - start), method="patefield", random_state=rng)
+        statistics = total * ((tables.astype(np.float64) ** 2 * inverse).sum(axis=(1, 2)) - 1)
+        exceedances += int(np.count_nonzero(statistics >= observed * (1 - TIE_TOLERANCE)))
+    return exceedances
+
+
+def _shuffle_exceedances(row_totals, column_totals, observed, count, seed_sequence, row_codes=None, column_codes=None):
+    """Exceedances among ``count`` tables from shuffled column codes, for sparse tables.
+
+    Permuted tables are counted with ``np.bincount`` while the table is small
+    enough to hold densely, like in ``crosstab``, and sorted otherwise.
+    """
+    row_codes = _shared["row_codes"] if row_codes is None else row_codes
+    column_codes = _shared["column_codes"] if column_codes is None else column_codes
+    rng = np.random.default_rng(seed_sequence)
+    rows, columns = row_totals.size, column_totals.size
+    total = row_codes.size
+    row_keys = row_codes.astype(np.int64) * columns
+    dense = rows * columns <= DENSE_CELLS
+    if dense:
+        inverse = 1.0 / np.outer(row_totals, column_totals).astype(np.float64).ravel()
+    exceedances = 0
+    for _ in range(count):
+        keys = row_keys + rng.permutation(column_codes)
+        if dense:
+            counts = np.bincount(keys, minlength=rows * columns)
+            statistic = total * (np.dot(counts * counts, inverse) - 1)
+        else:
+            cells, counts = np.unique(keys, return_counts=True)
+            statistic = _independence_statistic(cells, counts, row_totals, column_totals, columns, total)
+        exceedances += statistic >= observed * (1 - TIE_TOLERANCE)
+    return int(exceedances)
+
+
+def independence(
+    table,
+    method=AUTOMATIC,
+    permutations=DEFAULT_PERMUTATIONS,
+    seed=None,
+    workers=1,
+    target_se=DEFAULT_TARGET_SE,
+    progress=None,
+):
+    """Chi-square test of independence on a ``ContingencyTable``.
+
+    A result with the chi-square method but ``small_expected`` set under the
+    Automatic method means the Monte Carlo test was too costly (see ``MAX_WORK``).
+    """
+    rows, columns = len(table.row_labels), len(table.column_labels)
+    if rows < 2 or columns < 2:
+        raise ValueError("The independence test needs at least two categories in each column.")
+    total = int(table.row_totals.sum())
+    statistic = _independence_statistic(table.cells, table.counts, table.row_totals, table.column_totals, columns, total)
+    df = (rows - 1) * (columns - 1)
+    min_expected = float(table.row_totals.min()) * float(table.column_totals.min()) / total
+    small = _small_expected(min_expected, _small_cells(table.row_totals, table.column_totals, total), rows * columns)
+
+    cells = rows * columns
+    patefield = cells * PATEFIELD_CELL_COST <= total
+    if patefield:
+        cost = cells * PATEFIELD_CELL_COST
+    elif cells <= DENSE_CELLS:
+        # Shuffle the rows, then count and sum every cell of the dense table
+        cost = total + cells
+    else:
+        cost = SORT_ROW_COST * total
+    if not _use_monte_carlo(method, small) or not _affordable(cost, permutations, df, method):
+        return ChiSquareResult(statistic, df, float(chi2.sf(statistic, df)), ASYMPTOTIC, small, min_expected, 0, 0.0)
+
+    margins = (table.row_totals, table.column_totals, statistic)
+    if patefield:
+        exceedances, done = _monte_carlo(
+            _table_exceedances, margins, permutations, seed, workers, target_se, progress=progress
+        )
+    else:
+        # Inside the pool the workers already hold the codes
+        with process_pool(workers, _init_worker, (table.row_codes, table.column_codes)) as pool:
+            shared = (None, None) if pool is not None else (table.row_codes, table.column_codes)
+            exceedances, done = _monte_carlo(
+                _shuffle_exceedances, margins, permutations, seed, workers, target_se, pool, shared, progress
+            )
+    p_value, standard_error = _p_value(exceedances, done)
+    return ChiSquareResult(statistic, df, p_value, MONTE_CARLO, small, min_expected, done, standard_error)
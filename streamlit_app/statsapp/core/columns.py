@@ -0,0 +1,76 @@
+"""Normality analysis of every numerical column of a table.
+
+Each column is analysed on its own (sorting, moments, the full test battery,
+histogram and Q-Q quantiles), so the columns are spread over a process pool.
+Only the small per-column results come back from the workers; the data of a
+column is never returned.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from statsapp.core.normality import TESTS, NormalitySample, choose_test
+from statsapp.core.sketches import HistogramSketch
+from statsapp.lazy import lazy_module
+from statsapp.parallel import run_parallel
+
+pd = lazy_module("pandas")
+
+ColumnReport = namedtuple(
+    "ColumnReport", ["name", "count", "missing", "moments", "results", "auto_test", "histogram", "quantiles"]
+)
+
+
+def analyse_column(name, values, probabilities):
+    """Moments, every normality test, histogram and ``probabilities`` quantiles of one column."""
+    values = np.asarray(values, dtype=np.float64)
+    present = values[~np.isnan(values)]
+    sample = NormalitySample(present)
+    results = {}
+    auto_test = None
+    # Constant columns (no spread) cannot be tested
+    if sample.n >= 3 and not sample.constant:
+        auto_test = choose_test(sample)
+        for test_name, test in TESTS.items():
+            try:
+                results[test_name] = test(sample)
+            except ValueError:
+                # Too few points for this test
+                continue
+    quantiles = np.quantile(sample.sorted, probabilities) if sample.n else np.full(len(probabilities), np.nan)
+    return ColumnReport(
+        name, sample.n, int(values.size - sample.n), sample.moments, results, auto_test,
+        HistogramSketch().update(sample.sorted), quantiles,
+    )
+
+
+def numeric_columns(frame):
+    """Names of the columns that hold numbers (or only missing values)."""
+    return [name for name in frame.columns if pd.api.types.is_numeric_dtype(frame[name])]
+
+
+def analyse_columns(frame, probabilities, workers=1):
+    """``ColumnReport`` of every numerical column, in column order."""
+    tasks = [(str(name), frame[name].to_numpy(dtype=np.float64), probabilities) for name in numeric_columns(frame)]
+    return run_parallel(analyse_column, tasks, workers)
+
+
+def summary_table(reports):
+    """One row per column: count, moments and the p-value of every test."""
+    rows = []
+    for report in reports:
+        row = {
+            "Column": report.name,
+            "Count": report.count,
+            "Missing": report.missing,
+            "Mean": report.moments.mean if report.count else np.nan,
+            "Standard Deviation": report.moments.std if report.count else np.nan,
+            "Skewness": report.moments.skewness,
+            "Kurtosis (excess)": report.moments.kurtosis,
+            "Auto Test": report.auto_test,
+        }
+        for test_name in TESTS:
+            result = report.results.get(test_name)
+            row[f"{test_name} p-value"] = result.p_value if result is not None else np.nan
+        rows.append(row)
+    return pd.DataFrame(rows)
@@ -0,0 +1,162 @@
+"""Precomputed t and chi-square critical values.
+
+Inverting the t and chi-square CDFs is the slowest step of a significance
+calculation. The upper-tail quantiles ``isf(q, df)`` are therefore tabulated
+once for every tail probability the alpha widget can produce (``alpha`` and
+``alpha / 2`` for alpha between 0.001 and 0.1) and every integer df up to
+``DF_CAP``. The table is saved as a ``.npz`` file in ``STATSAPP_CACHE_DIR``
+(default ``~/.cache/statsapp``) and loaded on the next start.
+
+Lookups are vectorised and O(1) per value:
+
+- grid points return the tabulated scipy value;
+- other probabilities inside the grid are interpolated linearly in the
+  normal quantile z(q), in which t and chi-square quantiles are nearly
+  linear, but only where the estimated error of that cell is within
+  ``tolerance``;
+- everything else (df above the cap, non-integer df, probabilities outside
+  the grid) falls back to the exact ``scipy.stats`` call.
+
+The error of a cell is an estimate, not a proven bound: the interpolation
+is compared with the exact quantile at ``CHECK_POINTS`` evenly spaced
+points inside the cell, and the largest difference is multiplied by
+``ERROR_MARGIN`` to cover the points in between. The interpolation error
+is a smooth, single-peaked function of z within a cell, so this is
+conservative in practice, which the tests check on a denser grid.
+"""
+import os
+from pathlib import Path
+
+import numpy as np
+
+from statsapp.lazy import lazy_attributes
+
+chi2, norm, t = lazy_attributes("scipy.stats", "chi2", "norm", "t")
+
+Q_STEP = 0.0005
+Q_COUNT = 200  # tail probabilities 0.0005, 0.0010, ..., 0.1000
+DF_CAP = 1000
+DEFAULT_TOLERANCE = 1e-4
+# Points inside each cell at which the interpolation is compared with the exact value
+CHECK_POINTS = 3
+# Allowance for the error between the checked points
+ERROR_MARGIN = 1.1
+DISTRIBUTIONS = {"t": t, "chi2": chi2}
+
+CACHE_DIR = Path(os.environ.get("STATSAPP_CACHE_DIR", Path.home() / ".cache" / "statsapp"))
+
+_table = None
+
+
+class CriticalValueTable:
+    """Upper-tail quantiles on a (tail probability, df) grid, with per-cell error estimates."""
+
+    def __init__(self, values, errors, df_cap=DF_CAP):
+        # values[dist]: (Q_COUNT, df_cap); errors[dist]: (Q_COUNT - 1, df_cap)
+        self.values = values
+        self.errors = errors
+        self.df_cap = df_cap
+        self.grid = Q_STEP * np.arange(1, Q_COUNT + 1)
+        self._z_grid = norm.isf(self.grid)
+
+    @classmethod
+    def build(cls, df_cap=DF_CAP):
+        grid = Q_STEP * np.arange(1, Q_COUNT + 1)
+        z_grid = norm.isf(grid)
+        df = np.arange(1, df_cap + 1)
+
+        values, errors = {}, {}
+        for name, dist in DISTRIBUTIONS.items():
+            values[name] = dist.isf(grid[:, None], df[None, :])
+            errors[name] = np.zeros((Q_COUNT - 1, df_cap))
+            # Evenly spaced points of every cell in z, the variable of the interpolation
+            for fraction in np.arange(1, CHECK_POINTS + 1) / (CHECK_POINTS + 1):
+                points = norm.sf(z_grid[:-1] + fraction * (z_grid[1:] - z_grid[:-1]))
+                interpolated = values[name][:-1] * (1 - fraction) + values[name][1:] * fraction
+                exact = dist.isf(points[:, None], df[None, :])
+                errors[name] = np.maximum(errors[name], np.abs(exact - interpolated))
+            errors[name] *= ERROR_MARGIN
+        return cls(values, errors, df_cap)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as stored:
+            df_cap = int(stored["df_cap"])
+            values = {name: stored[name] for name in DISTRIBUTIONS}
+            errors = {name: stored[f"{name}_error"] for name in DISTRIBUTIONS}
+        for name in DISTRIBUTIONS:
+            if values[name].shape != (Q_COUNT, df_cap) or errors[name].shape != (Q_COUNT - 1, df_cap):
+                raise ValueError(f"The critical value table in {path} has an unexpected shape.")
+        return cls(values, errors, df_cap)
+
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        arrays = dict(self.values)
+        arrays.update({f"{name}_error": error for name, error in self.errors.items()})
+        # Write to a temporary file first so a concurrent reader never sees half a table
+        temporary = path.with_suffix(".tmp.npz")
+        np.savez(temporary, df_cap=self.df_cap, **arrays)
+        os.replace(temporary, path)
+
+    def upper(self, dist, q, df, tolerance=DEFAULT_TOLERANCE):
+        """Upper-tail quantile ``isf(q, df)`` of the "t" or "chi2" distribution."""
+        if dist not in DISTRIBUTIONS:
+            raise ValueError(f"Unknown distribution: {dist}")
+        q, df = np.broadcast_arrays(np.asarray(q, dtype=np.float64), np.asarray(df, dtype=np.float64))
+        values, errors = self.values[dist], self.errors[dist]
+        result = np.empty(q.shape)
+
+        in_table = (df >= 1) & (df <= self.df_cap) & (df == np.floor(df))
+        column = np.where(in_table, df, 1).astype(np.intp) - 1
+
+        # Exact grid points
+        position = q / Q_STEP
+        nearest = np.rint(position)
+        on_grid = in_table & (np.abs(position - nearest) <= 1e-9 * position) & (nearest >= 1) & (nearest <= Q_COUNT)
+        row = np.clip(nearest, 1, Q_COUNT).astype(np.intp) - 1
+        result[on_grid] = values[row[on_grid], column[on_grid]]
+
+        # Interpolation between grid points where the cell's estimated error allows it
+        lower = np.clip(np.floor(position), 1, Q_COUNT - 1).astype(np.intp) - 1
+        between = in_table & ~on_grid & (q > self.grid[0]) & (q < self.grid[-1])
+        between &= errors[lower, column] <= tolerance
+        if between.any():
+            rows, columns = lower[between], column[between]
+            z = norm.isf(q[between])
+            fraction = (z - self._z_grid[rows]) / (self._z_grid[rows + 1] - self._z_grid[rows])
+            result[between] = values[rows, columns] * (1 - fraction) + values[rows + 1, columns] * fraction
+
+        # Exact fallback for everything outside the table
+        exact = ~(on_grid | between)
+        if exact.any():
+            result[exact] = DISTRIBUTIONS[dist].isf(q[exact], df[exact])
+
+        return result if result.ndim else float(result)
+
+
+def table_path(df_cap=DF_CAP):
+    # Tables whose errors were checked at a different number of points are rebuilt
+    return CACHE_DIR / f"critical_values_q{Q_COUNT}_df{df_cap}_c{CHECK_POINTS}.npz"
+
+
+def get_table():
+    """Process-wide table: loaded from the cache directory, or built and saved on first use."""
+    global _table
+    if _table is None:
+        path = table_path()
+        try:
+            _table = CriticalValueTable.load(path)
+        except (OSError, KeyError, ValueError):
+            _table = CriticalValueTable.build()
+            try:
+                _table.save(path)
+            except OSError:
+                # A read-only cache directory only costs a rebuild on the next start
+                pass
+    return _table
+
+
+def upper_critical_value(dist, q, df, tolerance=DEFAULT_TOLERANCE):
+    """Upper-tail critical value for tail probability ``q`` (e.g. alpha or alpha / 2)."""
+    return get_table().upper(dist, q, df, tolerance=tolerance)
@@ -0,0 +1,41 @@
+"""Analysis that is updated batch by batch as data arrives.
+
+Only sufficient statistics are kept: the count and central moments, a
+fixed-bin histogram and a quantile sketch. Appending a batch costs time
+proportional to the batch, and reading the results costs time proportional
+to the size of the summaries, never to the amount of data seen so far.
+"""
+from statsapp.core.normality import AUTO, NormalitySample, run_test
+from statsapp.core.sketches import DEFAULT_BINS, DEFAULT_K
+from statsapp.core.streaming import StreamSummary
+
+QUANTILES = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+
+
+class IncrementalSummary(StreamSummary):
+    """Moments, histogram and quantile sketch of every batch appended so far."""
+
+    def __init__(self, bins=DEFAULT_BINS, k=DEFAULT_K, seed=0):
+        super().__init__(bins, k, seed)
+        self.batches = 0
+
+    def append(self, values):
+        """Add one batch; returns the number of values added (NaNs are skipped)."""
+        return self.append_chunks([values])
+
+    def append_chunks(self, chunks):
+        """Add one batch that arrives in several chunks (e.g. a CSV read in blocks)."""
+        before = self.count
+        for chunk in chunks:
+            self.update(chunk)
+        added = self.count - before
+        if added:
+            self.batches += 1
+        return added
+
+    def quantiles(self, q=QUANTILES):
+        return super().quantiles(q)
+
+    def normality(self, test=AUTO):
+        """Moment-based normality test of all the data appended so far."""
+        return run_test(test, NormalitySample.from_moments(self.moments))
@@ -0,0 +1,150 @@
+"""Confidence intervals for means and proportions.
+
+All arguments broadcast against each other, so a column of samples is
+handled in one call; scalar inputs give scalar results. ``confidence`` is a
+fraction (0.95 for a 95% interval).
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from statsapp.core.critical_values import upper_critical_value
+from statsapp.lazy import lazy_attributes, lazy_module
+
+pd = lazy_module("pandas")
+beta, norm = lazy_attributes("scipy.stats", "beta", "norm")
+
+# Smaller samples use the t distribution with n - 1 degrees of freedom
+LARGE_SAMPLE = 30
+
+WALD = "Wald"
+WILSON = "Wilson"
+AGRESTI_COULL = "Agresti-Coull"
+CLOPPER_PEARSON = "Clopper-Pearson"
+PROPORTION_METHODS = [WILSON, AGRESTI_COULL, CLOPPER_PEARSON, WALD]
+
+Interval = namedtuple("Interval", ["estimate", "standard_error", "lower", "upper"])
+ProportionSummary = namedtuple(
+    "ProportionSummary", ["cohorts", "valid", "successes", "trials", "pooled", "median_width", "excluding_pooled"]
+)
+
+
+def _result(*arrays):
+    return Interval(*(array if array.ndim else float(array) for array in arrays))
+
+
+def mean_interval(mean, std_dev, size, confidence=0.95):
+    """Interval for a population mean from the sample mean, standard deviation and size."""
+    mean, std_dev, size, confidence = np.broadcast_arrays(
+        *(np.asarray(value, dtype=np.float64) for value in (mean, std_dev, size, confidence))
+    )
+    standard_error = std_dev / np.sqrt(size)
+
+    # z critical value for large samples, t (from the precomputed table) for small ones
+    q = (1 - confidence) / 2
+    critical_value = norm.isf(q)
+    small = size < LARGE_SAMPLE
+    if small.any():
+        critical_value = np.array(critical_value, dtype=np.float64)
+        critical_value[small] = upper_critical_value("t", q[small], size[small] - 1)
+
+    margin_of_error = critical_value * standard_error
+    return _result(mean, standard_error, mean - margin_of_error, mean + margin_of_error)
+
+
+def proportion_interval(successes, trials, confidence=0.95, method=WALD):
+    """Interval for a proportion: Wald, Wilson score, Agresti-Coull or exact Clopper-Pearson.
+
+    The estimate is always the observed proportion. The Wald interval
+    collapses to a single point at 0 or ``trials`` successes; the other
+    methods do not. For Clopper-Pearson, ``standard_error`` is the half-width
+    of the interval divided by the z critical value.
+    """
+    successes, trials, confidence = np.broadcast_arrays(
+        *(np.asarray(value, dtype=np.float64) for value in (successes, trials, confidence))
+    )
+    proportion = successes / trials
+    alpha = 1 - confidence
+    z = norm.isf(alpha / 2)
+
+    if method == WALD:
+        standard_error = np.sqrt(proportion * (1 - proportion) / trials)
+        center = proportion
+    elif method == WILSON:
+        shrink = 1 + z ** 2 / trials
+        center = (proportion + z ** 2 / (2 * trials)) / shrink
+        standard_error = np.sqrt(proportion * (1 - proportion) / trials + z ** 2 / (4 * trials ** 2)) / shrink
+    elif method == AGRESTI_COULL:
+        adjusted_trials = trials + z ** 2
+        center = (successes + z ** 2 / 2) / adjusted_trials
+        standard_error = np.sqrt(center * (1 - center) / adjusted_trials)
+    elif method == CLOPPER_PEARSON:
+        failures = trials - successes
+        # Beta quantiles are undefined at 0 successes or failures, where the bound is 0 or 1 exactly
+        lower = np.where(successes > 0, beta.ppf(alpha / 2, np.maximum(successes, 1), failures + 1), 0.0)
+        upper = np.where(failures > 0, beta.ppf(1 - alpha / 2, successes + 1, np.maximum(failures, 1)), 1.0)
+        return _result(proportion, (upper - lower) / (2 * z), lower, upper)
+    else:
+        raise ValueError(f"Unknown proportion interval method: {method}")
+
+    margin_of_error = z * standard_error
+    # At 0 or ``trials`` successes the bound is 0 or 1 exactly, which rounding can miss by a hair
+    lower = np.where(successes > 0, np.clip(center - margin_of_error, 0, 1), 0.0)
+    upper = np.where(successes < trials, np.clip(center + margin_of_error, 0, 1), 1.0)
+    return _result(proportion, standard_error, lower, upper)
+
+
+def batch_proportions(frame, confidence=0.95, method=WILSON):
+    """Intervals for a table of cohorts in one vectorised pass.
+
+    ``frame`` needs ``successes`` and ``trials`` columns; other columns (such
+    as a cohort name) are kept. Rows with missing, fractional, negative or
+    inconsistent counts get no interval and ``valid`` is False for them.
+    """
+    columns = {name.strip().lower(): name for name in frame.columns}
+    missing = [name for name in ("successes", "trials") if name not in columns]
+    if missing:
+        raise ValueError(f"The file needs {' and '.join(repr(name) for name in missing)} column(s).")
+
+    successes = pd.to_numeric(frame[columns["successes"]], errors="coerce").to_numpy(dtype=np.float64)
+    trials = pd.to_numeric(frame[columns["trials"]], errors="coerce").to_numpy(dtype=np.float64)
+    with np.errstate(invalid="ignore"):
+        valid = (trials > 0) & (successes >= 0) & (successes <= trials) & (successes % 1 == 0) & (trials % 1 == 0)
+
+    estimate, standard_error, lower, upper = (np.full(successes.size, np.nan) for _ in range(4))
+    if valid.any():
+        # Cohort tables repeat the same counts a lot, so each distinct pair is evaluated once
+        valid_trials = trials[valid]
+        key = successes[valid] * (valid_trials.max() + 1) + valid_trials
+        if key.max() < 2 ** 53:
+            _, first, inverse = np.unique(key, return_index=True, return_inverse=True)
+        else:
+            first, inverse = np.arange(key.size), np.arange(key.size)
+        interval = proportion_interval(successes[valid][first], valid_trials[first], confidence, method)
+        for column, values in zip((estimate, standard_error, lower, upper), interval):
+            column[valid] = values[inverse]
+
+    results = frame.drop(columns=[columns["successes"], columns["trials"]])
+    results.insert(0, "successes", successes)
+    results.insert(1, "trials", trials)
+    results["valid"] = valid
+    results["proportion"] = estimate
+    results["standard_error"] = standard_error
+    results["lower"] = lower
+    results["upper"] = upper
+    return results
+
+
+def proportion_summary(results, confidence=0.95, method=WILSON):
+    """Totals of a ``batch_proportions`` table, with the pooled proportion and its interval."""
+    valid = results["valid"].to_numpy()
+    successes = float(results["successes"].to_numpy()[valid].sum())
+    trials = float(results["trials"].to_numpy()[valid].sum())
+    pooled = proportion_interval(successes, trials, confidence, method) if trials > 0 else None
+
+    lower = results["lower"].to_numpy()[valid]
+    upper = results["upper"].to_numpy()[valid]
+    median_width = float(np.median(upper - lower)) if lower.size else float("nan")
+    # Cohorts whose interval does not cover the pooled rate
+    excluding = int(np.sum((upper < pooled.estimate) | (lower > pooled.estimate))) if pooled else 0
+    return ProportionSummary(len(results), int(valid.sum()), successes, trials, pooled, median_width, excluding)
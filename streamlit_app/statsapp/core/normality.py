@@ -0,0 +1,188 @@
+"""Battery of normality tests sharing one sorted array and one set of moments.
+
+Every test receives a ``NormalitySample``: the data is sorted once and its
+moments are accumulated once, however many tests are run on it.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from statsapp.core.streaming import MomentAccumulator
+from statsapp.lazy import lazy_attributes
+
+chi2, kstwo, norm, shapiro = lazy_attributes("scipy.stats", "chi2", "kstwo", "norm", "shapiro")
+
+# Shapiro-Wilk p-values are only reliable up to about this many points
+SHAPIRO_MAX_N = 5000
+# Anderson-Darling p-value curve for large statistics is only valid up to its minimum
+AD_FORMULA_LIMIT = 153.467
+AUTO = "Auto"
+
+TestResult = namedtuple("TestResult", ["name", "statistic", "p_value", "n_used"])
+
+
+class NormalitySample:
+    """Sorted data and moments prepared once for the whole test battery."""
+
+    def __init__(self, data=None, moments=None):
+        if data is None and moments is None:
+            raise ValueError("A normality sample needs either the data or its moments.")
+        self.sorted = None if data is None else np.sort(np.asarray(data, dtype=np.float64).ravel())
+        self.moments = moments if moments is not None else MomentAccumulator.from_array(self.sorted)
+
+    @classmethod
+    def from_moments(cls, moments):
+        """Sample for streamed data, where only the moment-based tests can run."""
+        return cls(moments=moments)
+
+    @property
+    def n(self):
+        return self.moments.count
+
+    @property
+    def has_data(self):
+        return self.sorted is not None
+
+    @property
+    def constant(self):
+        """Whether the data has no spread, so it cannot be standardised."""
+        if self.has_data:
+            return self.n == 0 or self.sorted[0] == self.sorted[-1]
+        return self.moments.constant
+
+    def subsample(self, size, seed=0):
+        """Reproducible stratified subsample of the sorted data.
+
+        The sorted array is split into ``size`` equal strata and one point is
+        drawn from each, so the subsample follows the shape of the full data
+        and comes out already sorted.
+        """
+        if size >= self.n:
+            return self.sorted
+        rng = np.random.default_rng(seed)
+        starts = np.arange(size) * self.n // size
+        stops = np.arange(1, size + 1) * self.n // size
+        offsets = (rng.random(size) * (stops - starts)).astype(np.int64)
+        return self.sorted[starts + offsets]
+
+
+def _require_data(sample, name):
+    if not sample.has_data:
+        raise ValueError(f"The {name} test needs the full data, not only its moments.")
+
+
+def _require_spread(sample, name):
+    if sample.constant:
+        raise ValueError(f"The {name} test cannot be run on constant data.")
+
+
+def shapiro_wilk(sample, max_n=SHAPIRO_MAX_N, seed=0):
+    _require_data(sample, "Shapiro-Wilk")
+    _require_spread(sample, "Shapiro-Wilk")
+    data = sample.subsample(max_n, seed=seed)
+    statistic, p_value = shapiro(data)
+    return TestResult("Shapiro-Wilk", float(statistic), float(p_value), data.size)
+
+
+def dagostino_pearson(sample):
+    # Same transformations as scipy.stats.skewtest/kurtosistest, fed from the shared moments
+    n = sample.n
+    if n < 8:
+        raise ValueError("The D'Agostino-Pearson test needs at least 8 observations.")
+    _require_spread(sample, "D'Agostino-Pearson")
+    skewness = sample.moments.skewness
+    kurtosis = sample.moments.kurtosis + 3.0
+
+    y = skewness * np.sqrt((n + 1) * (n + 3) / (6.0 * (n - 2)))
+    beta2 = 3.0 * (n * n + 27 * n - 70) * (n + 1) * (n + 3) / ((n - 2.0) * (n + 5) * (n + 7) * (n + 9))
+    w2 = -1 + np.sqrt(2 * (beta2 - 1))
+    delta = 1 / np.sqrt(0.5 * np.log(w2))
+    alpha = np.sqrt(2.0 / (w2 - 1))
+    y = y if y != 0 else 1
+    z_skew = delta * np.log(y / alpha + np.sqrt((y / alpha) ** 2 + 1))
+
+    expected = 3.0 * (n - 1) / (n + 1)
+    variance = 24.0 * n * (n - 2) * (n - 3) / ((n + 1) * (n + 1.0) * (n + 3) * (n + 5))
+    x = (kurtosis - expected) / np.sqrt(variance)
+    sqrt_beta1 = 6.0 * (n * n - 5 * n + 2) / ((n + 7) * (n + 9)) * np.sqrt(6.0 * (n + 3) * (n + 5) / (n * (n - 2) * (n - 3)))
+    a = 6.0 + 8.0 / sqrt_beta1 * (2.0 / sqrt_beta1 + np.sqrt(1 + 4.0 / sqrt_beta1 ** 2))
+    term1 = 1 - 2 / (9.0 * a)
+    denom = 1 + x * np.sqrt(2 / (a - 4.0))
+    term2 = np.sign(denom) * ((1 - 2.0 / a) / abs(denom)) ** (1 / 3.0) if denom != 0 else np.nan
+    z_kurt = (term1 - term2) / np.sqrt(2 / (9.0 * a))
+
+    statistic = z_skew ** 2 + z_kurt ** 2
+    return TestResult("D'Agostino-Pearson", float(statistic), float(chi2.sf(statistic, 2)), n)
+
+
+def jarque_bera(sample):
+    _require_spread(sample, "Jarque-Bera")
+    n = sample.n
+    statistic = n / 6.0 * (sample.moments.skewness ** 2 + sample.moments.kurtosis ** 2 / 4.0)
+    return TestResult("Jarque-Bera", float(statistic), float(chi2.sf(statistic, 2)), n)
+
+
+def anderson_darling(sample):
+    _require_data(sample, "Anderson-Darling")
+    _require_spread(sample, "Anderson-Darling")
+    n = sample.n
+    std_dev = np.sqrt(sample.moments.m2 / (n - 1))
+    w = (sample.sorted - sample.moments.mean) / std_dev
+    weights = (2 * np.arange(1, n + 1) - 1) / n
+    statistic = -n - np.sum(weights * (norm.logcdf(w) + norm.logsf(w)[::-1]))
+
+    # p-value for estimated mean and variance (D'Agostino & Stephens, 1986)
+    adjusted = statistic * (1 + 0.75 / n + 2.25 / n ** 2)
+    if adjusted >= AD_FORMULA_LIMIT:
+        # Past its minimum the fitted curve turns upwards again; the p-value is 0 to double precision
+        p_value = 0.0
+    elif adjusted >= 0.6:
+        p_value = np.exp(1.2937 - 5.709 * adjusted + 0.0186 * adjusted ** 2)
+    elif adjusted >= 0.34:
+        p_value = np.exp(0.9177 - 4.279 * adjusted - 1.38 * adjusted ** 2)
+    elif adjusted >= 0.2:
+        p_value = 1 - np.exp(-8.318 + 42.796 * adjusted - 59.938 * adjusted ** 2)
+    else:
+        p_value = 1 - np.exp(-13.436 + 101.14 * adjusted - 223.73 * adjusted ** 2)
+    return TestResult("Anderson-Darling", float(statistic), float(min(max(p_value, 0.0), 1.0)), n)
+
+
+def kolmogorov_smirnov(sample):
+    # Compared against the fitted normal, so the p-value is conservative (see Lilliefors)
+    _require_data(sample, "Kolmogorov-Smirnov")
+    _require_spread(sample, "Kolmogorov-Smirnov")
+    n = sample.n
+    cdf = norm.cdf(sample.sorted, sample.moments.mean, sample.moments.std)
+    d_plus = np.max(np.arange(1, n + 1) / n - cdf)
+    d_minus = np.max(cdf - np.arange(n) / n)
+    statistic = max(d_plus, d_minus)
+    return TestResult("Kolmogorov-Smirnov", float(statistic), float(kstwo.sf(statistic, n)), n)
+
+
+TESTS = {
+    "Shapiro-Wilk": shapiro_wilk,
+    "D'Agostino-Pearson": dagostino_pearson,
+    "Anderson-Darling": anderson_darling,
+    "Jarque-Bera": jarque_bera,
+    "Kolmogorov-Smirnov": kolmogorov_smirnov,
+}
+
+# Tests that only need the moments, so they also work on streamed data
+MOMENT_TESTS = ["D'Agostino-Pearson", "Jarque-Bera"]
+
+
+def choose_test(sample):
+    """Pick a suitable test for the sample size and what is available."""
+    if sample.has_data and sample.n <= SHAPIRO_MAX_N:
+        return "Shapiro-Wilk"
+    if sample.n >= 8:
+        return "D'Agostino-Pearson"
+    return "Jarque-Bera"
+
+
+def run_test(name, sample):
+    if name == AUTO:
+        name = choose_test(sample)
+    if name not in TESTS:
+        raise ValueError(f"Unknown normality test: {name}")
+    return TESTS[name](sample)
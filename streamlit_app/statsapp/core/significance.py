@@ -0,0 +1,186 @@
+"""Vectorised p-values, critical values and multiple-testing corrections.
+
+Every function accepts scalars or arrays, so a whole column of test
+statistics is evaluated with a single call into ``scipy.stats``.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from statsapp.core.critical_values import upper_critical_value
+from statsapp.lazy import lazy_attributes, lazy_module
+
+pd = lazy_module("pandas")
+chi2, norm, t = lazy_attributes("scipy.stats", "chi2", "norm", "t")
+
+TWO_TAILED = "Two-Tailed"
+LEFT_TAILED = "Left-Tailed"
+RIGHT_TAILED = "Right-Tailed"
+TAILS = [TWO_TAILED, LEFT_TAILED, RIGHT_TAILED]
+
+CORRECTIONS = ["None", "Benjamini-Hochberg", "Bonferroni"]
+
+_TAIL_CODES = {"two": 0, "left": 1, "right": 2}
+
+SingleTest = namedtuple("SingleTest", ["p_value", "critical_value", "rejection_areas"])
+
+
+def _tail_code(label):
+    code = _TAIL_CODES.get(str(label).strip().lower().split("-")[0])
+    if code is None:
+        raise ValueError(f"Unknown tail type: {label}")
+    return code
+
+
+def tail_codes(tails):
+    """Map tail labels ("Two-Tailed", "two", "left", ...) to 0 (two), 1 (left) or 2 (right)."""
+    # Only the distinct labels are parsed; rows are mapped through their factorized codes
+    indices, labels = pd.factorize(np.ravel(np.asarray(tails, dtype=object)))
+    # Missing labels get the sentinel -1, which must not be used as an index
+    missing = np.flatnonzero(indices < 0)
+    if missing.size:
+        raise ValueError(f"Missing tail type in row {missing[0] + 1}.")
+    codes = np.array([_tail_code(label) for label in labels], dtype=np.int8)
+    return codes[indices].reshape(np.shape(tails))
+
+
+def _sf(dist, x, df):
+    if dist == "norm":
+        return norm.sf(x)
+    if dist == "t":
+        return t.sf(x, df)
+    if dist == "chi2":
+        return chi2.sf(x, df)
+    raise ValueError(f"Unknown distribution: {dist}")
+
+
+def _isf(dist, q, df):
+    if dist == "norm":
+        return norm.isf(q)
+    # t and chi-square quantiles come from the precomputed table
+    return upper_critical_value(dist, q, df)
+
+
+def p_values(dist, statistic, df=None, tail=TWO_TAILED):
+    """p-values of test statistics under the "norm", "t" or "chi2" distribution.
+
+    The chi-square test is always right-tailed. For the symmetric distributions
+    the tail is folded into the argument, so all rows share one ``sf`` call.
+    """
+    statistic = np.asarray(statistic, dtype=np.float64)
+    if dist == "chi2":
+        return _sf(dist, statistic, df)
+
+    codes = tail_codes(tail)
+    argument = np.where(codes == 0, np.abs(statistic), np.where(codes == 1, -statistic, statistic))
+    return _sf(dist, argument, df) * np.where(codes == 0, 2.0, 1.0)
+
+
+def critical_values(dist, alpha, df=None, tail=TWO_TAILED):
+    """Critical values at significance level ``alpha``.
+
+    Two-tailed values are returned as the positive bound (reject when
+    |statistic| exceeds it); left-tailed values are negative.
+    """
+    alpha = np.asarray(alpha, dtype=np.float64)
+    if dist == "chi2":
+        return _isf(dist, alpha, df)
+
+    codes = tail_codes(tail)
+    q = np.where(codes == 0, alpha / 2, alpha)
+    return _isf(dist, q, df) * np.where(codes == 1, -1.0, 1.0)
+
+
+def rejection_areas(critical_value, tail=TWO_TAILED):
+    """Intervals of the statistic in which the null hypothesis is rejected."""
+    code = _tail_code(tail)
+    if code == 0:
+        return [(-np.inf, -critical_value), (critical_value, np.inf)]
+    if code == 1:
+        return [(-np.inf, critical_value)]
+    return [(critical_value, np.inf)]
+
+
+def single_test(dist, statistic, alpha, df=None, tail=TWO_TAILED):
+    """p-value, critical value and rejection areas of one test statistic."""
+    if dist == "chi2":
+        tail = RIGHT_TAILED
+    p_value = float(p_values(dist, statistic, df, tail))
+    critical_value = float(critical_values(dist, alpha, df, tail))
+    return SingleTest(p_value, critical_value, rejection_areas(critical_value, tail))
+
+
+def bonferroni(p_values):
+    """Bonferroni adjusted p-values; NaN rows (no test) are left out of the count and stay NaN."""
+    p_values = np.asarray(p_values, dtype=np.float64)
+    return np.minimum(p_values * np.count_nonzero(~np.isnan(p_values)), 1.0)
+
+
+def benjamini_hochberg(p_values):
+    """Benjamini-Hochberg adjusted p-values (false discovery rate); NaN rows are left out and stay NaN."""
+    p_values = np.asarray(p_values, dtype=np.float64)
+    tested = np.flatnonzero(~np.isnan(p_values))
+    m = tested.size
+    order = tested[np.argsort(p_values[tested])]
+    ranked = p_values[order] * m / np.arange(1, m + 1)
+    # Enforce monotonicity from the largest p-value downwards
+    ranked = np.minimum.accumulate(ranked[::-1])[::-1]
+    adjusted = np.full(p_values.size, np.nan)
+    adjusted[order] = np.minimum(ranked, 1.0)
+    return adjusted
+
+
+def adjust_p_values(p_values, correction):
+    if correction in (None, "None"):
+        return np.asarray(p_values, dtype=np.float64)
+    if correction == "Benjamini-Hochberg":
+        return benjamini_hochberg(p_values)
+    if correction == "Bonferroni":
+        return bonferroni(p_values)
+    raise ValueError(f"Unknown correction: {correction}")
+
+
+def batch_significance(frame, dist, alpha, default_df=None, default_tail=TWO_TAILED, correction="None"):
+    """Evaluate a table of test statistics in one vectorised pass.
+
+    ``frame`` needs a ``statistic`` column; ``df`` and ``tail`` columns are
+    optional and fall back to ``default_df`` / ``default_tail``. Rows with a
+    blank statistic get a NaN p-value, are left out of the correction and
+    are never rejected.
+    """
+    columns = {name.strip().lower(): name for name in frame.columns}
+    if "statistic" not in columns:
+        raise ValueError("The file needs a 'statistic' column.")
+
+    statistic = pd.to_numeric(frame[columns["statistic"]], errors="raise").to_numpy(dtype=np.float64)
+    n = statistic.size
+
+    df = None
+    if dist != "norm":
+        if "df" in columns:
+            df = pd.to_numeric(frame[columns["df"]], errors="raise").to_numpy(dtype=np.float64)
+        elif default_df is not None:
+            df = np.full(n, float(default_df))
+        else:
+            raise ValueError("The file needs a 'df' column for this test.")
+
+    if dist == "chi2":
+        tail = np.full(n, RIGHT_TAILED, dtype=object)
+    elif "tail" in columns:
+        # Empty tail cells use the default, like a missing column
+        tail = frame[columns["tail"]].fillna(default_tail).to_numpy()
+    else:
+        tail = np.full(n, default_tail, dtype=object)
+
+    p = p_values(dist, statistic, df, tail)
+    results = pd.DataFrame({"statistic": statistic})
+    if df is not None:
+        results["df"] = df
+    results["tail"] = tail
+    results["p_value"] = p
+    results["critical_value"] = critical_values(dist, alpha, df, tail)
+    if correction not in (None, "None"):
+        p = adjust_p_values(p, correction)
+        results["adjusted_p_value"] = p
+    results["reject"] = p < alpha
+    return results
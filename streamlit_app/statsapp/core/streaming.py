@@ -0,0 +1,171 @@
+"""Chunked CSV ingestion with one-pass moment, histogram and quantile accumulation.
+
+Large uploads are read one block of rows at a time, so peak memory depends on
+the chunk size rather than on the size of the file.
+"""
+import numpy as np
+
+from statsapp.core.sketches import DEFAULT_BINS, DEFAULT_K, HistogramSketch, QuantileSketch
+from statsapp.lazy import lazy_module
+
+pd = lazy_module("pandas")
+
+DEFAULT_CHUNK_SIZE = 100_000
+# Streamed moments of constant data keep a rounding-error variance of about this relative size
+SPREAD_TOLERANCE = 1e-12
+
+
+class MomentAccumulator:
+    """Running count, mean and central moments (up to the 4th) of a stream.
+
+    Chunks are combined with the pairwise update of Chan et al. / Pébay, which
+    stays numerically stable when merging partitions of very different sizes.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.m3 = 0.0
+        self.m4 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    @classmethod
+    def from_array(cls, values):
+        acc = cls()
+        acc.update(values)
+        return acc
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if values.size == 0:
+            return self
+
+        # Moments of the new chunk, centred on its own mean
+        other = MomentAccumulator()
+        other.count = values.size
+        other.mean = float(values.mean())
+        centred = values - other.mean
+        squared = centred * centred
+        other.m2 = float(squared.sum())
+        other.m3 = float((squared * centred).sum())
+        other.m4 = float((squared * squared).sum())
+        other.min = float(values.min())
+        other.max = float(values.max())
+        return self.merge(other)
+
+    def merge(self, other):
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.mean = other.count, other.mean
+            self.m2, self.m3, self.m4 = other.m2, other.m3, other.m4
+            self.min, self.max = other.min, other.max
+            return self
+
+        n_a, n_b = self.count, other.count
+        n = n_a + n_b
+        delta = other.mean - self.mean
+        delta_n = delta / n
+
+        m2 = self.m2 + other.m2 + delta * delta_n * n_a * n_b
+        m3 = (
+            self.m3 + other.m3
+            + delta * delta_n * delta_n * n_a * n_b * (n_a - n_b)
+            + 3 * delta_n * (n_a * other.m2 - n_b * self.m2)
+        )
+        m4 = (
+            self.m4 + other.m4
+            + delta * delta_n ** 3 * n_a * n_b * (n_a * n_a - n_a * n_b + n_b * n_b)
+            + 6 * delta_n * delta_n * (n_a * n_a * other.m2 + n_b * n_b * self.m2)
+            + 4 * delta_n * (n_a * other.m3 - n_b * self.m3)
+        )
+
+        self.count = n
+        self.mean = self.mean + delta_n * n_b
+        self.m2, self.m3, self.m4 = m2, m3, m4
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def variance(self):
+        # Population variance, matching np.var / np.std defaults
+        return self.m2 / self.count if self.count else np.nan
+
+    @property
+    def std(self):
+        return float(np.sqrt(self.variance))
+
+    @property
+    def constant(self):
+        """Whether the stream has no spread beyond rounding errors (or is empty)."""
+        return not self.std > SPREAD_TOLERANCE * abs(self.mean)
+
+    @property
+    def skewness(self):
+        if self.constant:
+            return np.nan
+        return float(np.sqrt(self.count) * self.m3 / self.m2 ** 1.5)
+
+    @property
+    def kurtosis(self):
+        # Excess (Fisher) kurtosis, matching scipy.stats.kurtosis defaults
+        if self.constant:
+            return np.nan
+        return float(self.count * self.m4 / (self.m2 * self.m2) - 3.0)
+
+
+class StreamSummary:
+    """Moments, histogram and quantile sketch of a stream, mergeable across partitions."""
+
+    def __init__(self, bins=DEFAULT_BINS, k=DEFAULT_K, seed=0):
+        self.moments = MomentAccumulator()
+        self.histogram = HistogramSketch(bins)
+        self.sketch = QuantileSketch(k, seed=seed)
+
+    @property
+    def count(self):
+        return self.moments.count
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        self.moments.update(values)
+        self.histogram.update(values)
+        self.sketch.update(values)
+        return self
+
+    def merge(self, other):
+        self.moments.merge(other.moments)
+        self.histogram.merge(other.histogram)
+        self.sketch.merge(other.sketch)
+        return self
+
+    def quantiles(self, q):
+        return self.sketch.quantiles(q)
+
+
+def summarise_csv(source, chunksize=DEFAULT_CHUNK_SIZE, bins=DEFAULT_BINS):
+    """Read the first CSV column in chunks and return (summary, preview)."""
+    summary = StreamSummary(bins)
+    preview = None
+
+    for frame in pd.read_csv(source, usecols=[0], chunksize=chunksize):
+        if preview is None:
+            preview = frame.head()
+        summary.update(frame.iloc[:, 0].to_numpy(dtype=np.float64))
+
+    return summary, preview
+
+
+def summarise_array(values, chunksize=DEFAULT_CHUNK_SIZE, bins=DEFAULT_BINS, start=0, stop=None, seed=0):
+    """Summary of ``values[start:stop]`` of an array (e.g. a memory map), read in chunks."""
+    summary = StreamSummary(bins, seed=seed)
+    stop = len(values) if stop is None else stop
+
+    for begin in range(start, stop, chunksize):
+        summary.update(np.asarray(values[begin:min(begin + chunksize, stop)], dtype=np.float64))
+
+    return summary
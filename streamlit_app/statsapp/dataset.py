@@ -0,0 +1,136 @@
+"""Compact binary dataset format shared by the Generator and Checker pages.
+
+A ``.sds`` file is a small JSON header followed by raw little-endian float64
+values, so the Checker can map the values straight into an array without
+parsing any text::
+
+    8 bytes   magic  b"STATSDS\\0"
+    4 bytes   header length H (little-endian uint32)
+    H bytes   JSON header {"version", "dtype", "count", "params"}, padded with
+              spaces so the values start on a 64-byte boundary
+    ...       count * 8 bytes of float64 values
+
+``params`` records how the data was generated (mean, standard deviation,
+seed, ...). Plain ``.npy`` files are read the same way, without parameters.
+"""
+import io
+import json
+import struct
+from collections import namedtuple
+from pathlib import Path
+
+import numpy as np
+
+from statsapp.core.streaming import DEFAULT_CHUNK_SIZE, summarise_array
+from statsapp.parallel import run_parallel, spawn_seeds, split_range
+
+MAGIC = b"STATSDS\x00"
+VERSION = 1
+ALIGNMENT = 64
+DTYPE = np.dtype("<f8")
+EXTENSION = ".sds"
+BINARY_EXTENSIONS = (EXTENSION, ".npy")
+# Datasets are summarised in this many partitions, whatever the number of workers
+SUMMARY_PARTITIONS = 16
+
+_PREFIX = len(MAGIC) + 4
+# Headers are read from a copy of at most this many leading bytes of an upload
+_HEADER_LIMIT = 65536
+
+Dataset = namedtuple("Dataset", ["values", "params"])
+
+
+def is_binary(name):
+    return Path(str(name)).suffix.lower() in BINARY_EXTENSIONS
+
+
+def write_header(handle, count, params=None):
+    """Write the header for ``count`` values and return the offset of the data."""
+    header = json.dumps({"version": VERSION, "dtype": DTYPE.str, "count": int(count), "params": params or {}})
+    header = header.encode("utf-8")
+    # Pad so the float64 values are aligned for memory mapping
+    padded_length = -(-(_PREFIX + len(header)) // ALIGNMENT) * ALIGNMENT - _PREFIX
+    header = header.ljust(padded_length, b" ")
+    handle.write(MAGIC + struct.pack("<I", len(header)) + header)
+    return _PREFIX + len(header)
+
+
+def read_header(handle):
+    """Read the header from an open binary file and return (header, data offset)."""
+    prefix = handle.read(_PREFIX)
+    if len(prefix) < _PREFIX or prefix[:len(MAGIC)] != MAGIC:
+        raise ValueError("This is not a StatsApp dataset (.sds) file.")
+    (length,) = struct.unpack("<I", prefix[len(MAGIC):])
+    header = json.loads(handle.read(length).decode("utf-8"))
+    if header.get("version") != VERSION or np.dtype(header.get("dtype")) != DTYPE:
+        raise ValueError("Unsupported StatsApp dataset version or data type.")
+    return header, _PREFIX + length
+
+
+def _read_npy_header(handle):
+    version = np.lib.format.read_magic(handle)
+    if version == (1, 0):
+        shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(handle)
+    else:
+        shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(handle)
+    if len(shape) != 1 or dtype.kind not in "fiu":
+        raise ValueError("The .npy file must contain a one-dimensional numerical array.")
+    return shape[0], dtype, handle.tell()
+
+
+def open_dataset(source, name=None):
+    """Read-only float array over a ``.sds`` or ``.npy`` dataset, without copying.
+
+    ``source`` is a file path (opened with ``np.memmap``) or an in-memory
+    upload such as Streamlit's ``UploadedFile`` (wrapped with
+    ``np.frombuffer``).
+    """
+    name = name or getattr(source, "name", None) or str(source)
+    is_npy = Path(name).suffix.lower() == ".npy"
+
+    if hasattr(source, "getbuffer"):
+        buffer = source.getbuffer()
+        handle = io.BytesIO(bytes(buffer[:_HEADER_LIMIT]))
+        if is_npy:
+            count, dtype, offset = _read_npy_header(handle)
+            params = {}
+        else:
+            header, offset = read_header(handle)
+            count, dtype, params = header["count"], DTYPE, header["params"]
+        values = np.frombuffer(buffer, dtype=dtype, count=count, offset=offset)
+        values.flags.writeable = False
+        return Dataset(values, params)
+
+    with open(source, "rb") as handle:
+        if is_npy:
+            count, dtype, offset = _read_npy_header(handle)
+            params = {}
+        else:
+            header, offset = read_header(handle)
+            count, dtype, params = header["count"], DTYPE, header["params"]
+    if count == 0:
+        return Dataset(np.empty(0, dtype=dtype), params)
+    return Dataset(np.memmap(source, dtype=dtype, mode="r", offset=offset, shape=(count,)), params)
+
+
+def _summarise_partition(path, start, stop, seed_sequence, chunksize):
+    # Runs in a worker process: map the file and summarise values[start:stop]
+    return summarise_array(open_dataset(path).values, chunksize, start=start, stop=stop, seed=seed_sequence)
+
+
+def summarise_dataset(path, workers=1, chunksize=DEFAULT_CHUNK_SIZE, partitions=SUMMARY_PARTITIONS):
+    """``StreamSummary`` of a dataset file, built from partitions summarised in parallel and merged.
+
+    The partitions and the random streams of their quantile sketches are
+    fixed, so the result does not depend on ``workers``.
+    """
+    count = len(open_dataset(path).values)
+    tasks = [
+        (str(path), start, stop, seed_sequence, chunksize)
+        for (start, stop), seed_sequence in zip(split_range(count, partitions), spawn_seeds(0, partitions))
+    ]
+    summaries = run_parallel(_summarise_partition, tasks, workers)
+    summary = summaries[0]
+    for partial in summaries[1:]:
+        summary.merge(partial)
+    return summary
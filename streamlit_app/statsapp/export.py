@@ -0,0 +1,19 @@
+"""Serialisation of result tables for download buttons."""
+import io
+
+
+def to_csv_bytes(frame, header=True):
+    """CSV bytes of a DataFrame, using pyarrow's multi-threaded writer when it is installed."""
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+    except ImportError:
+        return frame.to_csv(index=False, header=header).encode("utf-8")
+
+    buffer = io.BytesIO()
+    pa_csv.write_csv(
+        pa.Table.from_pandas(frame, preserve_index=False),
+        buffer,
+        write_options=pa_csv.WriteOptions(include_header=header),
+    )
+    return buffer.getvalue()
@@ -0,0 +1,236 @@
+"""Chunked, seeded generation of normally distributed datasets.
+
+Values are drawn from a ``numpy.random.Generator`` one chunk at a time and
+written straight to disk, so datasets far larger than memory can be produced.
+Values are drawn in blocks of ``STREAM_BLOCK``, each from its own child of
+``SeedSequence(seed)``, so for a given seed the output is bit-for-bit the
+same whatever the chunk size, the file format or the number of workers.
+"""
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from statsapp import dataset
+from statsapp.export import to_csv_bytes
+from statsapp.lazy import lazy_module
+from statsapp.parallel import run_parallel, spawn_seeds, split_range
+from statsapp.core.streaming import MomentAccumulator
+
+pd = lazy_module("pandas")
+
+DEFAULT_CHUNK_SIZE = 1_000_000
+# Values drawn from each child stream; changing it changes the data of every seed
+STREAM_BLOCK = 1_000_000
+PREVIEW_ROWS = 5000
+COLUMN_NAME = "Values"
+
+FORMATS = {
+    "CSV": (".csv", "text/csv"),
+    "Parquet": (".parquet", "application/octet-stream"),
+    "NumPy (.npy)": (".npy", "application/octet-stream"),
+    "StatsApp binary (.sds)": (dataset.EXTENSION, "application/octet-stream"),
+}
+# Fixed-width binary formats that several processes can fill in place
+PARALLEL_FORMATS = ["NumPy (.npy)", "StatsApp binary (.sds)"]
+
+OUTPUT_DIR = Path(os.environ.get("STATSAPP_OUTPUT_DIR", Path(tempfile.gettempdir()) / "statsapp"))
+OUTPUT_PREFIX = "normal_distribution_"
+# Generated datasets are shared by all sessions; older ones are deleted when a new one is written
+OUTPUT_TTL_HOURS = float(os.environ.get("STATSAPP_OUTPUT_TTL_HOURS", 24))
+
+
+def new_seed():
+    """Fresh random seed, shown to the user so the dataset can be reproduced."""
+    return int(np.random.SeedSequence().entropy % 2 ** 32)
+
+
+def _block_count(size):
+    return -(-int(size) // STREAM_BLOCK)
+
+
+def _stream_chunks(mean, std_dev, start, stop, seeds, chunk_size):
+    """Values ``start:stop`` (``start`` on a block boundary), block by block from ``seeds``."""
+    for index, seed_sequence in enumerate(seeds):
+        begin = start + index * STREAM_BLOCK
+        end = min(begin + STREAM_BLOCK, stop)
+        rng = np.random.default_rng(seed_sequence)
+        for position in range(begin, end, chunk_size):
+            yield rng.normal(loc=mean, scale=std_dev, size=min(chunk_size, end - position))
+
+
+def generate_chunks(mean, std_dev, size, seed=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield ``size`` normal values in arrays of at most ``chunk_size``."""
+    seeds = spawn_seeds(seed, _block_count(size))
+    yield from _stream_chunks(mean, std_dev, 0, int(size), seeds, chunk_size)
+
+
+def _write_csv(chunks, handle):
+    header = True
+    for chunk in chunks:
+        handle.write(to_csv_bytes(pd.DataFrame({COLUMN_NAME: chunk}), header=header))
+        header = False
+        yield chunk
+
+
+def _write_npy(chunks, handle, size):
+    # The header only needs the final shape, which is known up front
+    np.lib.format.write_array_header_1_0(
+        handle, {"descr": np.lib.format.dtype_to_descr(np.dtype(np.float64)), "fortran_order": False, "shape": (int(size),)}
+    )
+    for chunk in chunks:
+        chunk.tofile(handle)
+        yield chunk
+
+
+def _write_binary(chunks, handle, size, params):
+    dataset.write_header(handle, size, params)
+    for chunk in chunks:
+        chunk.astype(dataset.DTYPE, copy=False).tofile(handle)
+        yield chunk
+
+
+def _write_parquet(chunks, handle):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Writing Parquet files requires the pyarrow package.")
+
+    schema = pa.schema([(COLUMN_NAME, pa.float64())])
+    with pq.ParquetWriter(handle, schema) as writer:
+        # One row group per chunk
+        for chunk in chunks:
+            writer.write_table(pa.table({COLUMN_NAME: chunk}, schema=schema))
+            yield chunk
+
+
+def generation_params(mean, std_dev, size, seed, workers=1):
+    """Parameters recorded in the header of a .sds dataset."""
+    return {
+        "distribution": "normal",
+        "mean": float(mean),
+        "std_dev": float(std_dev),
+        "size": int(size),
+        "seed": None if seed is None else int(seed),
+        "workers": int(workers),
+    }
+
+
+def write_dataset(path, file_format, mean, std_dev, size, seed=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Generate a dataset chunk by chunk into ``path``.
+
+    Returns the first ``PREVIEW_ROWS`` values and the moments of the full
+    dataset, both gathered while the chunks are written.
+    """
+    chunks = generate_chunks(mean, std_dev, size, seed=seed, chunk_size=chunk_size)
+    moments = MomentAccumulator()
+    preview = None
+
+    with open(path, "wb") as handle:
+        if file_format == "CSV":
+            written = _write_csv(chunks, handle)
+        elif file_format == "Parquet":
+            written = _write_parquet(chunks, handle)
+        elif file_format == "NumPy (.npy)":
+            written = _write_npy(chunks, handle, size)
+        elif file_format == "StatsApp binary (.sds)":
+            written = _write_binary(chunks, handle, size, generation_params(mean, std_dev, size, seed))
+        else:
+            raise ValueError(f"Unknown file format: {file_format}")
+
+        for chunk in written:
+            if preview is None:
+                preview = chunk[:PREVIEW_ROWS].copy()
+            moments.update(chunk)
+
+    return preview, moments
+
+
+def _fill_slice(path, offset, size, start, stop, seeds, mean, std_dev, chunk_size):
+    # Runs in a worker process: fill data[start:stop] of the shared file from the streams of its blocks
+    data = np.memmap(path, dtype=dataset.DTYPE, mode="r+", offset=offset, shape=(size,))
+    moments = MomentAccumulator()
+    begin = start
+    for chunk in _stream_chunks(mean, std_dev, start, stop, seeds, chunk_size):
+        data[begin:begin + chunk.size] = chunk
+        begin += chunk.size
+        moments.update(chunk)
+    data.flush()
+    del data
+    return moments
+
+
+def write_dataset_parallel(path, file_format, mean, std_dev, size, seed, workers, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Generate a .npy or .sds dataset with ``workers`` processes writing disjoint slices.
+
+    Each worker fills a contiguous run of whole blocks, so the file holds the
+    same values as ``write_dataset`` with the same seed, whatever ``workers`` is.
+    """
+    if file_format not in PARALLEL_FORMATS:
+        raise ValueError(f"{file_format} files cannot be generated in parallel.")
+    size = int(size)
+
+    # Write the header and size the file; the workers map the data afterwards
+    with open(path, "wb") as handle:
+        if file_format == "NumPy (.npy)":
+            np.lib.format.write_array_header_1_0(
+                handle, {"descr": dataset.DTYPE.str, "fortran_order": False, "shape": (size,)}
+            )
+            offset = handle.tell()
+        else:
+            offset = dataset.write_header(handle, size, generation_params(mean, std_dev, size, seed, workers))
+        handle.truncate(offset + size * dataset.DTYPE.itemsize)
+
+    seeds = spawn_seeds(seed, _block_count(size))
+    tasks = [
+        (str(path), offset, size, first * STREAM_BLOCK, min(last * STREAM_BLOCK, size), seeds[first:last], mean, std_dev, chunk_size)
+        for first, last in split_range(len(seeds), workers)
+        if last > first
+    ]
+    moments = MomentAccumulator()
+    for partial in run_parallel(_fill_slice, tasks, workers):
+        moments.merge(partial)
+
+    preview = np.array(dataset.open_dataset(path).values[:PREVIEW_ROWS])
+    return preview, moments
+
+
+def resolve_output_file(name):
+    """Path of a dataset saved in the output directory, refusing paths outside it."""
+    root = OUTPUT_DIR.resolve()
+    path = (root / name).resolve()
+    if root not in path.parents or not path.is_file():
+        raise FileNotFoundError(f"No dataset named {name} was found in the output directory.")
+    return path
+
+
+def sweep_output_dir(ttl_hours=OUTPUT_TTL_HOURS, now=None):
+    """Delete generated datasets not modified for ``ttl_hours``; returns how many were deleted.
+
+    Sessions that are closed or abandoned never delete their own files, so
+    without this the output directory would grow until the disk is full.
+    """
+    now = time.time() if now is None else now
+    deleted = 0
+    for path in OUTPUT_DIR.glob(f"{OUTPUT_PREFIX}*"):
+        try:
+            if now - path.stat().st_mtime > ttl_hours * 3600:
+                path.unlink()
+                deleted += 1
+        except OSError:
+            # Deleted meanwhile by another session
+            continue
+    return deleted
+
+
+def output_path(file_format):
+    """New file in the output directory for a generated dataset, after sweeping out expired ones."""
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    sweep_output_dir()
+    extension = FORMATS[file_format][0]
+    handle, path = tempfile.mkstemp(prefix=OUTPUT_PREFIX, suffix=extension, dir=OUTPUT_DIR)
+    os.close(handle)
+    return Path(path)
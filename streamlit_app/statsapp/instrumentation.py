@@ -0,0 +1,344 @@
+"""Opt-in timing and memory profile of each page run.
+
+Profiling is enabled for every session by setting ``STATSAPP_PROFILE=1``, or
+for one browser tab by opening a page with ``?profile=1``. A page calls
+``start_run`` at the top and ``finish_run`` at the end, wraps its work in
+``with stage("name"):`` blocks, and ends early with ``stop()`` instead of
+``st.stop()`` so that the run is still finished and shown. When profiling is
+off, ``stage`` is a no-op.
+
+Each run records the wall time of every stage, the peak memory traced by
+``tracemalloc`` while it ran, and the number of figures sent to the browser.
+The time not covered by any stage is reported as Streamlit overhead (widgets,
+rerun and rendering). ``finish_run`` shows the breakdown in a collapsible
+panel, and can also export it for monitoring:
+
+- ``STATSAPP_PROFILE_LOG``: a file each run is appended to as one JSON line;
+- ``STATSAPP_PROFILE_METRICS``: a Prometheus text file with the totals of the
+  process, rewritten after each run (e.g. for the node exporter's textfile
+  collector).
+
+Runs are tracked per Streamlit session. ``tracemalloc`` slows allocations
+down, so the timings of a profiled run are somewhat pessimistic. It is only
+started (and stopped again) by this module if nothing else is tracing.
+Its peak is process-wide, so it is only reset and reported for a run that
+has the tracer to itself: a run that overlaps another profiled run, or that
+runs while someone else is tracing, reports its peak memory as unavailable.
+"""
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+from pathlib import Path
+
+ENV_FLAG = "STATSAPP_PROFILE"
+QUERY_FLAG = "profile"
+LOG_PATH = os.environ.get("STATSAPP_PROFILE_LOG")
+METRICS_PATH = os.environ.get("STATSAPP_PROFILE_METRICS")
+OVERHEAD_STAGE = "(Streamlit overhead)"
+# A run left unfinished for this long (its session ended in an exception and closed) stops counting as in progress
+STALE_RUN_SECONDS = 3600
+
+_TRUE = {"1", "true", "yes", "on"}
+
+# Profile of the run in progress, per session (or per thread outside of Streamlit)
+_runs_lock = threading.Lock()
+_runs = {}
+
+# Process-wide totals for the Prometheus export
+_totals_lock = threading.Lock()
+_stage_totals = defaultdict(lambda: [0.0, 0])
+_run_totals = defaultdict(lambda: [0.0, 0, 0])
+
+# tracemalloc runs while at least one profiled run is in progress, if this module started it
+_tracing_lock = threading.Lock()
+_tracing_profiles = set()
+_owns_tracing = False
+
+
+def _begin_tracing(profile):
+    global _owns_tracing
+    with _tracing_lock:
+        now = time.monotonic()
+        _tracing_profiles.difference_update([other for other in _tracing_profiles if now - other.began > STALE_RUN_SECONDS])
+        if not _tracing_profiles and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _owns_tracing = True
+        # The peak is process-wide: it only belongs to a run that has the tracer to itself
+        profile.exclusive = _owns_tracing and not _tracing_profiles
+        for other in _tracing_profiles:
+            other.exclusive = False
+        _tracing_profiles.add(profile)
+        if profile.exclusive:
+            tracemalloc.reset_peak()
+
+
+def _end_tracing(profile):
+    global _owns_tracing
+    with _tracing_lock:
+        _tracing_profiles.discard(profile)
+        if not _tracing_profiles and _owns_tracing:
+            tracemalloc.stop()
+            _owns_tracing = False
+
+
+def _traced_peak(profile, reset=False):
+    # Peak since the last reset, or None if the run shares the tracer
+    with _tracing_lock:
+        if not profile.exclusive:
+            return None
+        peak = tracemalloc.get_traced_memory()[1]
+        if reset:
+            tracemalloc.reset_peak()
+        return peak
+
+
+class RunProfile:
+    """Stages, peak memory and figure count of one run of a page."""
+
+    def __init__(self, page, clock=time.perf_counter):
+        self.page = page
+        self.clock = clock
+        self.started = clock()
+        self.began = time.monotonic()
+        self.stages = []
+        self.figures = 0
+        self.duration = None
+        self.peak_bytes = None
+        self.exclusive = False
+        self._stack = []
+        self._peak = 0
+        _begin_tracing(self)
+
+    def _fold_peak(self, reset=False):
+        # Carry the peak since the last reset into the run and every open stage
+        peak = _traced_peak(self, reset)
+        if peak is not None:
+            self._peak = max(self._peak, peak)
+            for entry, _ in self._stack:
+                entry["peak_bytes"] = max(entry["peak_bytes"], peak)
+
+    @contextmanager
+    def stage(self, name):
+        self._fold_peak(reset=True)
+        entry = {"stage": name, "depth": len(self._stack), "seconds": 0.0, "peak_bytes": 0}
+        start = self.clock()
+        self._stack.append((entry, start))
+        self.stages.append(entry)
+        try:
+            yield entry
+        finally:
+            if self.duration is None:
+                entry["seconds"] = self.clock() - start
+                self._fold_peak()
+                self._stack.pop()
+
+    def finish(self):
+        if self.duration is not None:
+            return self
+        now = self.clock()
+        self.duration = now - self.started
+        self._fold_peak()
+        # Stages still open when the run stops early end with it
+        for entry, start in self._stack:
+            entry["seconds"] = now - start
+        self._stack = []
+        _end_tracing(self)
+        if self.exclusive:
+            self.peak_bytes = self._peak
+        else:
+            for entry in self.stages:
+                entry["peak_bytes"] = None
+        return self
+
+    @property
+    def overhead(self):
+        covered = sum(entry["seconds"] for entry in self.stages if entry["depth"] == 0)
+        return max(self.duration - covered, 0.0)
+
+    def record(self):
+        """The run as a JSON-serialisable dict."""
+        return {
+            "time": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "page": self.page,
+            "seconds": self.duration,
+            "overhead_seconds": self.overhead,
+            "peak_bytes": self.peak_bytes,
+            "figures": self.figures,
+            "stages": self.stages,
+        }
+
+
+def _query_params():
+    import streamlit as st
+
+    if hasattr(st, "experimental_get_query_params"):
+        return st.experimental_get_query_params()
+    return {key: st.query_params.get_all(key) for key in st.query_params}
+
+
+def enabled():
+    if os.environ.get(ENV_FLAG, "").strip().lower() in _TRUE:
+        return True
+    try:
+        values = _query_params().get(QUERY_FLAG, [])
+    except Exception:
+        return False
+    return any(value.strip().lower() in _TRUE for value in values)
+
+
+def _session_key():
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx is not None else threading.get_ident()
+
+
+def start_run(page):
+    """Start profiling this run of ``page`` if profiling is enabled."""
+    key = _session_key()
+    with _runs_lock:
+        previous = _runs.pop(key, None)
+    if previous is not None:
+        # The previous run of this session ended in an exception and was never finished
+        previous.finish()
+    profile = RunProfile(page) if enabled() else None
+    if profile is not None:
+        with _runs_lock:
+            _runs[key] = profile
+    return profile
+
+
+def current_run():
+    with _runs_lock:
+        return _runs.get(_session_key())
+
+
+def stage(name):
+    """Context manager timing a named stage of the current run (no-op when not profiling)."""
+    profile = current_run()
+    return profile.stage(name) if profile is not None else nullcontext()
+
+
+def record_figure():
+    profile = current_run()
+    if profile is not None:
+        profile.figures += 1
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text(stage_totals, run_totals):
+    """Prometheus text exposition of per-page run and per-stage time totals."""
+    lines = [
+        "# HELP statsapp_run_seconds Wall time of page runs.",
+        "# TYPE statsapp_run_seconds summary",
+    ]
+    for page, (seconds, count, _) in sorted(run_totals.items()):
+        lines.append(f'statsapp_run_seconds_sum{{page="{_label(page)}"}} {seconds:.6f}')
+        lines.append(f'statsapp_run_seconds_count{{page="{_label(page)}"}} {count}')
+    lines += [
+        "# HELP statsapp_stage_seconds Wall time of named stages within page runs.",
+        "# TYPE statsapp_stage_seconds summary",
+    ]
+    for (page, name), (seconds, count) in sorted(stage_totals.items()):
+        labels = f'page="{_label(page)}",stage="{_label(name)}"'
+        lines.append(f"statsapp_stage_seconds_sum{{{labels}}} {seconds:.6f}")
+        lines.append(f"statsapp_stage_seconds_count{{{labels}}} {count}")
+    lines += [
+        "# HELP statsapp_figures_total Figures sent to the browser.",
+        "# TYPE statsapp_figures_total counter",
+    ]
+    for page, (_, _, figures) in sorted(run_totals.items()):
+        lines.append(f'statsapp_figures_total{{page="{_label(page)}"}} {figures}')
+    return "\n".join(lines) + "\n"
+
+
+def _accumulate(profile, stage_totals, run_totals):
+    stages = [(entry["stage"], entry["seconds"]) for entry in profile.stages] + [(OVERHEAD_STAGE, profile.overhead)]
+    for name, seconds in stages:
+        totals = stage_totals[(profile.page, name)]
+        totals[0] += seconds
+        totals[1] += 1
+    run = run_totals[profile.page]
+    run[0] += profile.duration
+    run[1] += 1
+    run[2] += profile.figures
+
+
+def run_prometheus_text(profile):
+    """Prometheus text of a single run."""
+    stage_totals, run_totals = defaultdict(lambda: [0.0, 0]), defaultdict(lambda: [0.0, 0, 0])
+    _accumulate(profile, stage_totals, run_totals)
+    return prometheus_text(stage_totals, run_totals)
+
+
+def _export(profile, record):
+    with _totals_lock:
+        _accumulate(profile, _stage_totals, _run_totals)
+        metrics = prometheus_text(_stage_totals, _run_totals)
+
+        if LOG_PATH:
+            with open(LOG_PATH, "a", encoding="utf-8") as handle:
+                handle.write(json.dumps(record) + "\n")
+        if METRICS_PATH:
+            # Replace the file atomically so a scraper never reads half of it
+            temporary = Path(f"{METRICS_PATH}.tmp")
+            temporary.write_text(metrics, encoding="utf-8")
+            os.replace(temporary, METRICS_PATH)
+
+
+def finish_run():
+    """Finish the current run: export it and show the breakdown panel."""
+    with _runs_lock:
+        profile = _runs.pop(_session_key(), None)
+    if profile is None:
+        return None
+    profile.finish()
+    record = profile.record()
+    _export(profile, record)
+    show_profile(profile, record)
+    return profile
+
+
+def stop():
+    """``st.stop()`` for a profiled page: the run is finished and shown before the script stops."""
+    import streamlit as st
+
+    try:
+        finish_run()
+    finally:
+        st.stop()
+
+
+def _mib(value):
+    return None if value is None else value / 2 ** 20
+
+
+def show_profile(profile, record):
+    import pandas as pd
+    import streamlit as st
+
+    memory = "unavailable (shared with another run)" if profile.peak_bytes is None else f"{_mib(profile.peak_bytes):.1f} MiB"
+    with st.expander(f"Run profile: {profile.duration * 1000:.1f} ms, peak memory {memory}"):
+        rows = [
+            {
+                "Stage": ("  " * (entry["depth"] - 1) + "↳ " if entry["depth"] else "") + entry["stage"],
+                "Time (ms)": entry["seconds"] * 1000,
+                "Peak memory (MiB)": _mib(entry["peak_bytes"]),
+            }
+            for entry in profile.stages
+        ]
+        rows.append({"Stage": OVERHEAD_STAGE, "Time (ms)": profile.overhead * 1000, "Peak memory (MiB)": None})
+        st.dataframe(pd.DataFrame(rows), hide_index=True)
+        st.caption(f"Figures sent to the browser: {profile.figures}")
+
+        json_column, metrics_column = st.columns(2)
+        json_column.download_button("Download JSON line", json.dumps(record) + "\n", file_name="profile.jsonl", mime="application/json")
+        metrics_column.download_button("Download Prometheus text", run_prometheus_text(profile), file_name="profile.prom", mime="text/plain")
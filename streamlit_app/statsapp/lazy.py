@@ -0,0 +1,56 @@
+"""Deferred imports of the heavy libraries.
+
+Importing pandas, ``scipy.stats`` and ``matplotlib.pyplot`` takes most of a
+page's cold start (about two seconds together), while a page's first run
+usually needs none of them: the work starts when a button is pressed. Modules
+bind these names with
+
+    pd = lazy_module("pandas")
+    norm, t = lazy_attributes("scipy.stats", "norm", "t")
+
+and use them as before. The stand-ins import the real object on first use
+and then forward every attribute access and call to it. Python's import lock
+makes the first use safe from several threads.
+"""
+import importlib
+
+
+class LazyObject:
+    """Stand-in for ``module`` (or ``module.attribute``), imported on first use."""
+
+    __slots__ = ("_module", "_attribute", "_target")
+
+    def __init__(self, module, attribute=None):
+        self._module = module
+        self._attribute = attribute
+        self._target = None
+
+    def _resolve(self):
+        if self._target is None:
+            target = importlib.import_module(self._module)
+            self._target = target if self._attribute is None else getattr(target, self._attribute)
+        return self._target
+
+    @property
+    def loaded(self):
+        return self._target is not None
+
+    def __getattr__(self, name):
+        return getattr(self._resolve(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self._resolve()(*args, **kwargs)
+
+    def __repr__(self):
+        name = self._module if self._attribute is None else f"{self._module}.{self._attribute}"
+        return f"<lazy {name}{'' if self.loaded else ' (not imported yet)'}>"
+
+
+def lazy_module(name):
+    return LazyObject(name)
+
+
+def lazy_attributes(module, *names):
+    """One stand-in per attribute of ``module``, e.g. the distributions of ``scipy.stats``."""
+    stand_ins = tuple(LazyObject(module, name) for name in names)
+    return stand_ins[0] if len(stand_ins) == 1 else stand_ins
@@ -0,0 +1,60 @@
+"""Process-pool helpers with deterministic per-block random streams.
+
+Work is split into a fixed number of blocks, and every block gets its own
+child of ``np.random.SeedSequence(seed)``. Results therefore depend only on
+the seed and the number of blocks, never on scheduling order.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+
+# "spawn" avoids forking the multi-threaded Streamlit server process
+START_METHOD = os.environ.get("STATSAPP_START_METHOD", "spawn")
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+def spawn_seeds(seed, count):
+    """Independent child seed sequences for ``count`` blocks."""
+    return np.random.SeedSequence(seed).spawn(count)
+
+
+def split_range(size, parts):
+    """Split ``range(size)`` into ``parts`` contiguous (start, stop) slices of near-equal length."""
+    bounds = np.linspace(0, size, parts + 1).astype(np.int64)
+    return list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+
+
+@contextmanager
+def process_pool(workers, initializer=None, initargs=()):
+    """Pool to reuse across several ``run_parallel`` calls, or None when ``workers <= 1``.
+
+    ``initializer(*initargs)`` runs once in every worker, e.g. to hand large
+    read-only inputs to the workers once instead of with every task.
+    """
+    if workers <= 1:
+        yield None
+        return
+    context = multiprocessing.get_context(START_METHOD)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=initializer, initargs=initargs) as pool:
+        yield pool
+
+
+def run_parallel(function, tasks, workers, pool=None):
+    """Call ``function(*task)`` for every task, in a process pool when ``workers > 1``.
+
+    An open ``pool`` from ``process_pool`` is used when given. Results come back
+    in the order of ``tasks``.
+    """
+    if pool is not None:
+        return list(pool.map(function, *zip(*tasks)))
+    if workers <= 1 or len(tasks) <= 1:
+        return [function(*task) for task in tasks]
+    context = multiprocessing.get_context(START_METHOD)
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), mp_context=context) as pool:
+        return list(pool.map(function, *zip(*tasks)))
@@ -0,0 +1,152 @@
+"""Bulk parsing of numbers pasted into a text area.
+
+Commas, semicolons, whitespace and newlines all separate values. The text is
+turned into one value per line with a single ``str.translate`` and handed to
+a compiled CSV reader (pyarrow when it is installed, otherwise pandas' C
+engine), so no Python-level loop runs over the values. Only when that fails
+is the text read again as strings to find and report the malformed tokens.
+Infinite values ("inf", or numbers such as 1e999 that overflow) are not
+data either and are reported the same way.
+
+``parse_proportions`` reads the short ``category=proportion`` lists of the
+chi-square goodness-of-fit test.
+"""
+import csv
+import io
+from collections import namedtuple
+
+import numpy as np
+
+from statsapp.lazy import lazy_module
+
+pd = lazy_module("pandas")
+
+SEPARATORS = ",; \t\r\n"
+# Tokens that stand for a missing value and are skipped rather than reported
+MISSING_TOKENS = ["nan", "NaN", "NAN", "NA", "null", "NULL"]
+# Finite numbers in the syntax of pyarrow's float conversion (which also reads "inf")
+NUMBER_PATTERN = r"^[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?$"
+# Read the whole text as one CSV block: splitting it only adds overhead on the one column
+MAX_BLOCK_BYTES = 1 << 30
+
+_TO_NEWLINE = str.maketrans({separator: "\n" for separator in SEPARATORS})
+_SEPARATOR_BYTES = np.frombuffer(SEPARATORS.encode("ascii"), dtype=np.uint8)
+
+ParsedNumbers = namedtuple("ParsedNumbers", ["values", "errors"])
+# position is the 1-based index of the token among all tokens; line and column are 1-based
+ParseError = namedtuple("ParseError", ["position", "line", "column", "token"])
+
+
+def _convert_pandas(lines):
+    try:
+        column = pd.read_csv(
+            io.StringIO(lines),
+            header=None,
+            dtype=np.float64,
+            engine="c",
+            float_precision="round_trip",
+            quoting=csv.QUOTE_NONE,
+            na_values=MISSING_TOKENS,
+            keep_default_na=False,
+        ).iloc[:, 0]
+        return column.to_numpy(dtype=np.float64, na_value=np.nan), np.empty(0, dtype=np.intp)
+    except ValueError:
+        pass
+
+    tokens = pd.Series(lines.split("\n"), dtype=object)
+    tokens = tokens[tokens != ""].reset_index(drop=True)
+    numbers = pd.to_numeric(tokens, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    bad = np.flatnonzero(np.isnan(numbers) & ~tokens.isin(MISSING_TOKENS).to_numpy())
+    return numbers, bad
+
+
+def _convert(lines):
+    """Numbers from one token per line (NaN where missing or malformed) and the indices of malformed tokens."""
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pa_compute
+        import pyarrow.csv as pa_csv
+    except ImportError:
+        return _convert_pandas(lines)
+
+    encoded = lines.encode("utf-8")
+
+    def read(column_type):
+        return pa_csv.read_csv(
+            pa.BufferReader(encoded),
+            read_options=pa_csv.ReadOptions(
+                column_names=["value"], block_size=max(1 << 20, min(len(encoded) + 1, MAX_BLOCK_BYTES))
+            ),
+            parse_options=pa_csv.ParseOptions(quote_char=False),
+            convert_options=pa_csv.ConvertOptions(
+                column_types={"value": column_type}, null_values=MISSING_TOKENS, strings_can_be_null=True
+            ),
+        ).column(0)
+
+    try:
+        return read(pa.float64()).to_numpy(zero_copy_only=False), np.empty(0, dtype=np.intp)
+    except pa.ArrowInvalid:
+        pass
+
+    # Slow path: validate the tokens as strings and convert only the valid ones
+    tokens = read(pa.string())
+    valid = pa_compute.fill_null(pa_compute.match_substring_regex(tokens, NUMBER_PATTERN), False)
+    numbers = np.full(len(tokens), np.nan)
+    mask = valid.to_numpy(zero_copy_only=False)
+    numbers[mask] = pa_compute.cast(pa_compute.filter(tokens, valid), pa.float64()).to_numpy(zero_copy_only=False)
+    bad = np.flatnonzero(~mask & ~tokens.is_null().to_numpy(zero_copy_only=False))
+    return numbers, bad
+
+
+def _locate(text, bad):
+    """ParseError for each malformed token, located from the token boundaries in the raw text."""
+    encoded = text.encode("utf-8")
+    raw = np.frombuffer(encoded, dtype=np.uint8)
+    separator = np.isin(raw, _SEPARATOR_BYTES)
+    starts = np.flatnonzero(~separator & np.concatenate(([True], separator[:-1])))
+    ends = np.flatnonzero(~separator & np.concatenate((separator[1:], [True]))) + 1
+    newlines = np.flatnonzero(raw == ord("\n"))
+
+    errors = []
+    for index in bad:
+        start = starts[index]
+        line = int(np.searchsorted(newlines, start))
+        line_start = newlines[line - 1] + 1 if line else 0
+        column = len(encoded[line_start:start].decode("utf-8")) + 1
+        errors.append(ParseError(int(index) + 1, line + 1, column, encoded[start:ends[index]].decode("utf-8")))
+    return errors
+
+
+def parse_numbers(text):
+    """Parse separated numbers from ``text``.
+
+    Returns the parsed values (missing values such as "nan" are dropped) and a
+    list of ``ParseError`` for the tokens that could not be read or are not
+    finite; the valid values are still returned when some tokens are malformed.
+    """
+    if not text or not text.strip():
+        return ParsedNumbers(np.empty(0), [])
+
+    numbers, bad = _convert(text.translate(_TO_NEWLINE))
+    infinite = np.flatnonzero(np.isinf(numbers))
+    if infinite.size:
+        numbers = np.where(np.isinf(numbers), np.nan, numbers)
+        bad = np.union1d(bad, infinite)
+    errors = _locate(text, bad) if bad.size else []
+    return ParsedNumbers(numbers[~np.isnan(numbers)], errors)
+
+
+def parse_proportions(text):
+    """Parse ``"A=0.5, B=0.3; C=0.2"`` (or one pair per line) into a category-to-number dictionary."""
+    proportions = {}
+    for pair in text.replace(";", ",").replace("\n", ",").split(","):
+        if not pair.strip():
+            continue
+        name, separator, value = pair.rpartition("=")
+        if not separator or not name.strip():
+            raise ValueError(f"Expected category=proportion, got: {pair.strip()}")
+        try:
+            proportions[name.strip()] = float(value)
+        except ValueError:
+            raise ValueError(f"Not a number: {value.strip()}") from None
+    return proportions
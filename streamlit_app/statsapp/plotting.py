@@ -0,0 +1,219 @@
+"""Figures for the Significance Level, Confidence Interval, Checker and Power pages.
+
+PDF curves are evaluated once per (distribution, degrees of freedom) and
+reused; rejection and confidence regions are drawn from a single boolean mask
+over that curve. Figures are closed as soon as they have been sent to the
+browser, and every figure has a lightweight counterpart that sends the curve
+to a native Streamlit chart instead of rendering a PNG on the server.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+from statsapp.instrumentation import record_figure, stage
+from statsapp.lazy import lazy_attributes, lazy_module
+
+plt = lazy_module("matplotlib.pyplot")
+pd = lazy_module("pandas")
+chi2, norm, t = lazy_attributes("scipy.stats", "chi2", "norm", "t")
+
+CURVE_POINTS = 1000
+INTERVAL_POINTS = 500
+BOOTSTRAP_BINS = 60
+QQ_POINTS = 200
+POWER_CURVE_POINTS = 200
+CURVE_RANGES = {"norm": (-4, 4), "t": (-4, 4), "chi2": (0, 10)}
+
+
+def _distribution(dist, df=None):
+    if dist == "norm":
+        return norm
+    if dist == "t":
+        return t(df)
+    if dist == "chi2":
+        return chi2(df)
+    raise ValueError(f"Unknown distribution: {dist}")
+
+
+@lru_cache(maxsize=256)
+def pdf_curve(dist, df=None, high=None):
+    """Read-only (x, density) arrays of a test distribution, computed once per (dist, df, high).
+
+    ``high`` extends the x range beyond the default, e.g. for large chi-square statistics.
+    """
+    low, default_high = CURVE_RANGES[dist]
+    high = default_high if high is None else max(high, default_high)
+    x = np.linspace(low, high, CURVE_POINTS)
+    y = _distribution(dist, df).pdf(x)
+    x.flags.writeable = False
+    y.flags.writeable = False
+    return x, y
+
+
+def region_mask(x, areas):
+    """Boolean mask of the points of ``x`` that fall inside any of the (low, high) areas."""
+    bounds = np.asarray(areas, dtype=np.float64).reshape(-1, 2)
+    inside = (x[:, None] >= bounds[:, 0]) & (x[:, None] <= bounds[:, 1])
+    return inside.any(axis=1)
+
+
+def test_figure(dist, df, rejection_areas, score, title, xlabel, curve_label, score_label, high=None):
+    """Test distribution with its rejection region and the observed statistic."""
+    x, y = pdf_curve(dist, df, high)
+    mask = region_mask(x, rejection_areas)
+
+    fig, ax = plt.subplots()
+    ax.plot(x, y, label=curve_label, color="black")
+    ax.fill_between(x, 0, y, where=mask, color="red", alpha=0.5, label="Rejection Region")
+    ax.scatter([score], [_distribution(dist, df).pdf(score)], color="blue", s=100, label=score_label)
+    ax.axhline(0, color="gray", linewidth=0.5)
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel("Density")
+    ax.legend(loc='upper left', bbox_to_anchor=(1, 1))
+    return fig
+
+
+def test_chart_data(dist, df, rejection_areas, xlabel, high=None):
+    """Curve and rejection region as a DataFrame for ``st.area_chart``."""
+    x, y = pdf_curve(dist, df, high)
+    mask = region_mask(x, rejection_areas)
+    return pd.DataFrame(
+        {"Density": y, "Rejection Region": np.where(mask, y, np.nan)},
+        index=pd.Index(x, name=xlabel),
+    )
+
+
+def _interval_curve(center, scale, x_range):
+    x = np.linspace(x_range[0], x_range[1], INTERVAL_POINTS)
+    return x, norm.pdf(x, loc=center, scale=scale)
+
+
+def interval_figure(center, scale, lower_bound, upper_bound, x_value, x_range, title, xlabel, center_label):
+    """Normal curve around an estimate with its confidence interval shaded."""
+    x, y = _interval_curve(center, scale, x_range)
+    mask = region_mask(x, [(lower_bound, upper_bound)])
+
+    fig, ax = plt.subplots()
+    ax.plot(x, y, label="Normal Distribution", color="black")
+    ax.axvline(lower_bound, color="red", linestyle="--", label=f"Lower Bound ({lower_bound:.2f})")
+    ax.axvline(upper_bound, color="red", linestyle="--", label=f"Upper Bound ({upper_bound:.2f})")
+    ax.axvline(center, color="blue", linestyle="--", label=f"{center_label} ({center:.2f})")
+
+    # X-value as a dot
+    ax.scatter([x_value], [norm.pdf(x_value, loc=center, scale=scale)],
+               color="purple", s=100, label=f"X-Value ({x_value:.2f})")
+
+    ax.fill_between(x, 0, y, where=mask, color="green", alpha=0.2, label="Confidence Interval")
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel("Density")
+    ax.legend(loc='upper left', bbox_to_anchor=(1, 1))
+    return fig
+
+
+def interval_chart_data(center, scale, lower_bound, upper_bound, x_range, xlabel):
+    """Curve and confidence region as a DataFrame for ``st.area_chart``."""
+    x, y = _interval_curve(center, scale, x_range)
+    mask = region_mask(x, [(lower_bound, upper_bound)])
+    return pd.DataFrame(
+        {"Density": y, "Confidence Interval": np.where(mask, y, np.nan)},
+        index=pd.Index(x, name=xlabel),
+    )
+
+
+def bootstrap_figure(replicates, estimate, lower_bound, upper_bound, title, xlabel, bins=BOOTSTRAP_BINS):
+    """Histogram of bootstrap replicates with the interval shaded."""
+    fig, ax = plt.subplots()
+    ax.hist(replicates, bins=bins, density=True, color="gray", alpha=0.6, label="Bootstrap Replicates")
+    ax.axvspan(lower_bound, upper_bound, color="green", alpha=0.2, label="Confidence Interval")
+    ax.axvline(lower_bound, color="red", linestyle="--", label=f"Lower Bound ({lower_bound:.4g})")
+    ax.axvline(upper_bound, color="red", linestyle="--", label=f"Upper Bound ({upper_bound:.4g})")
+    ax.axvline(estimate, color="blue", linestyle="--", label=f"Estimate ({estimate:.4g})")
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel("Density")
+    ax.legend(loc='upper left', bbox_to_anchor=(1, 1))
+    return fig
+
+
+def bootstrap_chart_data(replicates, lower_bound, upper_bound, xlabel, bins=BOOTSTRAP_BINS):
+    """Replicate histogram and interval as a DataFrame for ``st.bar_chart``."""
+    counts, edges = np.histogram(replicates, bins=bins, density=True)
+    centers = (edges[:-1] + edges[1:]) / 2
+    inside = (centers >= lower_bound) & (centers <= upper_bound)
+    return pd.DataFrame(
+        {"Outside Interval": np.where(inside, 0.0, counts), "Confidence Interval": np.where(inside, counts, 0.0)},
+        index=pd.Index(centers, name=xlabel),
+    )
+
+
+def qq_probabilities(points=QQ_POINTS):
+    """Plotting positions ``(i - 0.5) / points`` of a Q-Q plot."""
+    return (np.arange(1, points + 1) - 0.5) / points
+
+
+def qq_figure(sample_quantiles, probabilities, mean, std_dev, title="Normal Q-Q Plot"):
+    """Sample quantiles against standard normal quantiles, with the line of the fitted normal."""
+    theoretical = norm.ppf(probabilities)
+    fig, ax = plt.subplots()
+    ax.scatter(theoretical, sample_quantiles, s=12, color="blue", label="Sample Quantiles")
+    ax.plot(theoretical, mean + std_dev * theoretical, "r--", label=f"Normal (mean={mean:.2f}, std_dev={std_dev:.2f})")
+    ax.set_title(title)
+    ax.set_xlabel("Theoretical Quantiles (Standard Normal)")
+    ax.set_ylabel("Sample Quantiles")
+    ax.legend(loc="upper left")
+    return fig
+
+
+def power_curve_sizes(size, minimum=1, points=POWER_CURVE_POINTS):
+    """Distinct whole sample sizes from ``minimum`` to about twice ``size`` for a power curve."""
+    top = max(2 * int(size), minimum + 10)
+    return np.unique(np.linspace(minimum, top, points).astype(np.int64))
+
+
+def power_figure(sizes, curve, simulated, size, target=None, title="Power Curve", curve_label="Closed Form (Normal Data)"):
+    """Power against sample size: the closed-form curve (if any) and simulated points with 95% error bars.
+
+    ``simulated`` holds ``(size, power, standard_error)`` triples.
+    """
+    fig, ax = plt.subplots()
+    if curve is not None:
+        ax.plot(sizes, curve, color="blue", label=curve_label)
+    if simulated:
+        n, power, se = (np.array(column) for column in zip(*simulated))
+        ax.errorbar(n, power, yerr=1.96 * se, fmt="o", color="black", markersize=4, capsize=3, label="Simulated (95% error bars)")
+    if target is not None:
+        ax.axhline(target, color="red", linestyle="--", label=f"Target Power ({target:.2f})")
+    ax.axvline(size, color="green", linestyle="--", label=f"Sample Size ({size:,})")
+    ax.set_ylim(0, 1.02)
+    ax.set_title(title)
+    ax.set_xlabel("Sample Size")
+    ax.set_ylabel("Power")
+    ax.legend(loc="lower right")
+    return fig
+
+
+def power_chart_data(sizes, curve, simulated, curve_label="Closed Form (Normal Data)"):
+    """Closed-form curve and simulated points as a DataFrame for ``st.line_chart``."""
+    columns = {}
+    if curve is not None:
+        columns[curve_label] = pd.Series(curve, index=sizes)
+    if simulated:
+        n, power, _ = zip(*simulated)
+        columns["Simulated"] = pd.Series(power, index=n)
+    frame = pd.DataFrame(columns).sort_index()
+    frame.index.name = "Sample Size"
+    return frame
+
+
+def show_figure(fig):
+    """Send a figure to the page and close it so reruns do not accumulate figures."""
+    import streamlit as st
+
+    try:
+        with stage("st.pyplot"):
+            st.pyplot(fig)
+        record_figure()
+    finally:
+        plt.close(fig)
@@ -0,0 +1,288 @@
+"""Headless HTTP service for the calculators, built on ``asyncio`` alone.
+
+Start it with ``python -m statsapp serve``. Endpoints:
+
+- ``POST /v1/<operation>``: a JSON object of parameters gets one result
+  object back, a JSON array of objects gets an array of results (see
+  ``statsapp.api`` for the operations and their parameters);
+- ``GET /v1/operations``: the available operations;
+- ``GET /health``: liveness check;
+- ``GET /metrics``: Prometheus text with request, batch and time totals.
+
+Requests are batched per operation: while one batch is computed on the
+worker thread, the requests that arrive join the next one, which runs as soon
+as the first is done (after an optional ``batch_window`` of extra waiting, and
+with at most ``max_batch`` requests). A lone request is answered at once,
+while thousands of small concurrent requests cost a handful of vectorised
+``scipy.stats`` calls instead of one each. The event loop keeps reading new
+connections while a batch is computed.
+"""
+import asyncio
+import json
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+from statsapp import api, warmup
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_BATCH_WINDOW = 0.0
+DEFAULT_MAX_BATCH = 10_000
+MAX_BODY_BYTES = 64 * 1024 * 1024
+MAX_HEADER_LINES = 100
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class Batcher:
+    """Collects the requests of one operation and evaluates them in batches."""
+
+    def __init__(self, operation, executor, window=DEFAULT_BATCH_WINDOW, max_batch=DEFAULT_MAX_BATCH, metrics=None):
+        self.operation = operation
+        self.executor = executor
+        self.window = window
+        self.max_batch = max_batch
+        self.metrics = metrics
+        self._pending = []
+        self._size = 0
+        self._full = asyncio.Event()
+        self._task = None
+        # One batch of this operation is computed at a time; the next one fills up meanwhile
+        self._computing = asyncio.Lock()
+
+    async def submit(self, requests):
+        """Results of ``requests`` (a list of parameter objects), once their batch has run."""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((requests, future))
+        self._size += len(requests)
+        if self._size >= self.max_batch:
+            self._full.set()
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush())
+        return await future
+
+    async def _flush(self):
+        async with self._computing:
+            if self.window > 0:
+                try:
+                    # Wait for more requests to join the batch, unless it is already full
+                    await asyncio.wait_for(self._full.wait(), self.window)
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                # Let requests that were already read join the batch
+                await asyncio.sleep(0)
+            # Take whole HTTP requests up to ``max_batch`` items; the rest go into the next batch
+            taken, size = 0, 0
+            while taken < len(self._pending) and size < self.max_batch:
+                size += len(self._pending[taken][0])
+                taken += 1
+            pending, self._pending = self._pending[:taken], self._pending[taken:]
+            self._size -= size
+            self._task = asyncio.create_task(self._flush()) if self._pending else None
+            if self._size < self.max_batch:
+                self._full.clear()
+
+            batch = [params for requests, _ in pending for params in requests]
+            start = time.perf_counter()
+            try:
+                results = await asyncio.get_running_loop().run_in_executor(
+                    self.executor, api.handle, self.operation, batch
+                )
+            except Exception as e:
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+        if self.metrics is not None:
+            self.metrics.record_batch(self.operation, len(pending), len(batch), time.perf_counter() - start)
+
+        offset = 0
+        for requests, future in pending:
+            if not future.done():
+                future.set_result(results[offset:offset + len(requests)])
+            offset += len(requests)
+
+
+class Metrics:
+    """Process totals for the ``/metrics`` endpoint."""
+
+    def __init__(self):
+        self.started = time.time()
+        self.responses = defaultdict(int)
+        # operation -> [HTTP requests, items, batches, seconds]
+        self.batches = defaultdict(lambda: [0, 0, 0, 0.0])
+
+    def record_response(self, path, status):
+        self.responses[(path, int(status))] += 1
+
+    def record_batch(self, operation, requests, items, seconds):
+        totals = self.batches[operation]
+        totals[0] += requests
+        totals[1] += items
+        totals[2] += 1
+        totals[3] += seconds
+
+    def text(self):
+        lines = [
+            "# HELP statsapp_service_start_time_seconds Start time of the service.",
+            "# TYPE statsapp_service_start_time_seconds gauge",
+            f"statsapp_service_start_time_seconds {self.started:.3f}",
+            "# HELP statsapp_service_responses_total HTTP responses by path and status.",
+            "# TYPE statsapp_service_responses_total counter",
+        ]
+        for (path, status), count in sorted(self.responses.items()):
+            lines.append(f'statsapp_service_responses_total{{path="{path}",status="{status}"}} {count}')
+        for name, index, help_text in (
+            ("requests", 0, "HTTP requests evaluated, by operation."),
+            ("items", 1, "Parameter objects evaluated, by operation."),
+            ("batches", 2, "Vectorised batches run, by operation."),
+            ("batch_seconds", 3, "Time spent computing batches, by operation."),
+        ):
+            lines += [f"# HELP statsapp_service_{name}_total {help_text}", f"# TYPE statsapp_service_{name}_total counter"]
+            for operation, totals in sorted(self.batches.items()):
+                value = f"{totals[index]:.6f}" if isinstance(totals[index], float) else totals[index]
+                lines.append(f'statsapp_service_{name}_total{{operation="{operation}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+class Service:
+    def __init__(self, batch_window=DEFAULT_BATCH_WINDOW, max_batch=DEFAULT_MAX_BATCH):
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.metrics = Metrics()
+        # One computing thread: NumPy releases the GIL inside its loops, and batches stay in arrival order
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="statsapp-batch")
+        self._batchers = {}
+
+    def batcher(self, operation):
+        if operation not in self._batchers:
+            self._batchers[operation] = Batcher(
+                operation, self.executor, self.batch_window, self.max_batch, self.metrics
+            )
+        return self._batchers[operation]
+
+    async def respond(self, method, path, body):
+        """(status, content type, body bytes) of one HTTP request."""
+        if path == "/health" and method == "GET":
+            return HTTPStatus.OK, "application/json", b'{"status": "ok"}'
+        if path == "/metrics" and method == "GET":
+            return HTTPStatus.OK, "text/plain; version=0.0.4", self.metrics.text().encode("utf-8")
+        if path == "/v1/operations" and method == "GET":
+            return HTTPStatus.OK, "application/json", json.dumps(sorted(api.OPERATIONS)).encode("utf-8")
+
+        operation = path[len("/v1/"):] if path.startswith("/v1/") else None
+        if operation not in api.OPERATIONS:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"Unknown path: {path}")
+        if method != "POST":
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, "Send the parameters with POST.")
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "The body must be JSON.") from None
+        single = not isinstance(payload, list)
+        results = await self.batcher(operation).submit([payload] if single else payload)
+        if single:
+            # An array is answered with 200 and an error object for each bad request; a single bad request is a 400
+            status = HTTPStatus.BAD_REQUEST if "error" in results[0] else HTTPStatus.OK
+            return status, "application/json", json.dumps(results[0], allow_nan=False).encode("utf-8")
+        return HTTPStatus.OK, "application/json", json.dumps(results, allow_nan=False).encode("utf-8")
+
+    async def _read_request(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, version = line.decode("latin-1").split()
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Malformed request line.") from None
+        headers = {}
+        for _ in range(MAX_HEADER_LINES):
+            header = await reader.readline()
+            if header in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = header.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        else:
+            raise HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Too many headers.")
+
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length.") from None
+        if length < 0:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length.")
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"The body is limited to {MAX_BODY_BYTES} bytes.")
+        body = await reader.readexactly(length) if length else b""
+        keep_alive = headers.get("connection", "").lower() != "close" and version != "HTTP/1.0"
+        return method, target.split("?")[0], body, keep_alive
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                path = "-"
+                try:
+                    request = await self._read_request(reader)
+                    if request is None:
+                        break
+                    method, path, body, keep_alive = request
+                    status, content_type, payload = await self.respond(method, path, body)
+                except HTTPError as e:
+                    status, content_type = e.status, "application/json"
+                    payload = json.dumps({"error": str(e)}).encode("utf-8")
+                    keep_alive = False
+                except asyncio.IncompleteReadError:
+                    break
+                except Exception as e:
+                    status, content_type = HTTPStatus.INTERNAL_SERVER_ERROR, "application/json"
+                    payload = json.dumps({"error": f"An error occurred: {e}"}).encode("utf-8")
+                    keep_alive = False
+                # Unknown paths are counted together, so scanners cannot create unbounded label values
+                known = path in ("/health", "/metrics", "/v1/operations") or path[len("/v1/"):] in api.OPERATIONS
+                self.metrics.record_response(path if known else "(other)", status)
+
+                writer.write(
+                    f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + payload
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT, ready=None):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        if ready is not None:
+            ready(server)
+        async with server:
+            await server.serve_forever()
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, batch_window=DEFAULT_BATCH_WINDOW, max_batch=DEFAULT_MAX_BATCH):
+    if warmup.enabled():
+        # Import the libraries and fill the caches before the first request, not during it
+        warmup.warm_up()
+    service = Service(batch_window, max_batch)
+
+    def ready(server):
+        address = server.sockets[0].getsockname()
+        print(f"StatsApp service listening on http://{address[0]}:{address[1]}", flush=True)
+
+    try:
+        asyncio.run(service.serve(host, port, ready))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.executor.shutdown(wait=False)
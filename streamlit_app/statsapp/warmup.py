@@ -0,0 +1,103 @@
+"""Background warm-up of a freshly started server process.
+
+The pages import the heavy libraries lazily (see ``statsapp.lazy``), so the
+first page opens quickly. ``start_warm_up`` then loads them on a background
+thread, together with the process-wide caches the pages hit first: the
+critical-value table, the PDF curves of the Significance Level page, scipy's
+first-call set-up of the hot distributions and matplotlib's font cache. By
+the time a user presses a button, the work is usually done.
+
+It runs once per process. Set ``STATSAPP_WARMUP=0`` to turn it off, e.g. in
+batch jobs that should not pay for modules they never use.
+"""
+import os
+import threading
+import time
+
+ENV_FLAG = "STATSAPP_WARMUP"
+# Degrees of freedom whose curves are computed up front (the pages default to 1)
+CURVE_DF = range(1, 31)
+
+_lock = threading.Lock()
+_thread = None
+timings = {}
+
+
+def _step(name, function):
+    start = time.perf_counter()
+    function()
+    timings[name] = time.perf_counter() - start
+
+
+def _import_libraries():
+    import matplotlib.pyplot
+    import pandas
+    import scipy.stats
+
+
+def _evaluate_distributions():
+    import numpy as np
+    from scipy.stats import beta, chi2, norm, t
+
+    # The first call of each method builds scipy's argument parsing; later calls skip it
+    x = np.linspace(0.01, 0.99, 5)
+    for method in ("pdf", "cdf", "sf", "isf", "ppf", "logcdf", "logsf"):
+        getattr(norm, method)(x)
+        getattr(t, method)(x, 5)
+        getattr(chi2, method)(x, 5)
+    beta.ppf(x, 2, 3)
+
+
+def _fill_caches():
+    from statsapp.core.critical_values import get_table
+    from statsapp.plotting import pdf_curve
+
+    get_table()
+    pdf_curve("norm")
+    for df in CURVE_DF:
+        pdf_curve("t", df)
+        pdf_curve("chi2", df)
+
+
+def _draw_figure():
+    import matplotlib.pyplot as plt
+
+    # Loads the font cache and the Agg renderer
+    fig, ax = plt.subplots()
+    ax.plot([0, 1], [0, 1], label="warm-up")
+    ax.legend()
+    fig.canvas.draw()
+    plt.close(fig)
+
+
+def warm_up():
+    """Do all the warm-up work on the calling thread; returns the seconds per step."""
+    _step("import libraries", _import_libraries)
+    _step("distributions", _evaluate_distributions)
+    _step("critical values and curves", _fill_caches)
+    _step("first figure", _draw_figure)
+    return dict(timings)
+
+
+def enabled():
+    return os.environ.get(ENV_FLAG, "1").strip().lower() not in {"0", "false", "no", "off"}
+
+
+def start_warm_up():
+    """Start ``warm_up`` on a daemon thread, once per process; returns the thread (or None when disabled)."""
+    global _thread
+    if not enabled():
+        return None
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_run_quietly, name="statsapp-warmup", daemon=True)
+            _thread.start()
+    return _thread
+
+
+def _run_quietly():
+    try:
+        warm_up()
+    except Exception:
+        # Warming up is only an optimisation; the pages do the same work on demand
+        pass
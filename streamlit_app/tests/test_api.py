@@ -0,0 +1,117 @@
+import json
+
+import numpy as np
+import pytest
+from scipy import stats
+
+from statsapp import api
+from statsapp.__main__ import main
+
+
+def strict_json(results):
+    # Responses are written with allow_nan=False, so NaN and infinity must never reach them
+    return json.loads(json.dumps(results, allow_nan=False))
+
+
+def test_p_values_match_scipy_across_distributions():
+    requests = [
+        {"statistic": 1.5},
+        {"statistic": -2.0, "dist": "t", "df": 7, "tail": "Left-Tailed", "alpha": 0.05},
+        {"statistic": 9.0, "dist": "chi2", "df": 3, "tail": "Right-Tailed", "alpha": 0.01},
+        {"statistic": 2.5, "dist": "t", "df": 7, "alpha": 0.05},
+    ]
+    results = strict_json(api.handle("p_value", requests))
+    assert results[0]["p_value"] == pytest.approx(2 * stats.norm.sf(1.5))
+    assert results[0]["critical_value"] is None and results[0]["reject"] is None
+    assert results[1]["p_value"] == pytest.approx(stats.t.cdf(-2.0, 7))
+    assert results[1]["critical_value"] == pytest.approx(stats.t.ppf(0.05, 7), abs=1e-4)
+    assert results[1]["reject"] is True
+    assert results[2]["p_value"] == pytest.approx(stats.chi2.sf(9.0, 3))
+    assert results[2]["reject"] is False
+    assert results[3]["p_value"] == pytest.approx(2 * stats.t.sf(2.5, 7))
+
+
+def test_bad_requests_get_their_own_errors():
+    requests = [
+        {"statistic": 1.0, "dist": "t"},
+        {"statistic": 1.0, "dist": "f"},
+        "not an object",
+        {"statistic": "high"},
+        {"statistic": 1.0, "alpha": 1.5},
+        {"statistic": 1.0, "tail": "Sideways"},
+        {"statistic": 1.0},
+    ]
+    results = strict_json(api.handle("p_value", requests))
+    assert len(results) == len(requests)
+    assert results[0] == {"error": "Missing parameter 'df'."}
+    assert "'dist' must be one of" in results[1]["error"]
+    assert results[2] == {"error": "A request must be an object of parameters."}
+    assert results[3] == {"error": "'statistic' must be a number."}
+    assert results[4] == {"error": "'alpha' must be between 0 and 1."}
+    assert results[5] == {"error": "Unknown tail type: Sideways"}
+    # The good request in the same batch is unaffected
+    assert results[6]["p_value"] == pytest.approx(2 * stats.norm.sf(1.0))
+
+
+def test_non_finite_inputs_are_rejected():
+    results = strict_json(api.handle("mean_interval", [
+        {"mean": float("inf"), "std_dev": 1, "size": 10},
+        {"mean": 0, "std_dev": float("nan"), "size": 10},
+        {"mean": 0, "std_dev": 1, "size": 1},
+        {"mean": 0, "std_dev": 2, "size": 100},
+    ]))
+    assert results[0] == {"error": "'mean' must be a finite number."}
+    assert results[1] == {"error": "'std_dev' must be a finite number."}
+    assert results[2] == {"error": "'size' must be at least 2."}
+    assert results[3]["lower"] == pytest.approx(stats.norm.ppf(0.025, scale=0.2))
+
+    results = strict_json(api.handle("normality", [{"data": [1, 2, float("inf"), 4]}, {"data": [1, 2]}]))
+    assert results == [{"error": "'data' must only contain finite numbers."}, {"error": "'data' needs at least 3 numbers."}]
+
+
+def test_missing_statistic_gives_null_not_nan():
+    # A null statistic is allowed and has no p-value
+    results = api.handle("p_value", [{"statistic": None, "alpha": 0.05}])
+    assert strict_json(results) == [{"p_value": None, "critical_value": pytest.approx(stats.norm.isf(0.025)), "reject": False}]
+
+
+def test_proportion_methods_are_grouped():
+    requests = [{"successes": 0, "trials": 20, "method": method} for method in api.PROPORTION_METHODS]
+    requests.append({"successes": 3, "trials": 2})
+    results = strict_json(api.handle("proportion_interval", requests))
+    assert [result["lower"] for result in results[:-1]] == [0.0] * len(api.PROPORTION_METHODS)
+    assert results[-1] == {"error": "'successes' must be between 0 and 'trials', and 'trials' positive."}
+
+
+def test_generate_is_reproducible():
+    first, second, bad = api.handle("generate", [
+        {"size": 5, "seed": 42}, {"size": 5, "seed": 42, "mean": 10}, {"size": 0},
+    ])
+    assert first["seed"] == 42
+    np.testing.assert_allclose(np.array(second["values"]) - 10, first["values"])
+    assert "'size' must be a whole number" in bad["error"]
+
+
+def test_normality_result_is_plain_json():
+    data = np.random.default_rng(0).normal(size=200).tolist()
+    (result,) = strict_json(api.handle("normality", [{"data": data + [None]}]))
+    assert result["test"] == "Shapiro-Wilk" and result["n_used"] == 200
+    assert result["p_value"] == pytest.approx(stats.shapiro(data).pvalue)
+    assert result["normal"] is True
+
+
+def test_unknown_operation():
+    with pytest.raises(KeyError):
+        api.handle("median", [{}])
+
+
+def test_command_line_keeps_errors_in_place(tmp_path, capsys):
+    source = tmp_path / "requests.jsonl"
+    source.write_text('{"statistic": 2.1, "df": 12}\nnot json\n{"statistic": 1.0}\n', encoding="utf-8")
+    output = tmp_path / "results.jsonl"
+    assert main(["p_value", str(source), "--set", "dist=t", "--output", str(output)]) == 1
+    results = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert results[0]["p_value"] == pytest.approx(2 * stats.t.sf(2.1, 12))
+    assert results[1] == {"error": "Line 2 is not valid JSON."}
+    assert results[2] == {"error": "Missing parameter 'df'."}
+    assert "2 request(s) failed" in capsys.readouterr().err
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+from scipy import stats
+
+from statsapp.core.bootstrap import BCA, PERCENTILE, bootstrap_interval
+
+# At most JACKKNIFE_GROUPS points, so the BCa acceleration uses the ordinary jackknife like SciPy
+DATA = np.random.default_rng(5).lognormal(0, 0.75, 100)
+RESAMPLES = 50_000
+
+
+def scipy_interval(statistic, method):
+    result = stats.bootstrap(
+        (DATA,), statistic, n_resamples=RESAMPLES, method="BCa" if method == BCA else "percentile",
+        random_state=np.random.default_rng(6),
+    )
+    return result.confidence_interval, result.standard_error
+
+
+@pytest.mark.parametrize("method", [BCA, PERCENTILE])
+def test_mean_interval_matches_scipy(method):
+    result = bootstrap_interval(DATA, "mean", method=method, max_resamples=RESAMPLES, seed=7, tolerance=0)
+    (lower, upper), standard_error = scipy_interval(np.mean, method)
+    assert result.estimate == pytest.approx(DATA.mean())
+    assert result.standard_error == pytest.approx(standard_error, rel=0.05)
+    # Both are Monte Carlo estimates; their endpoints agree to a small fraction of a standard error
+    assert result.lower == pytest.approx(lower, abs=0.1 * standard_error)
+    assert result.upper == pytest.approx(upper, abs=0.1 * standard_error)
+
+
+@pytest.mark.parametrize("method", [BCA, PERCENTILE])
+def test_median_interval_matches_scipy(method):
+    result = bootstrap_interval(DATA, "quantile", 0.5, method=method, max_resamples=RESAMPLES, seed=7, tolerance=0)
+    (lower, upper), standard_error = scipy_interval(np.median, method)
+    assert result.estimate == pytest.approx(np.median(DATA))
+    assert result.standard_error == pytest.approx(standard_error, rel=0.05)
+    # Resampled medians only take values between order statistics, so the endpoints may land on neighbours
+    ranks = np.searchsorted(np.sort(DATA), [result.lower, result.upper, lower, upper])
+    assert abs(ranks[0] - ranks[2]) <= 1
+    assert abs(ranks[1] - ranks[3]) <= 1
+
+
+def test_bootstrap_is_reproducible_with_a_seed():
+    first = bootstrap_interval(DATA, seed=11, max_resamples=4000)
+    second = bootstrap_interval(DATA, seed=11, max_resamples=4000)
+    assert (first.lower, first.upper, first.resamples) == (second.lower, second.upper, second.resamples)
+
+
+def test_bootstrap_ignores_missing_values():
+    with_missing = np.append(DATA, [np.nan, np.nan])
+    assert bootstrap_interval(with_missing, seed=3).estimate == pytest.approx(DATA.mean())
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from statsapp.core.categorical import (
+    ASYMPTOTIC, AUTOMATIC, MONTE_CARLO, count_categories, crosstab, goodness_of_fit, independence, table_frame,
+)
+
+RNG = np.random.default_rng(9)
+ROWS = pd.Series(RNG.choice(["a", "b", "c"], 3000, p=[0.5, 0.3, 0.2]), dtype=object)
+COLUMNS = pd.Series(RNG.choice(["x", "y", "z", "w"], 3000), dtype=object)
+ROWS[::97] = None
+COLUMNS[5::89] = np.nan
+
+
+def test_goodness_of_fit_matches_scipy_chisquare():
+    counts = count_categories(ROWS)
+    weights = {"a": 5, "b": 3, "c": 2}
+    result, frame = goodness_of_fit(counts, weights, method=ASYMPTOTIC)
+    expected = np.array([weights[label] for label in counts.labels], dtype=float)
+    expected = stats.chisquare(counts.counts, expected / expected.sum() * counts.counts.sum())
+    assert result.statistic == pytest.approx(expected.statistic, rel=1e-12)
+    assert result.p_value == pytest.approx(expected.pvalue, rel=1e-9)
+    assert result.df == 2
+    assert counts.missing == ROWS.isna().sum()
+    np.testing.assert_array_equal(frame["Observed"], counts.counts)
+
+
+def test_goodness_of_fit_adds_categories_without_observations():
+    counts = count_categories(pd.Series(["a", "a", "b"] * 10))
+    result, frame = goodness_of_fit(counts, {"a": 1, "b": 1, "c": 1}, method=ASYMPTOTIC)
+    assert list(frame.index) == ["a", "b", "c"]
+    assert result.statistic == pytest.approx(stats.chisquare([20, 10, 0]).statistic)
+
+
+def test_independence_matches_scipy_chi2_contingency():
+    table = crosstab(ROWS, COLUMNS)
+    result = independence(table, method=ASYMPTOTIC)
+    observed = pd.crosstab(ROWS, COLUMNS).loc[table.row_labels, table.column_labels].to_numpy()
+    expected = stats.chi2_contingency(observed, correction=False)
+    assert result.statistic == pytest.approx(expected.statistic, rel=1e-12)
+    assert result.p_value == pytest.approx(expected.pvalue, rel=1e-9)
+    assert result.df == expected.dof
+    assert result.min_expected == pytest.approx(expected.expected_freq.min())
+    assert table.missing == int((ROWS.isna() | COLUMNS.isna()).sum())
+    np.testing.assert_array_equal(table_frame(table).to_numpy(), observed)
+
+
+@pytest.mark.parametrize("rows", [40, 3000])
+def test_monte_carlo_independence_agrees_with_the_chi_square_distribution(rows):
+    # Few rows shuffle the raw data; many rows sample random tables from the margins
+    table = crosstab(ROWS[:rows], COLUMNS[:rows])
+    asymptotic = independence(table, method=ASYMPTOTIC)
+    simulated = independence(table, method=MONTE_CARLO, permutations=20_000, seed=1, target_se=0)
+    assert simulated.method == MONTE_CARLO
+    assert simulated.permutations == 20_000
+    # The small table is far from asymptotic, so only the large one must agree closely
+    tolerance = 4 * simulated.standard_error if rows > 1000 else 0.1
+    assert simulated.p_value == pytest.approx(asymptotic.p_value, abs=tolerance)
+
+
+def test_monte_carlo_goodness_of_fit_agrees_with_the_chi_square_distribution():
+    counts = count_categories(ROWS)
+    asymptotic, _ = goodness_of_fit(counts, {"a": 0.52, "b": 0.29, "c": 0.19}, method=ASYMPTOTIC)
+    simulated, _ = goodness_of_fit(
+        counts, {"a": 0.52, "b": 0.29, "c": 0.19}, method=MONTE_CARLO, permutations=20_000, seed=2, target_se=0
+    )
+    assert simulated.p_value == pytest.approx(asymptotic.p_value, abs=4 * simulated.standard_error)
+
+
+def test_monte_carlo_stops_at_the_target_standard_error():
+    table = crosstab(ROWS, COLUMNS)
+    first = independence(table, method=MONTE_CARLO, permutations=100_000, seed=3, target_se=0.01)
+    second = independence(table, method=MONTE_CARLO, permutations=100_000, seed=3, target_se=0.01)
+    assert first.permutations < 100_000
+    assert first.standard_error <= 0.01
+    assert first == second
+
+
+def test_automatic_falls_back_to_the_chi_square_distribution_for_huge_tables():
+    rng = np.random.default_rng(4)
+    table = crosstab(rng.integers(0, 1000, 10 ** 6), rng.integers(0, 1000, 10 ** 6))
+    result = independence(table, method=AUTOMATIC)
+    assert result.method == ASYMPTOTIC and result.small_expected
+    with pytest.raises(ValueError, match="chi-square distribution"):
+        independence(table, method=MONTE_CARLO)
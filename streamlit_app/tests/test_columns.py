@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from statsapp.core.columns import analyse_column, analyse_columns, numeric_columns, summary_table
+
+PROBABILITIES = np.array([0.1, 0.5, 0.9])
+
+
+def test_column_matches_scipy():
+    values = np.random.default_rng(0).normal(10, 3, 500)
+    values[::50] = np.nan
+    report = analyse_column("x", values, PROBABILITIES)
+    present = values[~np.isnan(values)]
+    assert (report.count, report.missing) == (490, 10)
+    assert report.moments.mean == pytest.approx(present.mean())
+    assert report.moments.skewness == pytest.approx(stats.skew(present))
+    assert report.auto_test == "Shapiro-Wilk"
+    assert report.results["Shapiro-Wilk"].p_value == pytest.approx(stats.shapiro(present).pvalue)
+    np.testing.assert_allclose(report.quantiles, np.quantile(present, PROBABILITIES))
+    assert report.histogram.total == 490
+
+
+@pytest.mark.parametrize("value", [3.0, 0.1, 1e6 + 0.3])
+def test_constant_column(value):
+    # 0.1 and 1e6 + 0.3 leave a rounding-error variance in the streamed moments
+    report = analyse_column("c", np.full(1000, value), PROBABILITIES)
+    assert report.count == 1000
+    assert report.results == {} and report.auto_test is None
+    assert np.isnan(report.moments.skewness) and np.isnan(report.moments.kurtosis)
+    np.testing.assert_array_equal(report.quantiles, value)
+    assert report.histogram.total == 1000
+
+
+def test_all_missing_column():
+    report = analyse_column("empty", np.full(7, np.nan), PROBABILITIES)
+    assert (report.count, report.missing) == (0, 7)
+    assert report.results == {} and report.auto_test is None
+    assert np.isnan(report.quantiles).all()
+    assert report.histogram.total == 0
+
+
+def test_table_of_columns():
+    rng = np.random.default_rng(1)
+    frame = pd.DataFrame({
+        "normal": rng.normal(size=200),
+        "label": ["a"] * 200,
+        "constant": np.full(200, 0.1),
+        "missing": np.full(200, np.nan),
+        "short": [1.0, 2.0] + [np.nan] * 198,
+    })
+    assert numeric_columns(frame) == ["normal", "constant", "missing", "short"]
+    reports = analyse_columns(frame, PROBABILITIES)
+    table = summary_table(reports)
+    assert table["Column"].tolist() == ["normal", "constant", "missing", "short"]
+    assert table["Count"].tolist() == [200, 200, 0, 2]
+    assert table["Auto Test"].iloc[0] == "Shapiro-Wilk" and table["Auto Test"].iloc[1:].isna().all()
+    assert table.loc[1, "Mean"] == pytest.approx(0.1)
+    assert np.isnan(table.loc[2, "Mean"]) and np.isnan(table.loc[2, "Standard Deviation"])
+    p_values = table.filter(like="p-value")
+    assert p_values.iloc[0].notna().all()
+    assert p_values.iloc[1:].isna().all().all()
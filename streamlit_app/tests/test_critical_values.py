@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+from scipy import stats
+
+from statsapp.core.critical_values import DEFAULT_TOLERANCE, Q_COUNT, Q_STEP, CriticalValueTable
+
+DF_CAP = 120
+
+
+@pytest.fixture(scope="module")
+def table():
+    return CriticalValueTable.build(df_cap=DF_CAP)
+
+
+@pytest.mark.parametrize("dist", ["t", "chi2"])
+def test_lookups_are_within_the_tolerance_on_a_denser_grid(table, dist):
+    # Sixteen probabilities inside every cell, for every df of the table
+    z_grid = stats.norm.isf(Q_STEP * np.arange(1, Q_COUNT + 1))
+    fractions = (np.arange(16) + 0.5) / 16
+    q = stats.norm.sf(z_grid[:-1, None] + fractions * np.diff(z_grid)[:, None]).ravel()
+    df = np.arange(1, DF_CAP + 1)
+    exact = getattr(stats, dist).isf(q[:, None], df[None, :])
+    np.testing.assert_allclose(table.upper(dist, q[:, None], df[None, :]), exact, rtol=0, atol=DEFAULT_TOLERANCE)
+
+
+@pytest.mark.parametrize("dist", ["t", "chi2"])
+def test_grid_points_and_values_outside_the_table_are_exact(table, dist):
+    q = np.array([0.0005, 0.025, 0.05, 0.0001, 0.2, 0.025])
+    df = np.array([1, 7, DF_CAP, 3, 3, 2.5])
+    np.testing.assert_allclose(table.upper(dist, q, df), getattr(stats, dist).isf(q, df), rtol=1e-12)
+
+
+def test_saved_table_loads_unchanged(table, tmp_path):
+    path = tmp_path / "table.npz"
+    table.save(path)
+    loaded = CriticalValueTable.load(path)
+    for dist in table.values:
+        np.testing.assert_array_equal(loaded.values[dist], table.values[dist])
+        np.testing.assert_array_equal(loaded.errors[dist], table.errors[dist])
@@ -0,0 +1,77 @@
+import io
+
+import numpy as np
+import pytest
+
+from statsapp import dataset
+from statsapp.dataset import ALIGNMENT, open_dataset, read_header, summarise_dataset, write_header
+from statsapp.generator import generation_params, write_dataset
+
+PARAMS = {"distribution": "normal", "mean": 1.5, "std_dev": 0.25, "size": 1000, "seed": 3, "workers": 1}
+
+
+def write(path, values, params=PARAMS):
+    with open(path, "wb") as handle:
+        offset = write_header(handle, values.size, params)
+        values.astype(dataset.DTYPE).tofile(handle)
+    return offset
+
+
+def test_sds_round_trip(tmp_path):
+    values = np.random.default_rng(1).normal(1.5, 0.25, 1000)
+    path = tmp_path / "data.sds"
+    offset = write(path, values)
+    assert offset % ALIGNMENT == 0
+
+    with open(path, "rb") as handle:
+        header, data_offset = read_header(handle)
+    assert data_offset == offset
+    assert header["count"] == 1000 and header["params"] == PARAMS
+
+    loaded = open_dataset(path)
+    assert isinstance(loaded.values, np.memmap)
+    np.testing.assert_array_equal(loaded.values, values)
+    assert loaded.params == PARAMS
+
+
+def test_upload_is_read_like_a_file(tmp_path):
+    values = np.arange(10, dtype=np.float64)
+    path = tmp_path / "data.sds"
+    write(path, values)
+    upload = io.BytesIO(path.read_bytes())
+    upload.name = "data.sds"
+    loaded = open_dataset(upload)
+    np.testing.assert_array_equal(loaded.values, values)
+    assert not loaded.values.flags.writeable
+
+
+def test_generated_dataset_records_its_parameters(tmp_path):
+    path = tmp_path / "generated.sds"
+    preview, moments = write_dataset(path, "StatsApp binary (.sds)", 2.0, 3.0, 2500, seed=9)
+    loaded = open_dataset(path)
+    assert loaded.params == generation_params(2.0, 3.0, 2500, 9)
+    np.testing.assert_array_equal(loaded.values[:preview.size], preview)
+    assert loaded.values.mean() == pytest.approx(moments.mean)
+
+
+def test_empty_dataset(tmp_path):
+    path = tmp_path / "empty.sds"
+    write(path, np.empty(0), {})
+    assert open_dataset(path).values.size == 0
+
+
+def test_other_files_are_rejected(tmp_path):
+    path = tmp_path / "data.sds"
+    path.write_bytes(b"Values\n1.0\n2.0\n")
+    with pytest.raises(ValueError, match="not a StatsApp dataset"):
+        open_dataset(path)
+
+
+def test_summary_matches_the_values(tmp_path):
+    values = np.random.default_rng(2).exponential(2.0, 50_000)
+    path = tmp_path / "data.sds"
+    write(path, values)
+    summary = summarise_dataset(path, chunksize=7000)
+    assert summary.count == values.size
+    assert summary.moments.mean == pytest.approx(values.mean())
+    assert summary.moments.std == pytest.approx(values.std())
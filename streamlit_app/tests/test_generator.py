@@ -0,0 +1,70 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from statsapp import generator
+from statsapp.dataset import open_dataset
+from statsapp.generator import (
+    STREAM_BLOCK, generate_chunks, output_path, sweep_output_dir, write_dataset, write_dataset_parallel,
+)
+
+
+@pytest.fixture
+def output_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(generator, "OUTPUT_DIR", tmp_path)
+    return tmp_path
+
+
+def test_chunks_do_not_depend_on_the_chunk_size():
+    whole = np.concatenate(list(generate_chunks(1.0, 2.0, 10_001, seed=42, chunk_size=10_001)))
+    pieces = np.concatenate(list(generate_chunks(1.0, 2.0, 10_001, seed=42, chunk_size=999)))
+    np.testing.assert_array_equal(whole, pieces)
+
+
+@pytest.mark.parametrize("file_format", ["CSV", "NumPy (.npy)"])
+def test_written_dataset_holds_the_generated_values(output_dir, file_format):
+    path = output_path(file_format)
+    preview, moments = write_dataset(path, file_format, 5.0, 0.5, 3000, seed=7, chunk_size=1000)
+    expected = np.concatenate(list(generate_chunks(5.0, 0.5, 3000, seed=7)))
+    values = pd.read_csv(path)["Values"].to_numpy() if file_format == "CSV" else np.load(path)
+    np.testing.assert_allclose(values, expected, rtol=1e-15)
+    np.testing.assert_array_equal(preview, expected[:preview.size])
+    assert moments.count == 3000
+    assert moments.mean == pytest.approx(expected.mean())
+
+
+def test_sweep_deletes_only_expired_datasets(output_dir):
+    old, fresh = output_path("CSV"), output_path("CSV")
+    other = output_dir / "notes.txt"
+    other.write_text("kept")
+    two_days_ago = time.time() - 48 * 3600
+    for path in (old, other):
+        os.utime(path, (two_days_ago, two_days_ago))
+    assert sweep_output_dir(ttl_hours=24) == 1
+    assert not old.exists()
+    assert fresh.exists() and other.exists()
+
+
+def test_writing_a_dataset_sweeps_the_output_directory(output_dir):
+    old = output_path("CSV")
+    os.utime(old, (0, 0))
+    output_path("CSV")
+    assert not old.exists()
+
+
+@pytest.mark.parametrize("file_format", ["NumPy (.npy)", "StatsApp binary (.sds)"])
+def test_parallel_output_does_not_depend_on_the_number_of_workers(output_dir, file_format):
+    # Three blocks, the last one partial, so four workers leave one idle
+    size = 2 * STREAM_BLOCK + 12_345
+    serial = output_path(file_format)
+    write_dataset(serial, file_format, 0.0, 1.0, size, seed=2024)
+    expected = np.array(open_dataset(serial).values) if file_format != "NumPy (.npy)" else np.load(serial)
+    for workers in (1, 2, 4):
+        path = output_path(file_format)
+        _, moments = write_dataset_parallel(path, file_format, 0.0, 1.0, size, seed=2024, workers=workers)
+        values = np.array(open_dataset(path).values) if file_format != "NumPy (.npy)" else np.load(path)
+        np.testing.assert_array_equal(values, expected)
+        assert moments.count == size
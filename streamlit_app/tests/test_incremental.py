@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+from scipy import stats
+
+from statsapp.core.incremental import IncrementalSummary
+from statsapp.core.normality import NormalitySample, run_test
+from statsapp.core.streaming import StreamSummary
+
+
+def batches(seed=0):
+    rng = np.random.default_rng(seed)
+    # Batches of very different sizes and locations, to exercise the pairwise moment update
+    return [rng.normal(5, 2, 40_000), rng.gamma(2.0, 3.0, 7), rng.normal(-1e3, 0.5, 1), rng.standard_t(4, 15_000)]
+
+
+def assert_same_summary(summary, one_pass):
+    for name in ("count", "mean", "m2", "m3", "m4", "min", "max"):
+        assert getattr(summary.moments, name) == pytest.approx(getattr(one_pass.moments, name), rel=1e-9, abs=1e-6)
+    # Aligned histogram grids give the same bins however the stream was split
+    assert summary.histogram.start == one_pass.histogram.start
+    assert summary.histogram.exponent == one_pass.histogram.exponent
+    np.testing.assert_array_equal(summary.histogram.counts, one_pass.histogram.counts)
+
+
+def test_appended_batches_match_one_pass():
+    data = batches()
+    summary = IncrementalSummary()
+    for batch in data:
+        summary.append(batch)
+    assert summary.batches == len(data)
+    assert_same_summary(summary, StreamSummary().update(np.concatenate(data)))
+
+
+def test_merged_summaries_match_one_pass():
+    data = batches()
+    left, right = IncrementalSummary(seed=1), IncrementalSummary(seed=2)
+    for batch in data[:2]:
+        left.append(batch)
+    for batch in data[2:]:
+        right.append(batch)
+    merged = left.merge(right)
+    values = np.concatenate(data)
+    assert_same_summary(merged, StreamSummary().update(values))
+
+    # Quantiles of the merged sketch stay within the sketch's rank error
+    q = np.array([0.01, 0.25, 0.5, 0.75, 0.99])
+    ranks = np.searchsorted(np.sort(values), merged.quantiles(q)) / values.size
+    np.testing.assert_allclose(ranks, q, atol=0.01)
+
+
+def test_moments_match_scipy():
+    values = np.concatenate(batches())
+    summary = IncrementalSummary()
+    summary.append_chunks(np.array_split(values, 9))
+    assert summary.batches == 1
+    assert summary.moments.mean == pytest.approx(values.mean(), rel=1e-12)
+    assert summary.moments.variance == pytest.approx(values.var(), rel=1e-9)
+    assert summary.moments.skewness == pytest.approx(stats.skew(values), rel=1e-9)
+    assert summary.moments.kurtosis == pytest.approx(stats.kurtosis(values), rel=1e-9)
+
+
+def test_missing_values_and_empty_batches():
+    summary = IncrementalSummary()
+    assert summary.append([1.0, np.nan, 3.0]) == 2
+    assert summary.append([np.nan]) == 0
+    assert summary.append([]) == 0
+    assert summary.batches == 1
+    assert summary.moments.mean == 2.0
+
+
+@pytest.mark.parametrize("test", ["D'Agostino-Pearson", "Jarque-Bera"])
+def test_normality_matches_the_full_data(test):
+    data = batches()
+    summary = IncrementalSummary()
+    for batch in data:
+        summary.append(batch)
+    expected = run_test(test, NormalitySample(np.concatenate(data)))
+    result = summary.normality(test)
+    assert result.statistic == pytest.approx(expected.statistic, rel=1e-9)
+    assert result.p_value == pytest.approx(expected.p_value, rel=1e-6, abs=1e-300)
@@ -0,0 +1,91 @@
+import threading
+import tracemalloc
+
+import pytest
+
+from statsapp import instrumentation
+from statsapp.instrumentation import RunProfile, current_run, finish_run, stage, start_run
+
+
+@pytest.fixture(autouse=True)
+def profiling(monkeypatch):
+    monkeypatch.setenv(instrumentation.ENV_FLAG, "1")
+    monkeypatch.setattr(instrumentation, "show_profile", lambda profile, record: None)
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+    yield
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def test_run_starts_and_stops_its_own_tracing():
+    profile = start_run("page")
+    assert tracemalloc.is_tracing()
+    with stage("allocate"):
+        data = bytearray(4 * 2 ** 20)
+    del data
+    assert finish_run() is profile
+    assert not tracemalloc.is_tracing()
+    assert current_run() is None
+    assert profile.stages[0]["peak_bytes"] >= 4 * 2 ** 20
+    assert profile.peak_bytes >= profile.stages[0]["peak_bytes"]
+
+
+def test_tracing_started_elsewhere_is_left_alone():
+    tracemalloc.start()
+    profile = start_run("page")
+    with stage("work"):
+        pass
+    finish_run()
+    # Someone else owns the tracer: it keeps running and its peak is not this run's
+    assert tracemalloc.is_tracing()
+    assert profile.peak_bytes is None
+    assert profile.stages[0]["peak_bytes"] is None
+
+
+def test_concurrent_runs_do_not_stop_each_others_tracing():
+    first_started, second_finished = threading.Event(), threading.Event()
+    profiles = {}
+
+    def first():
+        profiles["first"] = start_run("first")
+        first_started.set()
+        second_finished.wait()
+        # The other session finishing must not have stopped the tracer under this run
+        profiles["tracing"] = tracemalloc.is_tracing()
+        finish_run()
+
+    def second():
+        first_started.wait()
+        profiles["second"] = start_run("second")
+        finish_run()
+        second_finished.set()
+
+    threads = [threading.Thread(target=first), threading.Thread(target=second)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert profiles["first"] is not profiles["second"]
+    assert profiles["tracing"]
+    assert not tracemalloc.is_tracing()
+    assert profiles["first"].peak_bytes is None
+    assert profiles["second"].peak_bytes is None
+
+
+def test_run_stopped_inside_a_stage_closes_the_stage():
+    ticks = iter([0.0, 1.0, 3.0])
+    profile = RunProfile("page", clock=lambda: next(ticks))
+    with profile.stage("open"):
+        profile.finish()
+    assert profile.duration == 3.0
+    assert profile.stages[0]["seconds"] == 2.0
+    assert not tracemalloc.is_tracing()
+
+
+def test_unfinished_run_is_finished_by_the_next_run():
+    start_run("page")
+    start_run("page")
+    finish_run()
+    assert not tracemalloc.is_tracing()
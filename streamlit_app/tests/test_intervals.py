@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from statsapp.core.intervals import (
+    AGRESTI_COULL,
+    CLOPPER_PEARSON,
+    PROPORTION_METHODS,
+    WALD,
+    WILSON,
+    batch_proportions,
+    mean_interval,
+    proportion_interval,
+)
+
+COUNTS = [(0, 10), (1, 10), (5, 10), (9, 10), (10, 10), (0, 1), (1, 1), (3, 250), (120, 250), (250, 250), (17, 4000)]
+CONFIDENCES = [0.8, 0.95, 0.999]
+SCIPY_METHODS = {WILSON: "wilson", CLOPPER_PEARSON: "exact"}
+
+
+@pytest.mark.parametrize("method", [WILSON, CLOPPER_PEARSON])
+@pytest.mark.parametrize("confidence", CONFIDENCES)
+@pytest.mark.parametrize("successes, trials", COUNTS)
+def test_proportion_interval_matches_scipy(successes, trials, confidence, method):
+    expected = stats.binomtest(successes, trials).proportion_ci(confidence, method=SCIPY_METHODS[method])
+    interval = proportion_interval(successes, trials, confidence, method)
+    assert interval.estimate == successes / trials
+    assert interval.lower == pytest.approx(expected.low, abs=1e-12)
+    assert interval.upper == pytest.approx(expected.high, abs=1e-12)
+
+
+@pytest.mark.parametrize("confidence", CONFIDENCES)
+@pytest.mark.parametrize("successes, trials", COUNTS)
+def test_agresti_coull_matches_its_definition(successes, trials, confidence):
+    z = stats.norm.isf((1 - confidence) / 2)
+    adjusted_trials = trials + z ** 2
+    center = (successes + z ** 2 / 2) / adjusted_trials
+    margin = z * np.sqrt(center * (1 - center) / adjusted_trials)
+    interval = proportion_interval(successes, trials, confidence, AGRESTI_COULL)
+    assert interval.lower == pytest.approx(max(center - margin, 0), abs=1e-12)
+    assert interval.upper == pytest.approx(min(center + margin, 1), abs=1e-12)
+
+
+@pytest.mark.parametrize("method", PROPORTION_METHODS)
+@pytest.mark.parametrize("trials", [1, 10, 1000])
+def test_all_or_no_successes(method, trials):
+    none = proportion_interval(0, trials, 0.95, method)
+    every = proportion_interval(trials, trials, 0.95, method)
+    assert none.lower == 0 and every.upper == 1
+    if method == WALD:
+        # The Wald interval collapses to a point at the boundaries
+        assert none.upper == 0 and every.lower == 1
+    else:
+        assert 0 < none.upper < 1 and 0 < every.lower < 1
+        # The two ends mirror each other
+        assert none.upper == pytest.approx(1 - every.lower, abs=1e-12)
+
+
+def test_proportion_interval_broadcasts():
+    successes, trials = np.array(COUNTS).T
+    interval = proportion_interval(successes, trials, 0.95, WILSON)
+    for i, (k, n) in enumerate(COUNTS):
+        single = proportion_interval(k, n, 0.95, WILSON)
+        assert interval.lower[i] == single.lower and interval.upper[i] == single.upper
+
+
+def test_unknown_method():
+    with pytest.raises(ValueError, match="Unknown proportion interval method"):
+        proportion_interval(1, 10, method="Jeffreys")
+
+
+@pytest.mark.parametrize("size", [2, 5, 29, 30, 1000])
+@pytest.mark.parametrize("confidence", CONFIDENCES)
+def test_mean_interval_matches_scipy(size, confidence):
+    mean, std_dev = 3.5, 2.0
+    standard_error = std_dev / np.sqrt(size)
+    if size < 30:
+        expected = stats.t.interval(confidence, size - 1, loc=mean, scale=standard_error)
+    else:
+        expected = stats.norm.interval(confidence, loc=mean, scale=standard_error)
+    interval = mean_interval(mean, std_dev, size, confidence)
+    assert interval.standard_error == pytest.approx(standard_error)
+    assert interval.lower == pytest.approx(expected[0], abs=1e-4 * standard_error)
+    assert interval.upper == pytest.approx(expected[1], abs=1e-4 * standard_error)
+
+
+def test_batch_proportions_matches_single_intervals():
+    frame = pd.DataFrame({
+        "Cohort": list("abcdefgh"),
+        "Successes": [3, 3, 0, 10, 2.5, -1, 11, None],
+        "Trials": [10, 10, 10, 10, 10, 10, 10, 10],
+    })
+    results = batch_proportions(frame, 0.9, CLOPPER_PEARSON)
+    assert results["Cohort"].tolist() == list("abcdefgh")
+    assert results["valid"].tolist() == [True] * 4 + [False] * 4
+    for row in results[results["valid"]].itertuples():
+        single = proportion_interval(row.successes, row.trials, 0.9, CLOPPER_PEARSON)
+        assert (row.lower, row.upper) == (single.lower, single.upper)
+    assert results.loc[~results["valid"], "lower"].isna().all()
+
+
+def test_batch_proportions_needs_counts():
+    with pytest.raises(ValueError, match="'trials'"):
+        batch_proportions(pd.DataFrame({"successes": [1]}))
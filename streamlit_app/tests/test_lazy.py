@@ -0,0 +1,30 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from statsapp.lazy import lazy_attributes, lazy_module
+
+HEAVY_MODULES = ("pandas", "scipy.stats", "matplotlib.pyplot")
+
+
+def test_stand_ins_import_on_first_use():
+    json = lazy_module("json")
+    dumps, loads = lazy_attributes("json", "dumps", "loads")
+    assert not json.loaded and not dumps.loaded
+    assert loads(dumps([1, 2])) == [1, 2]
+    assert dumps.loaded and not json.loaded
+    assert json.dumps({}) == "{}"
+    assert json.loaded and "(not imported yet)" not in repr(json)
+
+
+def test_headless_entry_points_do_not_import_heavy_libraries():
+    # A fresh interpreter, since this one has imported them for other tests already
+    code = (
+        "import sys, statsapp.api, statsapp.service, statsapp.__main__; "
+        f"print([name for name in {HEAVY_MODULES!r} if name in sys.modules])"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True,
+        cwd=Path(__file__).parents[1],
+    ).stdout
+    assert output.strip() == "[]"
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+from scipy import stats
+
+from statsapp.core.normality import (
+    TESTS, NormalitySample, anderson_darling, dagostino_pearson, jarque_bera, kolmogorov_smirnov, run_test, shapiro_wilk,
+)
+from statsapp.core.streaming import MomentAccumulator
+
+SAMPLES = {
+    "normal": np.random.default_rng(1).normal(10, 2, 500),
+    "skewed": np.random.default_rng(2).exponential(1, 2000),
+    "heavy-tailed": np.random.default_rng(3).standard_t(3, 300),
+}
+
+
+@pytest.fixture(params=sorted(SAMPLES))
+def data(request):
+    return SAMPLES[request.param]
+
+
+def test_shapiro_wilk_matches_scipy(data):
+    result = shapiro_wilk(NormalitySample(data))
+    expected = stats.shapiro(data)
+    assert result.statistic == pytest.approx(expected.statistic, rel=1e-12)
+    assert result.p_value == pytest.approx(expected.pvalue, rel=1e-9, abs=1e-300)
+
+
+def test_dagostino_pearson_matches_scipy(data):
+    result = dagostino_pearson(NormalitySample(data))
+    expected = stats.normaltest(data)
+    assert result.statistic == pytest.approx(expected.statistic, rel=1e-9)
+    assert result.p_value == pytest.approx(expected.pvalue, rel=1e-6, abs=1e-300)
+
+
+def test_jarque_bera_matches_scipy(data):
+    result = jarque_bera(NormalitySample(data))
+    expected = stats.jarque_bera(data)
+    assert result.statistic == pytest.approx(expected.statistic, rel=1e-9)
+    assert result.p_value == pytest.approx(expected.pvalue, rel=1e-6, abs=1e-300)
+
+
+# Newer SciPy asks for a p-value method, which the statistic does not depend on
+@pytest.mark.filterwarnings("ignore::FutureWarning")
+def test_anderson_darling_statistic_matches_scipy(data):
+    result = anderson_darling(NormalitySample(data))
+    assert result.statistic == pytest.approx(stats.anderson(data).statistic, rel=1e-9)
+
+
+def test_kolmogorov_smirnov_matches_scipy(data):
+    result = kolmogorov_smirnov(NormalitySample(data))
+    # Against the normal fitted by maximum likelihood
+    expected = stats.kstest(data, "norm", args=(data.mean(), data.std()))
+    assert result.statistic == pytest.approx(expected.statistic, rel=1e-9)
+    assert result.p_value == pytest.approx(expected.pvalue, rel=1e-6, abs=1e-300)
+
+
+def test_moment_tests_on_merged_chunks_match_the_full_data():
+    data = SAMPLES["skewed"]
+    moments = MomentAccumulator()
+    for chunk in np.array_split(data, 7):
+        moments.merge(MomentAccumulator.from_array(chunk))
+    streamed = NormalitySample.from_moments(moments)
+    for test in (dagostino_pearson, jarque_bera):
+        assert test(streamed).statistic == pytest.approx(test(NormalitySample(data)).statistic, rel=1e-9)
+
+
+def test_tests_that_need_the_data_refuse_moments():
+    streamed = NormalitySample.from_moments(MomentAccumulator.from_array(SAMPLES["normal"]))
+    with pytest.raises(ValueError, match="full data"):
+        run_test("Shapiro-Wilk", streamed)
+
+
+@pytest.mark.parametrize("name", sorted(TESTS))
+def test_constant_data_is_rejected(name):
+    with pytest.raises(ValueError, match="constant data"):
+        run_test(name, NormalitySample(np.full(50, 4.2)))
+
+
+@pytest.mark.parametrize("name", ["D'Agostino-Pearson", "Jarque-Bera"])
+def test_constant_streamed_data_is_rejected(name):
+    moments = MomentAccumulator()
+    for chunk in np.array_split(np.full(10_000, 0.1), 9):
+        moments.merge(MomentAccumulator.from_array(chunk))
+    with pytest.raises(ValueError, match="constant data"):
+        run_test(name, NormalitySample.from_moments(moments))
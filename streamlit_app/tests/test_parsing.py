@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from statsapp.parsing import ParseError, _TO_NEWLINE, _convert_pandas, parse_numbers, parse_proportions
+
+
+def test_every_separator_splits_values():
+    values, errors = parse_numbers("1,2;3 4\t5\n6\r\n7,, ;8")
+    np.testing.assert_array_equal(values, np.arange(1, 9))
+    assert errors == []
+
+
+def test_values_round_trip():
+    values = np.random.default_rng(0).normal(size=10_000)
+    parsed, _ = parse_numbers(", ".join(map(repr, values.tolist())))
+    np.testing.assert_array_equal(parsed, values)
+
+
+def test_missing_markers_are_skipped():
+    values, errors = parse_numbers("1 nan NA 2 null NaN")
+    np.testing.assert_array_equal(values, [1, 2])
+    assert errors == []
+
+
+def test_malformed_tokens_are_reported_with_their_positions():
+    text = "1, 2, x\n 3;4..5\n\nabc  6 7é 8"
+    values, errors = parse_numbers(text)
+    np.testing.assert_array_equal(values, [1, 2, 3, 6, 8])
+    assert errors == [
+        ParseError(3, 1, 7, "x"),
+        ParseError(5, 2, 4, "4..5"),
+        ParseError(6, 4, 1, "abc"),
+        ParseError(8, 4, 8, "7é"),
+    ]
+
+
+def test_infinite_values_are_reported_like_malformed_tokens():
+    values, errors = parse_numbers("1 inf 2\n-Infinity 1e999 3")
+    np.testing.assert_array_equal(values, [1, 2, 3])
+    assert [(e.position, e.line, e.column, e.token) for e in errors] == [
+        (2, 1, 3, "inf"), (4, 2, 1, "-Infinity"), (5, 2, 11, "1e999"),
+    ]
+
+
+@pytest.mark.parametrize("text", ["1 2 3", "1 2 x inf 4"])
+def test_pandas_fallback_finds_the_same_tokens(text):
+    numbers, bad = _convert_pandas(text.translate(_TO_NEWLINE))
+    expected = [index for index, token in enumerate(text.split()) if token in ("x",)]
+    assert [int(index) for index in bad] == expected
+    assert numbers.size == len(text.split())
+
+
+def test_empty_text():
+    values, errors = parse_numbers("  \n ")
+    assert values.size == 0 and errors == []
+
+
+def test_parse_proportions():
+    assert parse_proportions("A=0.5, B=0.3; C = 0.2\nD=1") == {"A": 0.5, "B": 0.3, "C": 0.2, "D": 1.0}
+    with pytest.raises(ValueError, match="Not a number"):
+        parse_proportions("A=x")
+    with pytest.raises(ValueError, match="category=proportion"):
+        parse_proportions("0.5")
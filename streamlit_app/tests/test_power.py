@@ -0,0 +1,77 @@
+import pytest
+
+from statsapp.core.power import (
+    CHI_SQUARE,
+    HEAVY_TAILED,
+    LEFT_TAILED,
+    MAX_DRAWS,
+    NORMAL,
+    RIGHT_TAILED,
+    SKEWED,
+    T_TEST,
+    TWO_TAILED,
+    Z_TEST,
+    analytic_power,
+    analytic_sample_size,
+    simulate_power,
+    simulated_sample_size,
+)
+
+
+@pytest.mark.parametrize("test, effect, size, alpha, tail", [
+    (Z_TEST, 0.5, 32, 0.05, TWO_TAILED),
+    (Z_TEST, -0.2, 50, 0.05, LEFT_TAILED),
+    (T_TEST, 0.5, 34, 0.05, TWO_TAILED),
+    (T_TEST, 0.3, 20, 0.01, RIGHT_TAILED),
+    (T_TEST, 0.8, 5, 0.05, TWO_TAILED),
+])
+def test_simulated_power_matches_closed_form(test, effect, size, alpha, tail):
+    # For normal data the closed forms are exact, so only Monte Carlo error separates them
+    expected = float(analytic_power(test, effect, size, alpha, tail))
+    result = simulate_power(test, effect, size, alpha, tail, seed=7)
+    assert result.converged
+    assert result.power == pytest.approx(expected, abs=4 * result.standard_error)
+
+
+@pytest.mark.parametrize("effect, size, df", [(0.3, 200, 4), (0.2, 300, 9)])
+def test_simulated_chi_square_power_is_close_to_the_noncentral_approximation(effect, size, df):
+    # The noncentral chi-square distribution is only an approximation of the multinomial counts
+    expected = float(analytic_power(CHI_SQUARE, effect, size, df=df))
+    assert simulate_power(CHI_SQUARE, effect, size, df=df, seed=7).power == pytest.approx(expected, abs=0.01)
+
+
+@pytest.mark.parametrize("test, size", [(Z_TEST, 32), (T_TEST, 34)])
+def test_sample_size_for_a_medium_effect(test, size):
+    analytic = analytic_sample_size(test, 0.5, 0.8)
+    assert analytic.size == size
+    assert analytic.power >= 0.8 > analytic_power(test, 0.5, size - 1)
+
+    simulated = simulated_sample_size(test, 0.5, 0.8, seed=1, target_se=0.002)
+    assert simulated.size == size
+    assert simulated.power == pytest.approx(analytic.power, abs=4 * simulated.standard_error)
+
+
+def test_simulation_does_not_depend_on_the_number_of_workers():
+    single = simulate_power(T_TEST, 0.2, 40, distribution=SKEWED, max_simulations=20_000, seed=3)
+    parallel = simulate_power(T_TEST, 0.2, 40, distribution=SKEWED, max_simulations=20_000, seed=3, workers=2)
+    assert single == parallel
+
+
+def test_simulations_are_bounded():
+    with pytest.raises(ValueError, match="Use at most 10,000 simulations"):
+        simulate_power(T_TEST, 0.5, MAX_DRAWS // 10_000, distribution=HEAVY_TAILED, max_simulations=20_000)
+    with pytest.raises(ValueError, match="Use samples of at most"):
+        simulate_power(Z_TEST, 0.5, MAX_DRAWS, distribution=SKEWED)
+    # Normal data is simulated through the distribution of the statistic, whatever the sample size
+    assert simulate_power(Z_TEST, 0.01, MAX_DRAWS, distribution=NORMAL, seed=0).power > 0.99
+
+
+def test_invalid_parameters():
+    with pytest.raises(ValueError, match="Unknown test"):
+        analytic_power("F-Test", 0.5, 10)
+    with pytest.raises(ValueError, match="no effect"):
+        analytic_sample_size(T_TEST, 0.0)
+    with pytest.raises(ValueError, match="at least 2"):
+        simulate_power(T_TEST, 0.5, 1)
+    with pytest.raises(ValueError, match="cannot exceed"):
+        simulate_power(CHI_SQUARE, 2.0, 10, df=1)
@@ -0,0 +1,81 @@
+import asyncio
+import json
+from http import HTTPStatus
+
+import pytest
+from scipy import stats
+
+from statsapp.service import HTTPError, Service
+
+
+def run(coroutine_function):
+    service = Service()
+    try:
+        return asyncio.run(coroutine_function(service))
+    finally:
+        service.executor.shutdown()
+
+
+def test_respond_batches_concurrent_requests():
+    async def scenario(service):
+        bodies = [json.dumps({"statistic": value}).encode() for value in (0.5, 1.0, 1.5)]
+        bodies.append(json.dumps([{"statistic": 2.0}, {"statistic": "x"}]).encode())
+        responses = await asyncio.gather(*(service.respond("POST", "/v1/p_value", body) for body in bodies))
+        return responses, service.metrics.batches["p_value"]
+
+    responses, (requests, items, batches, _) = run(scenario)
+    for (status, content_type, payload), value in zip(responses[:3], (0.5, 1.0, 1.5)):
+        assert status == HTTPStatus.OK and content_type == "application/json"
+        assert json.loads(payload)["p_value"] == pytest.approx(2 * stats.norm.sf(value))
+    status, _, payload = responses[3]
+    assert status == HTTPStatus.OK
+    results = json.loads(payload)
+    assert results[0]["p_value"] == pytest.approx(2 * stats.norm.sf(2.0))
+    assert results[1] == {"error": "'statistic' must be a number."}
+    # Requests that arrive together are evaluated in one vectorised call
+    assert (requests, items, batches) == (4, 5, 1)
+
+
+def test_respond_errors():
+    async def scenario(service):
+        single = await service.respond("POST", "/v1/mean_interval", b'{"mean": 1}')
+        errors = []
+        for method, path, body in [
+            ("POST", "/v1/p_value", b"{"),
+            ("POST", "/v1/median", b"{}"),
+            ("GET", "/v1/p_value", b""),
+        ]:
+            with pytest.raises(HTTPError) as error:
+                await service.respond(method, path, body)
+            errors.append(error.value.status)
+        return single, errors
+
+    (status, _, payload), errors = run(scenario)
+    # A single bad request is a 400 with its error
+    assert status == HTTPStatus.BAD_REQUEST
+    assert json.loads(payload) == {"error": "Missing parameter 'std_dev'."}
+    assert errors == [HTTPStatus.BAD_REQUEST, HTTPStatus.NOT_FOUND, HTTPStatus.METHOD_NOT_ALLOWED]
+
+
+def test_http_round_trip():
+    async def scenario(service):
+        server = await asyncio.start_server(service.handle_connection, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            body = b'{"alpha": 0.05, "dist": "t", "df": 10}'
+            writer.write(
+                b"POST /v1/critical_value HTTP/1.1\r\nHost: test\r\nConnection: close\r\n"
+                + f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+            await writer.wait_closed()
+        return response, service.metrics.text()
+
+    response, metrics = run(scenario)
+    head, _, payload = response.partition(b"\r\n\r\n")
+    assert head.startswith(b"HTTP/1.1 200 OK")
+    assert json.loads(payload)["critical_value"] == pytest.approx(stats.t.isf(0.025, 10), abs=1e-4)
+    assert 'statsapp_service_responses_total{path="/v1/critical_value",status="200"} 1' in metrics
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from statsapp.core.significance import (
+    LEFT_TAILED, RIGHT_TAILED, TWO_TAILED, batch_significance, benjamini_hochberg, bonferroni, critical_values,
+    p_values, tail_codes,
+)
+
+STATISTICS = np.array([-3.1, -1.2, 0.0, 0.4, 1.96, 2.7])
+TAIL_COLUMN = np.array([TWO_TAILED, LEFT_TAILED, RIGHT_TAILED, "two", "left", "right"], dtype=object)
+
+
+def expected_p_values(sf, cdf, statistic, tails):
+    codes = tail_codes(tails)
+    return np.where(codes == 0, 2 * sf(np.abs(statistic)), np.where(codes == 1, cdf(statistic), sf(statistic)))
+
+
+def test_normal_p_values_match_scipy():
+    expected = expected_p_values(stats.norm.sf, stats.norm.cdf, STATISTICS, TAIL_COLUMN)
+    np.testing.assert_allclose(p_values("norm", STATISTICS, tail=TAIL_COLUMN), expected, rtol=1e-12)
+
+
+@pytest.mark.parametrize("df", [1, 7.5, 30, 2000])
+def test_t_p_values_match_scipy(df):
+    expected = expected_p_values(lambda x: stats.t.sf(x, df), lambda x: stats.t.cdf(x, df), STATISTICS, TAIL_COLUMN)
+    np.testing.assert_allclose(p_values("t", STATISTICS, df, TAIL_COLUMN), expected, rtol=1e-12)
+
+
+def test_chi_square_p_values_are_right_tailed():
+    statistic = np.array([0.1, 3.84, 12.0, 40.0])
+    df = np.array([1, 1, 4, 20])
+    np.testing.assert_allclose(p_values("chi2", statistic, df, LEFT_TAILED), stats.chi2.sf(statistic, df), rtol=1e-12)
+
+
+@pytest.mark.parametrize("alpha", [0.05, 0.01, 0.0123, 0.1])
+def test_critical_values_match_scipy(alpha):
+    tails = np.array([TWO_TAILED, LEFT_TAILED, RIGHT_TAILED], dtype=object)
+    q = np.array([alpha / 2, alpha, alpha])
+    sign = np.array([1, -1, 1])
+    np.testing.assert_allclose(critical_values("norm", alpha, tail=tails), sign * stats.norm.isf(q), rtol=1e-12)
+    for df in [1, 12, 999, 5000]:
+        # Tabulated values are interpolated to within 1e-4
+        np.testing.assert_allclose(critical_values("t", alpha, df, tails), sign * stats.t.isf(q, df), rtol=1e-4)
+        np.testing.assert_allclose(critical_values("chi2", alpha, df), stats.chi2.isf(alpha, df), rtol=1e-4)
+
+
+def test_missing_tail_is_rejected():
+    with pytest.raises(ValueError, match="row 2"):
+        p_values("norm", [1.0, 2.0, 3.0], tail=np.array([RIGHT_TAILED, None, LEFT_TAILED], dtype=object))
+    with pytest.raises(ValueError, match="row 1"):
+        critical_values("t", 0.05, 10, np.array([np.nan, np.nan], dtype=object))
+
+
+def test_unknown_tail_is_rejected():
+    with pytest.raises(ValueError, match="Unknown tail type"):
+        p_values("norm", [1.0], tail=["upper"])
+
+
+def test_batch_fills_missing_tails_with_the_default():
+    frame = pd.DataFrame({"Statistic": [2.0, 2.0, -2.0], "Tail": ["Right-Tailed", None, "left"]})
+    results = batch_significance(frame, "norm", 0.05, default_tail=TWO_TAILED)
+    expected = [stats.norm.sf(2.0), 2 * stats.norm.sf(2.0), stats.norm.cdf(-2.0)]
+    np.testing.assert_allclose(results["p_value"], expected, rtol=1e-12)
+    assert list(results["tail"]) == ["Right-Tailed", TWO_TAILED, "left"]
+
+
+def test_corrections_match_scipy():
+    p = np.array([0.01, 0.04, 0.03, 0.2, 0.005])
+    np.testing.assert_allclose(benjamini_hochberg(p), stats.false_discovery_control(p), rtol=1e-12)
+    np.testing.assert_allclose(bonferroni(p), np.minimum(p * 5, 1))
+
+
+@pytest.mark.parametrize("correction, adjust", [
+    ("Benjamini-Hochberg", stats.false_discovery_control),
+    ("Bonferroni", lambda p: np.minimum(p * p.size, 1)),
+])
+def test_blank_statistics_are_left_out_of_the_correction(correction, adjust):
+    statistic = [3.0, None, 2.5, 0.3, np.nan, 2.0]
+    frame = pd.DataFrame({"statistic": statistic})
+    results = batch_significance(frame, "norm", 0.05, correction=correction)
+    blank = results["statistic"].isna().to_numpy()
+    expected = adjust(2 * stats.norm.sf(np.abs(results["statistic"][~blank].to_numpy())))
+    np.testing.assert_allclose(results["adjusted_p_value"][~blank], expected, rtol=1e-12)
+    assert results["adjusted_p_value"][blank].isna().all()
+    assert not results["reject"][blank].any()
+    assert results["reject"][~blank].any()
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from statsapp.core.sketches import HistogramSketch, QuantileSketch
+
+DATA = np.random.default_rng(8).standard_t(4, 200_000) * 3 + 50
+PARTS = np.array_split(DATA, [1000, 1001, 70_000, 150_000])
+
+
+def test_merged_histogram_equals_a_single_pass():
+    single = HistogramSketch().update(DATA)
+    merged = HistogramSketch()
+    for part in PARTS:
+        merged.merge(HistogramSketch().update(part))
+    assert (merged.start, merged.exponent) == (single.start, single.exponent)
+    np.testing.assert_array_equal(merged.counts, single.counts)
+    assert (merged.min, merged.max) == (DATA.min(), DATA.max())
+
+
+def test_histogram_counts_match_numpy():
+    sketch = HistogramSketch().update(np.append(DATA, [np.nan, np.inf]))
+    counts, _ = np.histogram(DATA, bins=sketch.edges)
+    np.testing.assert_array_equal(sketch.counts, counts)
+    assert sketch.total == DATA.size
+
+
+def test_histogram_of_a_constant():
+    sketch = HistogramSketch().update(np.full(10, 2.5))
+    density, edges = sketch.density()
+    assert sketch.total == 10
+    assert edges[0] < 2.5 < edges[-1]
+    assert density.sum() * (edges[1] - edges[0]) == pytest.approx(1)
+
+
+def rank_errors(sketch, q):
+    # Fraction of the data between the sketch's quantiles and the requested ranks
+    ranks = np.searchsorted(np.sort(DATA), sketch.quantiles(q), side="right") / DATA.size
+    return np.abs(ranks - q)
+
+
+@pytest.mark.parametrize("k", [200, 1000])
+def test_merged_quantiles_are_as_accurate_as_a_single_pass(k):
+    q = np.linspace(0, 1, 101)
+    single = QuantileSketch(k).update(DATA)
+    merged = QuantileSketch(k)
+    for seed, part in enumerate(PARTS):
+        merged.merge(QuantileSketch(k, seed=seed).update(part))
+    assert merged.count == single.count == DATA.size
+    tolerance = 2 / k
+    assert rank_errors(single, q).max() <= tolerance
+    assert rank_errors(merged, q).max() <= tolerance
+    assert merged.size <= 3 * k
+
+
+def test_quantile_sketch_cdf_inverts_its_quantiles():
+    sketch = QuantileSketch().update(DATA)
+    q = np.array([0.01, 0.25, 0.5, 0.75, 0.99])
+    np.testing.assert_allclose(sketch.cdf(sketch.quantiles(q)), q, atol=1e-3)
+
+
+def test_sketches_only_merge_with_their_kind():
+    with pytest.raises(ValueError):
+        HistogramSketch(64).merge(HistogramSketch(128).update([1.0]))
+    with pytest.raises(ValueError):
+        QuantileSketch(100).merge(QuantileSketch(200).update([1.0]))